@@ -18,6 +18,7 @@ KEY="$STACK_NAME.zip"
 LAMBDA_FUNCTIONS=(
   "GetTeams-$ENV"
   "GetPlayersFromTeam-$ENV"
+  "GetPlayersFromTeams-$ENV"
   "MakePredictions-$ENV"
   "GetTims-$ENV"
   "PerformBackfilling-$ENV"
@@ -68,6 +69,7 @@ generate_smartscore_stack() {
         ParameterKey=BrevoSmtpKey,ParameterValue="$BREVO_SMTP_KEY" \
         ParameterKey=BrevoFromEmail,ParameterValue="$BREVO_FROM_EMAIL" \
         ParameterKey=FeatureSendEmails,ParameterValue="$FEATURE_SEND_EMAILS" \
+        ParameterKey=FeatureBatchDeleteGames,ParameterValue="${FEATURE_BATCH_DELETE_GAMES:-false}" \
       --capabilities CAPABILITY_NAMED_IAM 2>&1)
 
     if echo "$UPDATE_OUTPUT" | grep -q "No updates are to be performed."; then
@@ -89,6 +91,7 @@ generate_smartscore_stack() {
         ParameterKey=BrevoSmtpKey,ParameterValue="$BREVO_SMTP_KEY" \
         ParameterKey=BrevoFromEmail,ParameterValue="$BREVO_FROM_EMAIL" \
         ParameterKey=FeatureSendEmails,ParameterValue="$FEATURE_SEND_EMAILS" \
+        ParameterKey=FeatureBatchDeleteGames,ParameterValue="${FEATURE_BATCH_DELETE_GAMES:-false}" \
       --capabilities CAPABILITY_NAMED_IAM
 
     echo "Waiting for CloudFormation stack creation to complete..."
@@ -1,9 +1,13 @@
+#include <math.h>
+#include <stdint.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 
-// Constants
-#define STEP_SIZE 2.5
+// Weights enumerated by the search, is_home takes what is left
+#define FREE_WEIGHTS 6
+// Weight combinations handed to an OpenMP thread at a time
+#define RANKS_PER_TASK 4096
 
 // Structs
 typedef struct
@@ -32,9 +36,17 @@ typedef struct
     float hppg_otshga;
     float scored;
     float tims;
-    char *date;
 } TestingPlayerInfo;
 
+// CSR offsets of the (date, Tims group) segments, built once in Python when the players are loaded.
+// The picks of group g (1-3) on date d are rows[group_offsets[3 * d + g - 1] .. group_offsets[3 * d + g]]
+typedef struct
+{
+    const int *group_offsets;
+    const int *rows;
+    int num_dates;
+} SegmentIndex;
+
 typedef struct
 {
     float min_gpg;
@@ -62,4 +74,13 @@ typedef struct
     float otga;
     float is_home;
     float hppg_otshga;
-} Weights;
\ No newline at end of file
+} Weights;
+
+// Best weights of a search. Ties keep the combination that comes later in the search order,
+// correct is -1 when no combination was searched or the search ran out of memory
+typedef struct
+{
+    Weights weights;
+    int correct;
+    int total;
+} SearchResult;
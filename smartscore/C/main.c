@@ -92,121 +92,205 @@ void process_players(PlayerInfo *players, int num_players, MinMax min_max, float
 }
 
 // Function to check probabilities and return the number of correct predictions
-int check_probabilities(TestingPlayerInfo *players, float *probabilities, int num_players)
+int check_probabilities(const TestingPlayerInfo *players, const float *probabilities, SegmentIndex segments)
 {
     int correct = 0;
 
-    int highest_prob_indices[3];
-    float highest_prob_values[3];
-    char last_date[20];
-    strcpy(last_date, players[0].date);
-
-    for (int i = 0; i < 3; i++)
-        highest_prob_values[i] = -1.0f;
-
-    for (int i = 0; i < num_players; i++)
+    for (int segment = 0; segment < segments.num_dates * 3; segment++)
     {
-        if (strcmp(last_date, players[i].date) != 0 || i == num_players - 1)
+        int start = segments.group_offsets[segment];
+        int end = segments.group_offsets[segment + 1];
+        if (start == end)
+            continue;
+
+        // The first player with the highest probability is the group's pick
+        int best = segments.rows[start];
+        for (int k = start + 1; k < end; k++)
         {
-            for (int j = 0; j < 3; j++)
-            {
-                if (highest_prob_values[j] != -1.0f && players[highest_prob_indices[j]].scored)
-                {
-                    correct++;
-                }
-            }
+            int i = segments.rows[k];
+            if (probabilities[i] > probabilities[best])
+                best = i;
+        }
 
-            for (int j = 0; j < 3; j++)
-                highest_prob_values[j] = -1.0f;
+        if (players[best].scored > 0.0f)
+            correct++;
+    }
 
-            strcpy(last_date, players[i].date);
-        }
+    return correct;
+}
 
-        if (probabilities[i] > highest_prob_values[(int)players[i].tims - 1])
+// n choose k, exact for every count that fits in 64 bits
+static uint64_t binomial(uint64_t n, uint64_t k)
+{
+    if (k > n - k)
+        k = n - k;
+    unsigned __int128 result = 1;
+    for (uint64_t i = 0; i < k; i++)
+        result = result * (n - i) / (i + 1);
+    return (uint64_t)result;
+}
+
+// Ways to give `parts` weights a total of at most `budget` steps
+static uint64_t completions(int budget, int parts)
+{
+    return binomial((uint64_t)budget + parts, parts);
+}
+
+// Step counts of the combination at `rank` in lexicographic order (gpg outermost), same order as the Rust search
+static void unrank(uint64_t rank, int n, int *steps)
+{
+    int budget = n;
+    for (int position = 0; position < FREE_WEIGHTS; position++)
+    {
+        int later = FREE_WEIGHTS - position - 1;
+        steps[position] = 0;
+        for (;;)
         {
-            highest_prob_values[(int)players[i].tims - 1] = probabilities[i];
-            highest_prob_indices[(int)players[i].tims - 1] = i;
+            uint64_t block = completions(budget - steps[position], later);
+            if (rank < block)
+                break;
+            rank -= block;
+            steps[position]++;
         }
+        budget -= steps[position];
     }
+}
 
-    return correct;
+// Move `steps` to the next combination
+static void advance(int *steps, int n)
+{
+    int used = 0;
+    for (int position = 0; position < FREE_WEIGHTS; position++)
+        used += steps[position];
+    for (int position = FREE_WEIGHTS - 1; position >= 0; position--)
+    {
+        if (used < n)
+        {
+            steps[position]++;
+            return;
+        }
+        used -= steps[position];
+        steps[position] = 0;
+    }
 }
 
-// Main function to test weights and print best results
-void test_weights(TestingPlayerInfo *players, int num_players, MinMax min_max, float *probabilities, int num_tims_dates)
+static Weights steps_to_weights(const int *steps, int n, float step)
 {
+    int remainder = n;
+    for (int position = 0; position < FREE_WEIGHTS; position++)
+        remainder -= steps[position];
+
     Weights weights;
-    Weights max_weights;
-    int max_correct = -1;
+    weights.gpg = (float)steps[0] * step;
+    weights.five_gpg = (float)steps[1] * step;
+    weights.hgpg = (float)steps[2] * step;
+    weights.tgpg = (float)steps[3] * step;
+    weights.otga = (float)steps[4] * step;
+    weights.hppg_otshga = (float)steps[5] * step;
+    weights.is_home = (float)remainder * step;
+    return weights;
+}
 
-    printf("Normalizing stats...\n");
-    extended_testing_normalize_stats(players, num_players, min_max.min_gpg, min_max.max_gpg,
+// Search every weight combination for `step_size` (in percent) on all cores.
+// `players` is read only, e.g. a NumPy structured array with the TestingPlayerInfo layout, sorted by date.
+SearchResult search_weights(const TestingPlayerInfo *players, int num_players, MinMax min_max, SegmentIndex segments, float step_size)
+{
+    SearchResult best = {.correct = -1, .total = 3 * segments.num_dates};
+    if (!(step_size > 0.0f && step_size <= 100.0f))
+        return best;
+
+    // Integer step counts avoid accumulating float error in the loops, weights match the Rust generator
+    float step = step_size / 100.0f;
+    int n = (int)roundf(1.0f / step);
+    uint64_t count = completions(n, FREE_WEIGHTS);
+    int64_t num_tasks = (int64_t)((count + RANKS_PER_TASK - 1) / RANKS_PER_TASK);
+
+    // Normalize once into a copy, the caller's array is left untouched
+    TestingPlayerInfo *normalized = malloc((size_t)num_players * sizeof(TestingPlayerInfo));
+    if (normalized == NULL && num_players > 0)
+        return best;
+    memcpy(normalized, players, (size_t)num_players * sizeof(TestingPlayerInfo));
+    extended_testing_normalize_stats(normalized, num_players, min_max.min_gpg, min_max.max_gpg,
                                      min_max.min_five_gpg, min_max.max_five_gpg, min_max.min_hgpg, min_max.max_hgpg,
                                      min_max.min_tgpg, min_max.max_tgpg, min_max.min_otga, min_max.max_otga,
                                      min_max.min_hppg, min_max.max_hppg, min_max.min_otshga, min_max.max_otshga);
 
-    printf("Calculating probabilities...\n");
-    for (int gpg_weight = 0; gpg_weight <= 100; gpg_weight += STEP_SIZE)
+    // Each thread keeps its best (correct, rank), the highest of those wins so later ranks win ties
+    int best_correct = -1;
+    uint64_t best_rank = 0;
+    // Set when a thread cannot allocate its scratch, the search is then incomplete and reported as failed
+    int failed = 0;
+
+#pragma omp parallel
     {
-        for (int five_gpg_weight = 0; five_gpg_weight <= 100 - gpg_weight; five_gpg_weight += STEP_SIZE)
+        float *probabilities = malloc(((size_t)num_players + 1) * sizeof(float));
+        int thread_correct = -1;
+        uint64_t thread_rank = 0;
+        int steps[FREE_WEIGHTS];
+        if (probabilities == NULL)
+        {
+#pragma omp atomic write
+            failed = 1;
+        }
+
+#pragma omp for schedule(dynamic)
+        for (int64_t task = 0; task < num_tasks; task++)
         {
-            for (int hgpg_weight = 0; hgpg_weight <= 100 - gpg_weight - five_gpg_weight; hgpg_weight += STEP_SIZE)
+            // Every thread still has to reach the end of the loop, the remaining tasks are skipped
+            int stop;
+#pragma omp atomic read
+            stop = failed;
+            if (stop)
+                continue;
+
+            uint64_t start = (uint64_t)task * RANKS_PER_TASK;
+            uint64_t end = start + RANKS_PER_TASK < count ? start + RANKS_PER_TASK : count;
+            unrank(start, n, steps);
+
+            for (uint64_t rank = start; rank < end; rank++)
             {
-                for (int tgpg_weight = 0; tgpg_weight <= 100 - gpg_weight - five_gpg_weight - hgpg_weight; tgpg_weight += STEP_SIZE)
+                Weights weights = steps_to_weights(steps, n, step);
+                for (int i = 0; i < num_players; i++)
+                {
+                    probabilities[i] = (normalized[i].gpg * weights.gpg) +
+                                       (normalized[i].five_gpg * weights.five_gpg) +
+                                       (normalized[i].hgpg * weights.hgpg) +
+                                       (normalized[i].tgpg * weights.tgpg) +
+                                       (normalized[i].otga * weights.otga) +
+                                       (normalized[i].hppg_otshga * weights.hppg_otshga) +
+                                       (normalized[i].is_home * weights.is_home);
+                }
+
+                int correct = check_probabilities(normalized, probabilities, segments);
+                if (correct >= thread_correct)
                 {
-                    for (int otga_weight = 0; otga_weight <= 100 - gpg_weight - five_gpg_weight - hgpg_weight - tgpg_weight; otga_weight += STEP_SIZE)
-                    {
-                        for (int hppg_otshga_weight = 0; hppg_otshga_weight <= 100 - gpg_weight - five_gpg_weight - hgpg_weight - tgpg_weight - otga_weight; hppg_otshga_weight += STEP_SIZE)
-                        {
-                            int is_home_weight = 100 - gpg_weight - five_gpg_weight - hgpg_weight - tgpg_weight - otga_weight - hppg_otshga_weight;
-
-                            weights.gpg = gpg_weight / 100.0;
-                            weights.five_gpg = five_gpg_weight / 100.0;
-                            weights.hgpg = hgpg_weight / 100.0;
-                            weights.tgpg = tgpg_weight / 100.0;
-                            weights.otga = otga_weight / 100.0;
-                            weights.hppg_otshga = hppg_otshga_weight / 100.0;
-                            weights.is_home = is_home_weight / 100.0;
-
-                            // force weights for single run
-                            // weights.gpg = 0.3;
-                            // weights.five_gpg = 0.4;
-                            // weights.hgpg = 0.3;
-                            // weights.tgpg = 0.0;
-                            // weights.otga = 0.0;
-                            // weights.hppg_otshga = 0.0;
-                            // weights.is_home = 0.0;
-
-                            for (int i = 0; i < num_players; i++)
-                            {
-                                probabilities[i] = (players[i].gpg * weights.gpg) +
-                                                   (players[i].five_gpg * weights.five_gpg) +
-                                                   (players[i].hgpg * weights.hgpg) +
-                                                   (players[i].tgpg * weights.tgpg) +
-                                                   (players[i].otga * weights.otga) +
-                                                   (players[i].hppg_otshga * weights.hppg_otshga) +
-                                                   (players[i].is_home * weights.is_home);
-                            }
-
-                            int correct = check_probabilities(players, probabilities, num_players);
-                            if (correct >= max_correct)
-                            {
-                                max_correct = correct;
-                                max_weights = weights;
-                            }
-
-                            // for single run
-                            // break;
-                        }
-                    }
+                    thread_correct = correct;
+                    thread_rank = rank;
                 }
+                advance(steps, n);
+            }
+        }
+
+#pragma omp critical
+        {
+            if (thread_correct > best_correct || (thread_correct == best_correct && thread_rank > best_rank))
+            {
+                best_correct = thread_correct;
+                best_rank = thread_rank;
             }
         }
+        free(probabilities);
     }
 
-    printf("\nDone testing weights...\n");
-    printf("Max correct: %d\n", max_correct);
-    printf("Number of dates: %d\n", num_tims_dates);
-    printf("Accuracy: %f\n", (float)max_correct / (num_tims_dates * 3));
-    printf("Weights: gpg: %f, five_gpg: %f, hgpg: %f, tgpg: %f, otga: %f, hppg_otshga: %f, is_home: %f\n", max_weights.gpg, max_weights.five_gpg, max_weights.hgpg, max_weights.tgpg, max_weights.otga, max_weights.hppg_otshga, max_weights.is_home);
+    free(normalized);
+    if (failed)
+        return best;
+    if (best_correct >= 0)
+    {
+        int steps[FREE_WEIGHTS];
+        unrank(best_rank, n, steps);
+        best.weights = steps_to_weights(steps, n, step);
+        best.correct = best_correct;
+    }
+    return best;
 }
@@ -0,0 +1,55 @@
+//! Reproducible synthetic inputs shared by the bench targets.
+
+#![allow(dead_code)]
+
+use make_predictions_rust::data_types::{MinMax, PlayerInfo, Weights};
+
+/// Tims picks per synthetic date, 20 per group
+pub const PICKS_PER_DATE: usize = 60;
+
+// Small LCG so the data is reproducible without pulling in `rand`
+pub struct Lcg(pub u32);
+
+impl Lcg {
+    pub fn next(&mut self) -> f32 {
+        self.0 = self.0.wrapping_mul(1_664_525).wrapping_add(1_013_904_223);
+        (self.0 >> 8) as f32 / (1 << 24) as f32
+    }
+}
+
+pub fn synthetic_players(n: usize) -> Vec<PlayerInfo> {
+    let mut rng = Lcg(42);
+    (0..n)
+        .map(|i| {
+            let mut player = PlayerInfo::from_stats(&[
+                rng.next(), rng.next(), rng.next(), 2.0 + rng.next() * 2.0,
+                2.0 + rng.next() * 2.0, rng.next() * 0.5, rng.next(), (rng.next() > 0.5) as i32 as f32,
+            ]);
+            player.scored = Some((rng.next() > 0.7) as i32 as f32);
+            player.tims = Some((i % 3) as i32 + 1);
+            player.date = Some(format!("2024-{:04}", i / PICKS_PER_DATE));
+            player
+        })
+        .collect()
+}
+
+pub fn min_max() -> MinMax {
+    MinMax::new(
+        0.0, 1.0, 0.0, 1.0, 0.0, 1.0, 2.0, 4.0, 2.0, 4.0, 0.0, 0.5, 0.0, 1.0,
+    )
+}
+
+pub fn weight_combinations(n: usize) -> Vec<Weights> {
+    let mut rng = Lcg(7);
+    (0..n)
+        .map(|_| Weights {
+            gpg: rng.next(),
+            hgpg: rng.next(),
+            five_gpg: rng.next(),
+            tgpg: rng.next(),
+            otga: rng.next(),
+            is_home: rng.next(),
+            hppg_otshga: rng.next(),
+        })
+        .collect()
+}
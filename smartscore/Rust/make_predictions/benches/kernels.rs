@@ -0,0 +1,162 @@
+//! Throughput of each kernel on the tuning path, and of a whole `test_weights` search.
+//!
+//! Run with `cargo bench --no-default-features --bench kernels`, every input is synthetic so
+//! nothing is downloaded. Player sizes cover one day of picks up to a few seasons.
+
+mod common;
+
+use common::{min_max, synthetic_players, weight_combinations, PICKS_PER_DATE};
+use criterion::{black_box, criterion_group, criterion_main, BatchSize, BenchmarkId, Criterion, Throughput};
+use make_predictions_rust::data_types::Weights;
+use make_predictions_rust::player_batch::{BatchColumns, ScoringColumns};
+use make_predictions_rust::predictions::{calculate_probabilities, normalize_stats};
+use make_predictions_rust::weight_generation::{Simplex, WeightGenerator};
+use make_predictions_rust::weight_testing::{evaluate_correctness_with_total, Evaluator, SearchResult, TILE_WEIGHTS};
+use rayon::prelude::*;
+
+const PLAYER_SIZES: [usize; 3] = [PICKS_PER_DATE, 20_000, 100_000];
+/// Step sizes in percent: 8,008 and 230,230 combinations
+const STEP_SIZES: [f32; 2] = [10.0, 5.0];
+/// Flat combinations per `next_chunk` call, as the Python search loops request them
+const CHUNK: usize = 100_000;
+
+fn bench_normalize(c: &mut Criterion) {
+    let min_max = min_max();
+    let mut group = c.benchmark_group("normalize_stats");
+
+    for size in PLAYER_SIZES {
+        let players = synthetic_players(size);
+        group.throughput(Throughput::Elements(size as u64));
+
+        group.bench_with_input(BenchmarkId::new("rows", size), &players, |b, players| {
+            b.iter_batched(
+                || players.clone(),
+                |mut players| {
+                    normalize_stats(&mut players, &min_max);
+                    players
+                },
+                BatchSize::LargeInput,
+            )
+        });
+
+        let batch = BatchColumns::from_players(&players);
+        group.bench_with_input(BenchmarkId::new("columns", size), &batch, |b, batch| {
+            b.iter(|| black_box(ScoringColumns::new(batch, &min_max)))
+        });
+    }
+    group.finish();
+}
+
+fn bench_probabilities(c: &mut Criterion) {
+    let min_max = min_max();
+    let weights = weight_combinations(1)[0];
+    let mut group = c.benchmark_group("calculate_probabilities");
+
+    for size in PLAYER_SIZES {
+        let mut players = synthetic_players(size);
+        group.throughput(Throughput::Elements(size as u64));
+
+        let batch = BatchColumns::from_players(&players);
+        normalize_stats(&mut players, &min_max);
+        group.bench_with_input(BenchmarkId::new("rows", size), &players, |b, players| {
+            let mut probabilities = vec![0.0; players.len()];
+            b.iter(|| {
+                calculate_probabilities(players, &mut probabilities, &weights);
+                black_box(&probabilities);
+            })
+        });
+
+        let columns = ScoringColumns::new(&batch, &min_max);
+        group.bench_with_input(BenchmarkId::new("columns", size), &columns, |b, columns| {
+            let mut probabilities = vec![0.0; columns.len()];
+            b.iter(|| {
+                columns.score(&weights, &mut probabilities);
+                black_box(&probabilities);
+            })
+        });
+    }
+    group.finish();
+}
+
+// The per-date, per-Tims-group argmax that used to be `process_date_predictions`
+fn bench_date_argmax(c: &mut Criterion) {
+    let min_max = min_max();
+    let weights = weight_combinations(1)[0];
+    let mut group = c.benchmark_group("date_argmax");
+
+    for size in PLAYER_SIZES {
+        let batch = BatchColumns::from_players(&synthetic_players(size));
+        let mut probabilities = vec![0.0; batch.len()];
+        ScoringColumns::new(&batch, &min_max).score(&weights, &mut probabilities);
+        group.throughput(Throughput::Elements(size as u64));
+
+        group.bench_with_input(BenchmarkId::new("segments", size), &probabilities, |b, probabilities| {
+            b.iter(|| black_box(evaluate_correctness_with_total(&batch, probabilities)))
+        });
+    }
+    group.finish();
+}
+
+fn bench_weight_generation(c: &mut Criterion) {
+    let mut group = c.benchmark_group("weight_generation");
+
+    for step_size in STEP_SIZES {
+        let simplex = Simplex::new(step_size).unwrap();
+        group.throughput(Throughput::Elements(simplex.count()));
+
+        group.bench_with_input(BenchmarkId::new("next_chunk", step_size), &step_size, |b, &step_size| {
+            b.iter(|| {
+                let mut generator = WeightGenerator::new(step_size, 0, None).unwrap();
+                while generator.remaining() > 0 {
+                    black_box(generator.next_chunk(CHUNK));
+                }
+            })
+        });
+
+        group.bench_with_input(BenchmarkId::new("range", step_size), &simplex, |b, simplex| {
+            b.iter(|| simplex.range(0, simplex.count()).for_each(|weights| {
+                black_box(weights);
+            }))
+        });
+    }
+    group.finish();
+}
+
+// `test_weights` without the Python conversions: the same rayon fan-out over blocks of combinations
+fn search(batch: &BatchColumns, combinations: &[Weights], early_exit: bool) -> SearchResult {
+    let evaluator = Evaluator::new(batch, &min_max(), early_exit, 0);
+    combinations
+        .par_chunks(TILE_WEIGHTS)
+        .map_init(|| evaluator.scratch(), |scratch, block| evaluator.best_of(block, scratch))
+        .reduce(SearchResult::none, SearchResult::keep_later)
+}
+
+fn bench_test_weights(c: &mut Criterion) {
+    let simplex = Simplex::new(STEP_SIZES[0]).unwrap();
+    let combinations: Vec<Weights> = simplex.range(0, simplex.count()).collect();
+    let mut group = c.benchmark_group("test_weights");
+    group.sample_size(10);
+    group.throughput(Throughput::Elements(combinations.len() as u64));
+
+    for size in [1_000, 20_000] {
+        let batch = BatchColumns::from_players(&synthetic_players(size));
+
+        group.bench_with_input(BenchmarkId::new("full", size), &batch, |b, batch| {
+            b.iter(|| black_box(search(batch, &combinations, false)))
+        });
+        group.bench_with_input(BenchmarkId::new("early_exit", size), &batch, |b, batch| {
+            b.iter(|| black_box(search(batch, &combinations, true)))
+        });
+    }
+    group.finish();
+}
+
+criterion_group!(
+    benches,
+    bench_normalize,
+    bench_probabilities,
+    bench_date_argmax,
+    bench_weight_generation,
+    bench_test_weights
+);
+criterion_main!(benches);
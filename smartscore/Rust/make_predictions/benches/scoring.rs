@@ -0,0 +1,103 @@
+//! Two-pass vs fused scoring throughput.
+//!
+//! Run with `cargo bench --no-default-features`, criterion reports players/sec for `predict`
+//! and weight combinations/sec for the search inner loop.
+
+mod common;
+
+use common::{min_max, synthetic_players, weight_combinations};
+use criterion::{black_box, criterion_group, criterion_main, BenchmarkId, Criterion, Throughput};
+use make_predictions_rust::data_types::PlayerInfo;
+use make_predictions_rust::kernels::{predict_rows, FeatureScaling};
+use make_predictions_rust::player_batch::{BatchColumns, ScoringColumns};
+use make_predictions_rust::predictions::{calculate_probabilities, normalize_stats};
+use make_predictions_rust::weight_testing::{
+    evaluate_correctness_with_total, evaluate_weight_block, DatePlan, TILE_WEIGHTS,
+};
+
+const COMBOS: usize = 256;
+
+fn bench_predict(c: &mut Criterion) {
+    let min_max = min_max();
+    let weights = weight_combinations(1)[0];
+    let mut group = c.benchmark_group("predict");
+
+    for size in [1_000, 20_000] {
+        let players = synthetic_players(size);
+        group.throughput(Throughput::Elements(size as u64));
+
+        group.bench_with_input(BenchmarkId::new("two_pass", size), &players, |b, players| {
+            b.iter(|| {
+                let mut players = players.clone();
+                let mut probabilities = vec![0.0; players.len()];
+                normalize_stats(&mut players, &min_max);
+                calculate_probabilities(&players, &mut probabilities, &weights);
+                black_box(probabilities)
+            })
+        });
+
+        group.bench_with_input(BenchmarkId::new("fused", size), &players, |b, players| {
+            let scaling = FeatureScaling::new(&min_max);
+            let mut probabilities = vec![0.0; players.len()];
+            b.iter(|| {
+                predict_rows(players.iter().map(PlayerInfo::stats), &scaling, &weights, &mut probabilities);
+                black_box(&probabilities);
+            })
+        });
+    }
+    group.finish();
+}
+
+fn bench_search(c: &mut Criterion) {
+    let min_max = min_max();
+    let combinations = weight_combinations(COMBOS);
+    let mut group = c.benchmark_group("search");
+    group.throughput(Throughput::Elements(COMBOS as u64));
+
+    for size in [1_000, 20_000] {
+        let players = synthetic_players(size);
+        let batch = BatchColumns::from_players(&players);
+
+        // Before: normalized rows, a fresh probability vector per combination
+        let mut normalized = players.clone();
+        normalize_stats(&mut normalized, &min_max);
+        group.bench_with_input(BenchmarkId::new("two_pass", size), &normalized, |b, normalized| {
+            b.iter(|| {
+                for weights in &combinations {
+                    let mut probabilities = vec![0.0; normalized.len()];
+                    calculate_probabilities(normalized, &mut probabilities, weights);
+                    black_box(evaluate_correctness_with_total(&batch, &probabilities));
+                }
+            })
+        });
+
+        // After: normalized columns scored in 8-wide lanes into one reused scratch buffer
+        let columns = ScoringColumns::new(&batch, &min_max);
+        group.bench_with_input(BenchmarkId::new("fused", size), &columns, |b, columns| {
+            let mut probabilities = vec![0.0; batch.len()];
+            b.iter(|| {
+                for weights in &combinations {
+                    columns.score(weights, &mut probabilities);
+                    black_box(evaluate_correctness_with_total(&batch, &probabilities));
+                }
+            })
+        });
+
+        // Tiled: each date's players scored against TILE_WEIGHTS combinations at a time
+        let plan = DatePlan::new(&batch);
+        group.bench_with_input(BenchmarkId::new("tiled", size), &columns, |b, columns| {
+            let mut tile = Vec::new();
+            let mut correct = vec![0; TILE_WEIGHTS];
+            b.iter(|| {
+                for block in combinations.chunks(TILE_WEIGHTS) {
+                    evaluate_weight_block(&batch, columns, &plan, block, &mut tile, &mut correct);
+                    black_box(&correct);
+                }
+            })
+        });
+    }
+    group.finish();
+}
+
+criterion_group!(benches, bench_predict, bench_search);
+criterion_main!(benches);
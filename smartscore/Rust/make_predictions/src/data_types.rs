@@ -2,6 +2,19 @@ use pyo3::Bound;
 use pyo3::prelude::*;
 use pyo3::types::PyType;
 
+/// Number of raw stat columns accepted by `predict_array`
+pub const NUM_FEATURES: usize = 8;
+
+/// Column order of the feature matrix accepted by `predict_array` (matches the `PlayerInfo` fields)
+pub const FEATURE_COLUMNS: [&str; NUM_FEATURES] = [
+    "gpg", "hgpg", "five_gpg", "tgpg", "otga", "hppg", "otshga", "is_home",
+];
+
+/// Column order of weight matrices, the order the weighted sum is accumulated in
+pub const WEIGHT_COLUMNS: [&str; 7] = [
+    "gpg", "five_gpg", "hgpg", "tgpg", "otga", "hppg_otshga", "is_home",
+];
+
 #[pyclass]
 #[derive(Clone)]
 pub struct PlayerInfo {
@@ -78,6 +91,33 @@ impl PlayerInfo {
     }
 }
 
+impl PlayerInfo {
+    pub fn from_stats(stats: &[f32; NUM_FEATURES]) -> Self {
+        Self {
+            gpg: stats[0],
+            hgpg: stats[1],
+            five_gpg: stats[2],
+            tgpg: stats[3],
+            otga: stats[4],
+            hppg: stats[5],
+            otshga: stats[6],
+            is_home: stats[7],
+            hppg_otshga: 0.0,
+            scored: None,
+            tims: None,
+            date: None,
+        }
+    }
+
+    /// Raw stats in `FEATURE_COLUMNS` order
+    pub fn stats(&self) -> [f32; NUM_FEATURES] {
+        [
+            self.gpg, self.hgpg, self.five_gpg, self.tgpg,
+            self.otga, self.hppg, self.otshga, self.is_home,
+        ]
+    }
+}
+
 #[pyclass]
 #[derive(Clone)]
 pub struct MinMax {
@@ -218,4 +258,11 @@ impl Weights {
     fn __str__(&self) -> String {
         self.__repr__()
     }
+}
+
+impl Weights {
+    /// Values in `WEIGHT_COLUMNS` order, which is also the order the scores are summed in
+    pub fn values(&self) -> [f32; 7] {
+        [self.gpg, self.five_gpg, self.hgpg, self.tgpg, self.otga, self.hppg_otshga, self.is_home]
+    }
 }
\ No newline at end of file
@@ -0,0 +1,205 @@
+use crate::data_types::{MinMax, Weights, NUM_FEATURES};
+
+/// Players scored per block, one f32 lane each (a 256-bit vector)
+pub const LANES: usize = 8;
+
+pub type Lanes = [f32; LANES];
+
+// Indices into `FEATURE_COLUMNS`
+const GPG: usize = 0;
+const HGPG: usize = 1;
+const FIVE_GPG: usize = 2;
+const TGPG: usize = 3;
+const OTGA: usize = 4;
+const HPPG: usize = 5;
+const OTSHGA: usize = 6;
+const IS_HOME: usize = 7;
+
+/// Per-feature normalization constants in `FEATURE_COLUMNS` order.
+/// The range is kept as a divisor rather than folded into a reciprocal scale so results stay
+/// bit-identical to `normalize_player`. `is_home` is passed through unchanged (offset 0, range 1).
+pub struct FeatureScaling {
+    pub offset: [f32; NUM_FEATURES],
+    pub range: [f32; NUM_FEATURES],
+}
+
+impl FeatureScaling {
+    pub fn new(min_max: &MinMax) -> Self {
+        let bounds = [
+            (min_max.min_gpg, min_max.max_gpg),
+            (min_max.min_hgpg, min_max.max_hgpg),
+            (min_max.min_five_gpg, min_max.max_five_gpg),
+            (min_max.min_tgpg, min_max.max_tgpg),
+            (min_max.min_otga, min_max.max_otga),
+            (min_max.min_hppg, min_max.max_hppg),
+            (min_max.min_otshga, min_max.max_otshga),
+            (0.0, 1.0),
+        ];
+        let mut scaling = Self {
+            offset: [0.0; NUM_FEATURES],
+            range: [1.0; NUM_FEATURES],
+        };
+        for (feature, (min, max)) in bounds.into_iter().enumerate() {
+            scaling.offset[feature] = min;
+            scaling.range[feature] = max - min;
+        }
+        scaling
+    }
+
+    #[inline(always)]
+    fn normalize(&self, feature: usize, values: &Lanes) -> Lanes {
+        let mut normalized = [0.0; LANES];
+        for lane in 0..LANES {
+            normalized[lane] = (values[lane] - self.offset[feature]) / self.range[feature];
+        }
+        normalized
+    }
+}
+
+/// Normalize and score one block of raw stats (one `Lanes` per feature) in a single pass.
+/// The sum is accumulated in the same order as `probability`.
+#[inline(always)]
+pub fn score_block(block: &[Lanes; NUM_FEATURES], scaling: &FeatureScaling, weights: &Weights) -> Lanes {
+    let gpg = scaling.normalize(GPG, &block[GPG]);
+    let hgpg = scaling.normalize(HGPG, &block[HGPG]);
+    let five_gpg = scaling.normalize(FIVE_GPG, &block[FIVE_GPG]);
+    let tgpg = scaling.normalize(TGPG, &block[TGPG]);
+    let otga = scaling.normalize(OTGA, &block[OTGA]);
+    let hppg = scaling.normalize(HPPG, &block[HPPG]);
+    let otshga = scaling.normalize(OTSHGA, &block[OTSHGA]);
+    let is_home = scaling.normalize(IS_HOME, &block[IS_HOME]);
+
+    let mut scores = [0.0; LANES];
+    for lane in 0..LANES {
+        scores[lane] = gpg[lane] * weights.gpg
+            + five_gpg[lane] * weights.five_gpg
+            + hgpg[lane] * weights.hgpg
+            + tgpg[lane] * weights.tgpg
+            + otga[lane] * weights.otga
+            + hppg[lane] * otshga[lane] * weights.hppg_otshga
+            + is_home[lane] * weights.is_home;
+    }
+    scores
+}
+
+/// Fused normalize-and-score over raw feature columns, writing one probability per row into `out`
+pub fn predict_columns(columns: [&[f32]; NUM_FEATURES], scaling: &FeatureScaling, weights: &Weights, out: &mut [f32]) {
+    let full = out.len() - out.len() % LANES;
+    let (body, tail) = out.split_at_mut(full);
+    for (index, out_block) in body.chunks_exact_mut(LANES).enumerate() {
+        let start = index * LANES;
+        let block = columns.map(|column| lanes(&column[start..start + LANES]));
+        out_block.copy_from_slice(&score_block(&block, scaling, weights));
+    }
+
+    // Zero-pad the last partial block, the padded lanes are discarded
+    let mut block = [[0.0; LANES]; NUM_FEATURES];
+    for (lanes, column) in block.iter_mut().zip(columns) {
+        lanes[..tail.len()].copy_from_slice(&column[full..full + tail.len()]);
+    }
+    let scores = score_block(&block, scaling, weights);
+    tail.copy_from_slice(&scores[..tail.len()]);
+}
+
+/// Score already-normalized columns (in `Weights` sum order) into the reused `out` buffer
+pub fn score_normalized(columns: [&[f32]; 7], weights: [f32; 7], out: &mut [f32]) {
+    let len = out.len();
+    let full = len - len % LANES;
+    let [gpg, five_gpg, hgpg, tgpg, otga, hppg_otshga, is_home] = columns.map(|column| &column[..len]);
+    let (body, tail) = out.split_at_mut(full);
+
+    for (index, out_block) in body.chunks_exact_mut(LANES).enumerate() {
+        let start = index * LANES;
+        // Fixed-size lanes let the compiler drop bounds checks and vectorize the block
+        let block = |column: &[f32]| -> Lanes { lanes(&column[start..start + LANES]) };
+        let (a, b, c, d) = (block(gpg), block(five_gpg), block(hgpg), block(tgpg));
+        let (e, f, g) = (block(otga), block(hppg_otshga), block(is_home));
+        for lane in 0..LANES {
+            out_block[lane] = a[lane] * weights[0]
+                + b[lane] * weights[1]
+                + c[lane] * weights[2]
+                + d[lane] * weights[3]
+                + e[lane] * weights[4]
+                + f[lane] * weights[5]
+                + g[lane] * weights[6];
+        }
+    }
+
+    for (offset, p) in tail.iter_mut().enumerate() {
+        let i = full + offset;
+        *p = gpg[i] * weights[0]
+            + five_gpg[i] * weights[1]
+            + hgpg[i] * weights[2]
+            + tgpg[i] * weights[3]
+            + otga[i] * weights[4]
+            + hppg_otshga[i] * weights[5]
+            + is_home[i] * weights[6];
+    }
+}
+
+/// Score already-normalized columns against a block of weight vectors at once. `out` is weight-major:
+/// the scores for `weights[k]` are `out[k * len..(k + 1) * len]`. Each block of players is loaded once
+/// and reused for every weight vector, the sums are bit-identical to `score_normalized`.
+pub fn score_tile(columns: [&[f32]; 7], weights: &[[f32; 7]], out: &mut [f32]) {
+    let len = columns[0].len();
+    if len == 0 {
+        return;
+    }
+    let full = len - len % LANES;
+    let [gpg, five_gpg, hgpg, tgpg, otga, hppg_otshga, is_home] = columns.map(|column| &column[..len]);
+    let out = &mut out[..len * weights.len()];
+
+    for start in (0..full).step_by(LANES) {
+        let block = |column: &[f32]| -> Lanes { lanes(&column[start..start + LANES]) };
+        let (a, b, c, d) = (block(gpg), block(five_gpg), block(hgpg), block(tgpg));
+        let (e, f, g) = (block(otga), block(hppg_otshga), block(is_home));
+        for (w, scores) in weights.iter().zip(out.chunks_exact_mut(len)) {
+            let out_block = &mut scores[start..start + LANES];
+            for lane in 0..LANES {
+                out_block[lane] = a[lane] * w[0]
+                    + b[lane] * w[1]
+                    + c[lane] * w[2]
+                    + d[lane] * w[3]
+                    + e[lane] * w[4]
+                    + f[lane] * w[5]
+                    + g[lane] * w[6];
+            }
+        }
+    }
+
+    for (w, scores) in weights.iter().zip(out.chunks_exact_mut(len)) {
+        for i in full..len {
+            scores[i] = gpg[i] * w[0]
+                + five_gpg[i] * w[1]
+                + hgpg[i] * w[2]
+                + tgpg[i] * w[3]
+                + otga[i] * w[4]
+                + hppg_otshga[i] * w[5]
+                + is_home[i] * w[6];
+        }
+    }
+}
+
+#[inline(always)]
+fn lanes(values: &[f32]) -> Lanes {
+    values.try_into().expect("block holds LANES values")
+}
+
+/// Fused normalize-and-score over rows of raw stats, gathered into blocks of `LANES` players
+pub fn predict_rows<I>(rows: I, scaling: &FeatureScaling, weights: &Weights, out: &mut [f32])
+where
+    I: IntoIterator<Item = [f32; NUM_FEATURES]>,
+{
+    let mut rows = rows.into_iter();
+    let mut block = [[0.0; LANES]; NUM_FEATURES];
+    for out_block in out.chunks_mut(LANES) {
+        let len = out_block.len();
+        for (lane, stats) in rows.by_ref().take(len).enumerate() {
+            for (lanes, stat) in block.iter_mut().zip(stats) {
+                lanes[lane] = stat;
+            }
+        }
+        let scores = score_block(&block, scaling, weights);
+        out_block.copy_from_slice(&scores[..len]);
+    }
+}
@@ -1,17 +1,24 @@
 use pyo3::prelude::*;
 use pyo3::wrap_pyfunction;
 
-mod data_types;
-mod predictions;
-mod weight_testing;
-mod weight_generation;
+pub mod data_types;
+pub mod kernels;
+pub mod player_batch;
+pub mod predictions;
+pub mod pruning;
+pub mod segments;
+pub mod weight_testing;
+mod weight_search;
+pub mod weight_generation;
 
 // Re-export the data types for Python
-pub use data_types::{PlayerInfo, MinMax, Weights};
+pub use data_types::{PlayerInfo, MinMax, Weights, FEATURE_COLUMNS, WEIGHT_COLUMNS};
+pub use player_batch::PlayerBatch;
 
 // Re-export the functions for Python
-pub use predictions::predict;
-pub use weight_testing::test_weights;
+pub use predictions::{predict, predict_array};
+pub use weight_testing::{evaluate_weight_array, test_weights};
+pub use weight_search::search_weights;
 pub use weight_generation::generate_weight_permutations;
 
 // A Python module implemented in Rust.
@@ -20,9 +27,16 @@ fn make_predictions_rust(_py: Python<'_>, m: &Bound<'_, PyModule>) -> PyResult<(
     m.add_class::<PlayerInfo>()?;
     m.add_class::<MinMax>()?;
     m.add_class::<Weights>()?;
+    m.add_class::<PlayerBatch>()?;
     m.add_class::<weight_generation::WeightGenerator>()?;
+    m.add_class::<weight_generation::WeightSpace>()?;
+    m.add("FEATURE_COLUMNS", FEATURE_COLUMNS.to_vec())?;
+    m.add("WEIGHT_COLUMNS", WEIGHT_COLUMNS.to_vec())?;
     m.add_function(wrap_pyfunction!(predict, m)?)?;
+    m.add_function(wrap_pyfunction!(predict_array, m)?)?;
     m.add_function(wrap_pyfunction!(test_weights, m)?)?;
+    m.add_function(wrap_pyfunction!(evaluate_weight_array, m)?)?;
+    m.add_function(wrap_pyfunction!(search_weights, m)?)?;
     m.add_function(wrap_pyfunction!(generate_weight_permutations, m)?)?;
     Ok(())
 }
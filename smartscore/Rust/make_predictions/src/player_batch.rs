@@ -0,0 +1,281 @@
+use crate::data_types::{PlayerInfo, MinMax, Weights, NUM_FEATURES};
+use crate::kernels::{predict_columns, score_normalized, score_tile, FeatureScaling};
+use crate::predictions::{normalize_player, FeatureInput};
+use crate::pruning::non_dominated;
+use crate::segments::SegmentIndex;
+use numpy::{PyReadonlyArray1, PyUntypedArrayMethods};
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use pyo3::types::PyType;
+use std::collections::BTreeMap;
+use std::ops::Range;
+use std::sync::Arc;
+
+/// Structure-of-arrays player data shared by every evaluator
+pub struct BatchColumns {
+    /// Raw stats, one column per entry of `FEATURE_COLUMNS`
+    pub features: [Vec<f32>; NUM_FEATURES],
+    /// Whether the player scored (> 0.0), NaN when unknown
+    pub scored: Vec<f32>,
+    /// Tims group (1-3), 0 when the player is not a Tims pick
+    pub tims: Vec<i32>,
+    /// Date index, rows with the same date share a value
+    pub dates: Vec<i32>,
+    /// Offsets of every date and (date, tims) group, derived from `tims` and `dates`
+    pub segments: SegmentIndex,
+}
+
+impl BatchColumns {
+    pub fn new(features: [Vec<f32>; NUM_FEATURES], scored: Vec<f32>, tims: Vec<i32>, dates: Vec<i32>) -> Self {
+        let segments = SegmentIndex::new(&tims, &dates);
+        Self { features, scored, tims, dates, segments }
+    }
+
+    pub fn len(&self) -> usize {
+        self.scored.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.scored.is_empty()
+    }
+
+    pub fn stats(&self, i: usize) -> [f32; NUM_FEATURES] {
+        let mut stats = [0.0; NUM_FEATURES];
+        stats.iter_mut().zip(self.features.iter()).for_each(|(stat, column)| *stat = column[i]);
+        stats
+    }
+
+    /// Number of runs of consecutive rows sharing a date
+    pub fn num_dates(&self) -> usize {
+        self.segments.num_dates()
+    }
+
+    pub fn from_players(players: &[PlayerInfo]) -> Self {
+        // Dictionary-encode the dates, ISO strings sort chronologically
+        let mut date_index: BTreeMap<Option<&str>, i32> = BTreeMap::new();
+        for player in players {
+            date_index.entry(player.date.as_deref()).or_insert(0);
+        }
+        for (i, index) in date_index.values_mut().enumerate() {
+            *index = i as i32;
+        }
+
+        let mut features: [Vec<f32>; NUM_FEATURES] = Default::default();
+        for column in features.iter_mut() {
+            column.reserve_exact(players.len());
+        }
+        for player in players {
+            features.iter_mut().zip(player.stats()).for_each(|(column, stat)| column.push(stat));
+        }
+
+        Self::new(
+            features,
+            players.iter().map(|p| p.scored.unwrap_or(f32::NAN)).collect(),
+            players.iter().map(|p| p.tims.unwrap_or(0)).collect(),
+            players.iter().map(|p| date_index[&p.date.as_deref()]).collect(),
+        )
+    }
+
+    /// Copy of the given rows, in the given order
+    pub fn select(&self, indices: &[usize]) -> Self {
+        let mut features: [Vec<f32>; NUM_FEATURES] = Default::default();
+        for (selected, column) in features.iter_mut().zip(self.features.iter()) {
+            *selected = indices.iter().map(|&i| column[i]).collect();
+        }
+        Self::new(
+            features,
+            indices.iter().map(|&i| self.scored[i]).collect(),
+            indices.iter().map(|&i| self.tims[i]).collect(),
+            indices.iter().map(|&i| self.dates[i]).collect(),
+        )
+    }
+
+    /// Probabilities for every row, bit-identical to `predict` on the equivalent `PlayerInfo` list
+    pub fn predict(&self, min_max: &MinMax, weights: &Weights) -> Vec<f32> {
+        let mut probabilities = vec![0.0; self.len()];
+        let columns = self.features.each_ref().map(|column| column.as_slice());
+        predict_columns(columns, &FeatureScaling::new(min_max), weights, &mut probabilities);
+        probabilities
+    }
+}
+
+/// Normalized stats in `Weights` order, built once per evaluation and reused for every weight combination
+pub struct ScoringColumns {
+    pub gpg: Vec<f32>,
+    pub five_gpg: Vec<f32>,
+    pub hgpg: Vec<f32>,
+    pub tgpg: Vec<f32>,
+    pub otga: Vec<f32>,
+    pub hppg_otshga: Vec<f32>,
+    pub is_home: Vec<f32>,
+}
+
+impl ScoringColumns {
+    pub fn new(batch: &BatchColumns, min_max: &MinMax) -> Self {
+        let mut columns = Self {
+            gpg: Vec::with_capacity(batch.len()),
+            five_gpg: Vec::with_capacity(batch.len()),
+            hgpg: Vec::with_capacity(batch.len()),
+            tgpg: Vec::with_capacity(batch.len()),
+            otga: Vec::with_capacity(batch.len()),
+            hppg_otshga: Vec::with_capacity(batch.len()),
+            is_home: Vec::with_capacity(batch.len()),
+        };
+        for i in 0..batch.len() {
+            let mut player = PlayerInfo::from_stats(&batch.stats(i));
+            normalize_player(&mut player, min_max);
+            columns.gpg.push(player.gpg);
+            columns.five_gpg.push(player.five_gpg);
+            columns.hgpg.push(player.hgpg);
+            columns.tgpg.push(player.tgpg);
+            columns.otga.push(player.otga);
+            columns.hppg_otshga.push(player.hppg_otshga);
+            columns.is_home.push(player.is_home);
+        }
+        columns
+    }
+
+    pub fn len(&self) -> usize {
+        self.gpg.len()
+    }
+
+    /// Same arithmetic (and order) as `calculate_probabilities`, `probabilities` is reused across combinations
+    pub fn score(&self, weights: &Weights, probabilities: &mut [f32]) {
+        let len = self.len().min(probabilities.len());
+        self.score_rows(weights, 0..len, probabilities);
+    }
+
+    /// Score only `rows`, leaving the rest of `probabilities` untouched
+    pub fn score_rows(&self, weights: &Weights, rows: Range<usize>, probabilities: &mut [f32]) {
+        score_normalized(self.columns().map(|column| &column[rows.clone()]), weights.values(), &mut probabilities[rows]);
+    }
+
+    /// Scores of `rows` for every weight vector in `weights`, weight-major into `tile` (see `score_tile`)
+    pub fn score_tile_rows(&self, weights: &[[f32; 7]], rows: Range<usize>, tile: &mut [f32]) {
+        score_tile(self.columns().map(|column| &column[rows.clone()]), weights, tile);
+    }
+
+    fn columns(&self) -> [&[f32]; 7] {
+        [
+            &self.gpg, &self.five_gpg, &self.hgpg, &self.tgpg,
+            &self.otga, &self.hppg_otshga, &self.is_home,
+        ]
+    }
+}
+
+/// Column-major player data built once and shared by reference across `predict`, `test_weights`
+/// and threads. The columns are immutable, cloning a batch only bumps a reference count.
+#[pyclass(frozen)]
+#[derive(Clone)]
+pub struct PlayerBatch {
+    pub columns: Arc<BatchColumns>,
+}
+
+fn check_length(name: &str, length: usize, expected: usize) -> PyResult<()> {
+    if length != expected {
+        return Err(PyValueError::new_err(format!(
+            "{} has length {}, expected {}", name, length, expected
+        )));
+    }
+    Ok(())
+}
+
+#[pymethods]
+impl PlayerBatch {
+    /// `features` is an (N x 8) float32 matrix or eight float32 columns in `FEATURE_COLUMNS` order,
+    /// `scored` is float32, `tims` and `dates` (date index, e.g. day number) are int32
+    #[new]
+    #[pyo3(signature = (features, scored=None, tims=None, dates=None))]
+    pub fn new(
+        features: FeatureInput<'_>,
+        scored: Option<PyReadonlyArray1<'_, f32>>,
+        tims: Option<PyReadonlyArray1<'_, i32>>,
+        dates: Option<PyReadonlyArray1<'_, i32>>,
+    ) -> PyResult<Self> {
+        let num_rows = features.num_rows()?;
+
+        let mut columns: [Vec<f32>; NUM_FEATURES] = Default::default();
+        for column in columns.iter_mut() {
+            column.reserve_exact(num_rows);
+        }
+        features.for_each_row(|_, stats| {
+            columns.iter_mut().zip(stats).for_each(|(column, stat)| column.push(stat));
+        });
+
+        let scored = match scored {
+            Some(scored) => {
+                check_length("scored", scored.len(), num_rows)?;
+                scored.as_array().to_vec()
+            }
+            None => vec![f32::NAN; num_rows],
+        };
+        let tims = match tims {
+            Some(tims) => {
+                check_length("tims", tims.len(), num_rows)?;
+                tims.as_array().to_vec()
+            }
+            None => vec![0; num_rows],
+        };
+        let dates = match dates {
+            Some(dates) => {
+                check_length("dates", dates.len(), num_rows)?;
+                dates.as_array().to_vec()
+            }
+            None => vec![0; num_rows],
+        };
+
+        Ok(Self {
+            columns: Arc::new(BatchColumns::new(columns, scored, tims, dates)),
+        })
+    }
+
+    /// Build a batch from `PlayerInfo` rows, date strings are dictionary-encoded
+    #[classmethod]
+    pub fn from_players(_cls: &Bound<'_, PyType>, players: Vec<PlayerInfo>) -> Self {
+        Self {
+            columns: Arc::new(BatchColumns::from_players(&players)),
+        }
+    }
+
+    /// Drop players that can never be their (date, tims) group's pick for non-negative weights.
+    /// Returns the pruned batch and the kept row indices, `test_weights` results are unchanged.
+    fn prune(&self, py: Python<'_>, min_max: MinMax) -> (Self, Vec<usize>) {
+        let batch = &self.columns;
+        py.allow_threads(|| {
+            let kept = non_dominated(batch, &ScoringColumns::new(batch, &min_max));
+            let pruned = Self {
+                columns: Arc::new(batch.select(&kept)),
+            };
+            (pruned, kept)
+        })
+    }
+
+    #[getter]
+    fn num_dates(&self) -> usize {
+        self.columns.num_dates()
+    }
+
+    fn __len__(&self) -> usize {
+        self.columns.len()
+    }
+
+    fn __repr__(&self) -> String {
+        format!("PlayerBatch(players: {}, dates: {})", self.columns.len(), self.columns.num_dates())
+    }
+}
+
+/// Player input accepted by the evaluators: a `PlayerBatch` or a list of `PlayerInfo`
+#[derive(FromPyObject)]
+pub enum Players {
+    Batch(PlayerBatch),
+    Rows(Vec<PlayerInfo>),
+}
+
+impl Players {
+    pub fn into_columns(self) -> Arc<BatchColumns> {
+        match self {
+            Players::Batch(batch) => batch.columns,
+            Players::Rows(players) => Arc::new(BatchColumns::from_players(&players)),
+        }
+    }
+}
@@ -1,43 +1,186 @@
-use crate::data_types::{PlayerInfo, MinMax, Weights};
+use crate::data_types::{PlayerInfo, MinMax, Weights, FEATURE_COLUMNS, NUM_FEATURES};
+use crate::kernels::{predict_columns, predict_rows, FeatureScaling};
+use crate::player_batch::Players;
+use numpy::{PyArray1, PyArrayMethods, PyReadonlyArray1, PyReadonlyArray2, PyUntypedArrayMethods};
+use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
 
+fn normalize(value: f32, min: f32, max: f32) -> f32 {
+    (value - min) / (max - min)
+}
+
+// Normalize a single player's stats in place
+pub fn normalize_player(player: &mut PlayerInfo, min_max: &MinMax) {
+    player.gpg = normalize(player.gpg, min_max.min_gpg, min_max.max_gpg);
+    player.hgpg = normalize(player.hgpg, min_max.min_hgpg, min_max.max_hgpg);
+    player.five_gpg = normalize(player.five_gpg, min_max.min_five_gpg, min_max.max_five_gpg);
+    player.tgpg = normalize(player.tgpg, min_max.min_tgpg, min_max.max_tgpg);
+    player.otga = normalize(player.otga, min_max.min_otga, min_max.max_otga);
+    player.hppg = normalize(player.hppg, min_max.min_hppg, min_max.max_hppg);
+    player.otshga = normalize(player.otshga, min_max.min_otshga, min_max.max_otshga);
+    player.hppg_otshga = player.hppg * player.otshga;
+}
+
+// Weighted score of a single normalized player
+pub fn probability(player: &PlayerInfo, weights: &Weights) -> f32 {
+    player.gpg * weights.gpg
+        + player.five_gpg * weights.five_gpg
+        + player.hgpg * weights.hgpg
+        + player.tgpg * weights.tgpg
+        + player.otga * weights.otga
+        + player.hppg_otshga * weights.hppg_otshga
+        + player.is_home * weights.is_home
+}
+
 // Normalize stats
 pub fn normalize_stats(players: &mut [PlayerInfo], min_max: &MinMax) {
-    fn normalize(value: f32, min: f32, max: f32) -> f32 {
-        (value - min) / (max - min)
-    }
-
-    players.iter_mut().for_each(|player| {
-        player.gpg = normalize(player.gpg, min_max.min_gpg, min_max.max_gpg);
-        player.hgpg = normalize(player.hgpg, min_max.min_hgpg, min_max.max_hgpg);
-        player.five_gpg = normalize(player.five_gpg, min_max.min_five_gpg, min_max.max_five_gpg);
-        player.tgpg = normalize(player.tgpg, min_max.min_tgpg, min_max.max_tgpg);
-        player.otga = normalize(player.otga, min_max.min_otga, min_max.max_otga);
-        player.hppg = normalize(player.hppg, min_max.min_hppg, min_max.max_hppg);
-        player.otshga = normalize(player.otshga, min_max.min_otshga, min_max.max_otshga);
-        player.hppg_otshga = player.hppg * player.otshga;
-    });
+    players.iter_mut().for_each(|player| normalize_player(player, min_max));
 }
 
 // Calculate probabilities
 pub fn calculate_probabilities(players: &[PlayerInfo], probabilities: &mut [f32], weights: &Weights) {
     probabilities.iter_mut().zip(players.iter()).for_each(|(p, player)| {
-        *p = player.gpg * weights.gpg
-            + player.five_gpg * weights.five_gpg
-            + player.hgpg * weights.hgpg
-            + player.tgpg * weights.tgpg
-            + player.otga * weights.otga
-            + player.hppg_otshga * weights.hppg_otshga
-            + player.is_home * weights.is_home;
+        *p = probability(player, weights);
     });
 }
 
 // Predict daily
 #[pyfunction]
-pub fn predict(py: Python, mut players: Vec<PlayerInfo>, min_max: MinMax, weights: Weights) -> PyResult<PyObject> {
-    let mut probabilities = vec![0.0; players.len()];
-    normalize_stats(&mut players, &min_max);
-    calculate_probabilities(&players, &mut probabilities, &weights);
+pub fn predict(py: Python, players: Players, min_max: MinMax, weights: Weights) -> PyResult<PyObject> {
+    let probabilities = match players {
+        Players::Batch(batch) => batch.columns.predict(&min_max, &weights),
+        Players::Rows(players) => {
+            let mut probabilities = vec![0.0; players.len()];
+            let rows = players.iter().map(PlayerInfo::stats);
+            predict_rows(rows, &FeatureScaling::new(&min_max), &weights, &mut probabilities);
+            probabilities
+        }
+    };
 
     Ok(probabilities.into_pyobject(py)?.into_any().unbind())
-}
\ No newline at end of file
+}
+
+/// Raw stats for `predict_array`: one (N x NUM_FEATURES) float32 matrix, or one float32 array per column
+#[derive(FromPyObject)]
+pub enum FeatureInput<'py> {
+    Matrix(PyReadonlyArray2<'py, f32>),
+    Columns(Vec<PyReadonlyArray1<'py, f32>>),
+}
+
+impl FeatureInput<'_> {
+    pub(crate) fn num_rows(&self) -> PyResult<usize> {
+        match self {
+            FeatureInput::Matrix(matrix) => {
+                let shape = matrix.shape();
+                if shape[1] != NUM_FEATURES {
+                    return Err(PyValueError::new_err(format!(
+                        "expected {} feature columns {:?}, got {}", NUM_FEATURES, FEATURE_COLUMNS, shape[1]
+                    )));
+                }
+                Ok(shape[0])
+            }
+            FeatureInput::Columns(columns) => {
+                if columns.len() != NUM_FEATURES {
+                    return Err(PyValueError::new_err(format!(
+                        "expected {} feature columns {:?}, got {}", NUM_FEATURES, FEATURE_COLUMNS, columns.len()
+                    )));
+                }
+                let rows = columns[0].len();
+                if columns.iter().any(|column| column.len() != rows) {
+                    return Err(PyValueError::new_err("feature columns must all have the same length"));
+                }
+                Ok(rows)
+            }
+        }
+    }
+
+    // Fused normalize-and-score into `out`, which must hold `num_rows()` values
+    pub(crate) fn predict_into(&self, scaling: &FeatureScaling, weights: &Weights, out: &mut [f32]) {
+        match self {
+            FeatureInput::Matrix(matrix) => {
+                let matrix = matrix.as_array();
+                let rows = matrix.rows().into_iter().map(|row| {
+                    let mut stats = [0.0; NUM_FEATURES];
+                    stats.iter_mut().zip(row.iter()).for_each(|(stat, value)| *stat = *value);
+                    stats
+                });
+                predict_rows(rows, scaling, weights, out);
+            }
+            FeatureInput::Columns(columns) => {
+                let columns: Vec<_> = columns.iter().map(|column| column.as_array()).collect();
+                let slices: Option<Vec<&[f32]>> = columns.iter().map(|column| column.as_slice()).collect();
+                match slices {
+                    // Contiguous columns are scored in place
+                    Some(slices) => predict_columns(slices.try_into().unwrap(), scaling, weights, out),
+                    None => {
+                        let rows = (0..out.len()).map(|i| {
+                            let mut stats = [0.0; NUM_FEATURES];
+                            stats.iter_mut().zip(columns.iter()).for_each(|(stat, column)| *stat = column[i]);
+                            stats
+                        });
+                        predict_rows(rows, scaling, weights, out);
+                    }
+                }
+            }
+        }
+    }
+
+    pub(crate) fn for_each_row(&self, mut f: impl FnMut(usize, [f32; NUM_FEATURES])) {
+        match self {
+            FeatureInput::Matrix(matrix) => {
+                for (i, row) in matrix.as_array().rows().into_iter().enumerate() {
+                    let mut stats = [0.0; NUM_FEATURES];
+                    stats.iter_mut().zip(row.iter()).for_each(|(stat, value)| *stat = *value);
+                    f(i, stats);
+                }
+            }
+            FeatureInput::Columns(columns) => {
+                let columns: Vec<_> = columns.iter().map(|column| column.as_array()).collect();
+                for i in 0..columns[0].len() {
+                    let mut stats = [0.0; NUM_FEATURES];
+                    stats.iter_mut().zip(columns.iter()).for_each(|(stat, column)| *stat = column[i]);
+                    f(i, stats);
+                }
+            }
+        }
+    }
+}
+
+/// Predict straight from NumPy arrays without building a `PlayerInfo` per row.
+/// Probabilities are written into `out` when given (float32, length N), otherwise into a new array.
+#[pyfunction]
+#[pyo3(signature = (features, min_max, weights, out=None))]
+pub fn predict_array<'py>(
+    py: Python<'py>,
+    features: FeatureInput<'py>,
+    min_max: MinMax,
+    weights: Weights,
+    out: Option<Bound<'py, PyArray1<f32>>>,
+) -> PyResult<Bound<'py, PyArray1<f32>>> {
+    let num_rows = features.num_rows()?;
+    let out = match out {
+        Some(out) if out.len() != num_rows => {
+            return Err(PyValueError::new_err(format!(
+                "out has length {}, expected {}", out.len(), num_rows
+            )));
+        }
+        Some(out) => out,
+        None => PyArray1::<f32>::zeros(py, num_rows, false),
+    };
+
+    {
+        let scaling = FeatureScaling::new(&min_max);
+        let mut probabilities = out.try_readwrite()?;
+        match probabilities.as_slice_mut() {
+            Ok(probabilities) => features.predict_into(&scaling, &weights, probabilities),
+            // Strided `out`, score into a scratch buffer and copy over
+            Err(_) => {
+                let mut scratch = vec![0.0; num_rows];
+                features.predict_into(&scaling, &weights, &mut scratch);
+                probabilities.as_array_mut().iter_mut().zip(scratch).for_each(|(p, value)| *p = value);
+            }
+        }
+    }
+
+    Ok(out)
+}
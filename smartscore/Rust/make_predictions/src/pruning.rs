@@ -0,0 +1,50 @@
+use crate::player_batch::{BatchColumns, ScoringColumns};
+
+/// Normalized scoring features of one row, in `Weights` sum order
+fn scoring_row(columns: &ScoringColumns, i: usize) -> [f32; 7] {
+    [
+        columns.gpg[i], columns.five_gpg[i], columns.hgpg[i], columns.tgpg[i],
+        columns.otga[i], columns.hppg_otshga[i], columns.is_home[i],
+    ]
+}
+
+// `a` scores at least as high as `b` for every non-negative weight combination.
+// NaN never dominates and is never dominated, comparisons with it are false.
+fn dominates(a: &[f32; 7], b: &[f32; 7]) -> bool {
+    a.iter().zip(b.iter()).all(|(a, b)| a >= b)
+}
+
+/// Indices of the rows that can still be picked, in their original order.
+///
+/// Each (date, tims) pick is the first player with the highest score. With non-negative weights
+/// a player that an earlier groupmate matches or beats on every normalized feature can never be
+/// that pick, so dropping it leaves every result unchanged. f32 rounding is monotone, so this also
+/// holds for the computed scores. Rows outside the Tims groups are dropped too, except the first
+/// row of a date that has no Tims picks so the date still counts towards the total.
+pub fn non_dominated(batch: &BatchColumns, columns: &ScoringColumns) -> Vec<usize> {
+    let segments = &batch.segments;
+    let mut kept = Vec::new();
+
+    for date in 0..segments.num_dates() {
+        let mut date_kept = Vec::new();
+        for group in segments.groups(date) {
+            let mut group_kept: Vec<(usize, [f32; 7])> = Vec::new();
+            for &i in group {
+                let row = scoring_row(columns, i as usize);
+                // A kept row dominating a dropped one also dominates anything the dropped row dominates
+                if !group_kept.iter().any(|(_, earlier)| dominates(earlier, &row)) {
+                    group_kept.push((i as usize, row));
+                }
+            }
+            date_kept.extend(group_kept.iter().map(|&(i, _)| i));
+        }
+
+        if date_kept.is_empty() {
+            date_kept.push(segments.date_rows(date).start);
+        }
+        date_kept.sort_unstable();
+        kept.extend(date_kept);
+    }
+
+    kept
+}
@@ -0,0 +1,87 @@
+use std::ops::Range;
+
+/// Tims groups per date, group `g` (1-3) is stored at position `g - 1`
+pub const TIMS_GROUPS: usize = 3;
+
+/// CSR index of a batch's dates and (date, Tims group) segments, built once with the batch so the
+/// evaluators walk plain offsets instead of comparing dates row by row.
+///
+/// A date is a run of consecutive rows with the same date value. The Tims picks of group `g` on
+/// date `d` are `rows[group_offsets[3 * d + g - 1]..group_offsets[3 * d + g]]`, in batch order.
+#[derive(Clone, Debug, Default)]
+pub struct SegmentIndex {
+    /// Rows of date `d` are `date_offsets[d]..date_offsets[d + 1]`
+    pub date_offsets: Vec<u32>,
+    /// `TIMS_GROUPS` segments per date, `TIMS_GROUPS * num_dates + 1` offsets into `rows`
+    pub group_offsets: Vec<u32>,
+    /// Row indices of every Tims pick, grouped by (date, Tims group)
+    pub rows: Vec<u32>,
+}
+
+impl SegmentIndex {
+    pub fn new(tims: &[i32], dates: &[i32]) -> Self {
+        let mut index = Self {
+            date_offsets: vec![0],
+            group_offsets: vec![0],
+            rows: Vec::new(),
+        };
+        let mut groups: [Vec<u32>; TIMS_GROUPS] = Default::default();
+        let mut start = 0;
+
+        while start < dates.len() {
+            let date = dates[start];
+            let end = start + dates[start..].iter().take_while(|&&d| d == date).count();
+
+            for i in start..end {
+                if (1..=TIMS_GROUPS as i32).contains(&tims[i]) {
+                    groups[(tims[i] - 1) as usize].push(i as u32);
+                }
+            }
+            for group in groups.iter_mut() {
+                index.rows.append(group);
+                index.group_offsets.push(index.rows.len() as u32);
+            }
+            index.date_offsets.push(end as u32);
+            start = end;
+        }
+
+        index
+    }
+
+    pub fn num_dates(&self) -> usize {
+        self.date_offsets.len() - 1
+    }
+
+    /// Batch rows of date `date`
+    pub fn date_rows(&self, date: usize) -> Range<usize> {
+        self.date_offsets[date] as usize..self.date_offsets[date + 1] as usize
+    }
+
+    /// Rows of each Tims group on `date`, group 1 first
+    pub fn groups(&self, date: usize) -> [&[u32]; TIMS_GROUPS] {
+        let offsets = &self.group_offsets[TIMS_GROUPS * date..=TIMS_GROUPS * (date + 1)];
+        std::array::from_fn(|g| &self.rows[offsets[g] as usize..offsets[g + 1] as usize])
+    }
+
+    /// Correct picks on `date`: each group picks its first player with the highest `score`,
+    /// which counts when that player scored
+    pub fn count_correct(&self, date: usize, scored: &[f32], score: impl Fn(usize) -> f32) -> i32 {
+        let mut correct = 0;
+        for group in self.groups(date) {
+            let Some((&first, rest)) = group.split_first() else {
+                continue;
+            };
+            let mut best = (first as usize, score(first as usize));
+            for &row in rest {
+                let prob = score(row as usize);
+                if prob > best.1 {
+                    best = (row as usize, prob);
+                }
+            }
+            if scored[best.0] > 0.0 {
+                correct += 1;
+            }
+        }
+        correct
+    }
+}
@@ -1,160 +1,291 @@
+use crate::data_types::Weights;
+use pyo3::exceptions::{PyIndexError, PyValueError};
 use pyo3::prelude::*;
 use rayon::prelude::*;
-use crossbeam::channel::unbounded;
 
-/// Generate all possible weight combinations that sum to 1.0 using optimized mathematical approach
-#[pyfunction]
-pub fn generate_weight_permutations(_py: Python, step_size: f32) -> PyResult<Vec<crate::data_types::Weights>> {
-    let step = step_size / 100.0;
-    let target_steps = (1.0 / step) as i32;
-    let max_value = target_steps;
-
-    let (sender, receiver) = unbounded();
-
-    (0..=max_value).into_par_iter().for_each(|w0| {
-        for w1 in 0..=max_value {
-            for w2 in 0..=max_value {
-                for w3 in 0..=max_value {
-                    for w4 in 0..=max_value {
-                        for w5 in 0..=max_value {
-                            let total = w0 + w1 + w2 + w3 + w4 + w5;
-                            if total <= target_steps {
-                                let w6 = target_steps - total;
-
-                                let weights = crate::data_types::Weights {
-                                    gpg: w0 as f32 * step,
-                                    five_gpg: w1 as f32 * step,
-                                    hgpg: w2 as f32 * step,
-                                    tgpg: w3 as f32 * step,
-                                    otga: w4 as f32 * step,
-                                    hppg_otshga: w5 as f32 * step,
-                                    is_home: w6 as f32 * step,
-                                };
-                                sender.send(weights).unwrap();
-                            }
-                        }
-                    }
+/// Number of weights that are enumerated, the seventh (`is_home`) takes the remainder
+const FREE_WEIGHTS: usize = 6;
+
+/// Weights as integer step counts, in `Weights` sum order without `is_home`
+pub type Steps = [i32; FREE_WEIGHTS];
+
+// n choose k, exact for every count that fits in a u64
+fn binomial(n: u64, k: u64) -> u64 {
+    let k = k.min(n - k);
+    let mut result: u128 = 1;
+    for i in 0..k {
+        result = result * (n - i) as u128 / (i + 1) as u128;
+    }
+    result as u64
+}
+
+// Ways to give `parts` weights a total of at most `budget` steps
+fn completions(budget: i32, parts: usize) -> u64 {
+    binomial(budget as u64 + parts as u64, parts as u64)
+}
+
+/// Every weight combination for a step size, indexed by its position in lexicographic order
+/// (gpg outermost, hppg_otshga innermost, `is_home` gets what is left).
+/// Ranks let any worker produce exactly the slice `[start, end)` it owns without enumerating the rest.
+#[derive(Clone, Copy, Debug)]
+pub struct Simplex {
+    pub step: f32,
+    pub n: i32,
+}
+
+impl Simplex {
+    /// `step_size` is in percent, e.g. 5 for 0.05 increments
+    pub fn new(step_size: f32) -> PyResult<Self> {
+        if !(step_size > 0.0 && step_size <= 100.0) {
+            return Err(PyValueError::new_err(format!(
+                "step_size must be in (0, 100], got {}", step_size
+            )));
+        }
+        let step = step_size / 100.0;
+        // Round rather than truncate, float error in 1.0 / step must not drop the last step
+        let n = (1.0 / step).round() as i32;
+        Ok(Self { step, n })
+    }
+
+    /// Number of weight combinations, C(n + 6, 6)
+    pub fn count(&self) -> u64 {
+        completions(self.n, FREE_WEIGHTS)
+    }
+
+    /// Step counts of the combination at `rank`, which must be below `count()`
+    pub fn unrank(&self, mut rank: u64) -> Steps {
+        let mut steps = [0; FREE_WEIGHTS];
+        let mut budget = self.n;
+        for (position, value) in steps.iter_mut().enumerate() {
+            let later = FREE_WEIGHTS - position - 1;
+            loop {
+                let block = completions(budget - *value, later);
+                if rank < block {
+                    break;
                 }
+                rank -= block;
+                *value += 1;
             }
+            budget -= *value;
         }
-    });
+        steps
+    }
+
+    /// Inverse of `unrank`
+    pub fn rank(&self, steps: &Steps) -> u64 {
+        let mut rank = 0;
+        let mut budget = self.n;
+        for (position, &value) in steps.iter().enumerate() {
+            let later = FREE_WEIGHTS - position - 1;
+            rank += (0..value).map(|skipped| completions(budget - skipped, later)).sum::<u64>();
+            budget -= value;
+        }
+        rank
+    }
 
-    drop(sender);
-    let weight_combinations: Vec<_> = receiver.iter().collect();
+    /// Move `steps` to the next combination, returns false after the last one
+    pub fn advance(&self, steps: &mut Steps) -> bool {
+        let mut used: i32 = steps.iter().sum();
+        for position in (0..FREE_WEIGHTS).rev() {
+            if used < self.n {
+                steps[position] += 1;
+                return true;
+            }
+            // Carry: reset this weight and bump the one before it
+            used -= steps[position];
+            steps[position] = 0;
+        }
+        false
+    }
 
-    Ok(weight_combinations)
+    pub fn weights(&self, steps: &Steps) -> Weights {
+        let remainder = self.n - steps.iter().sum::<i32>();
+        Weights {
+            gpg: steps[0] as f32 * self.step,
+            five_gpg: steps[1] as f32 * self.step,
+            hgpg: steps[2] as f32 * self.step,
+            tgpg: steps[3] as f32 * self.step,
+            otga: steps[4] as f32 * self.step,
+            hppg_otshga: steps[5] as f32 * self.step,
+            is_home: remainder as f32 * self.step,
+        }
+    }
+
+    /// Combinations `[start, end)` in order, generated in constant memory
+    pub fn range(&self, start: u64, end: u64) -> SimplexRange {
+        let end = end.min(self.count());
+        SimplexRange {
+            simplex: *self,
+            steps: self.unrank(start.min(end.saturating_sub(1))),
+            remaining: end.saturating_sub(start),
+        }
+    }
 }
 
+pub struct SimplexRange {
+    simplex: Simplex,
+    steps: Steps,
+    remaining: u64,
+}
 
-#[pyclass]
-pub struct WeightGenerator {
-    step: f32,
-    n: i32,
-
-    // loop state
-    w0: i32,
-    w1: i32,
-    w2: i32,
-    w3: i32,
-    w4: i32,
-    w5: i32,
-
-    done: bool,
+impl Iterator for SimplexRange {
+    type Item = Weights;
+
+    fn next(&mut self) -> Option<Weights> {
+        if self.remaining == 0 {
+            return None;
+        }
+        let weights = self.simplex.weights(&self.steps);
+        self.remaining -= 1;
+        if self.remaining > 0 {
+            self.simplex.advance(&mut self.steps);
+        }
+        Some(weights)
+    }
+
+    fn size_hint(&self) -> (usize, Option<usize>) {
+        (self.remaining as usize, Some(self.remaining as usize))
+    }
+}
+
+/// Generate all possible weight combinations that sum to 1.0, in lexicographic (rank) order
+#[pyfunction]
+pub fn generate_weight_permutations(py: Python, step_size: f32) -> PyResult<Vec<Weights>> {
+    let simplex = Simplex::new(step_size)?;
+    let count = simplex.count();
+
+    let weight_combinations = py.allow_threads(|| {
+        // One contiguous rank range per gpg value, each unranks its start and walks forward
+        (0..=simplex.n)
+            .into_par_iter()
+            .flat_map_iter(|w0| {
+                let start = simplex.rank(&[w0, 0, 0, 0, 0, 0]);
+                let end = if w0 < simplex.n { simplex.rank(&[w0 + 1, 0, 0, 0, 0, 0]) } else { count };
+                simplex.range(start, end)
+            })
+            .collect()
+    });
+
+    Ok(weight_combinations)
+}
+
+/// Index into the weight combinations of one step size without generating them
+#[pyclass(frozen)]
+pub struct WeightSpace {
+    simplex: Simplex,
 }
 
 #[pymethods]
-impl WeightGenerator {
+impl WeightSpace {
     #[new]
-    pub fn new(step_size: f32) -> Self {
-        let step = step_size / 100.0;
-        let n = (1.0 / step) as i32;
-
-        Self {
-            step,
-            n,
-            w0: 0,
-            w1: 0,
-            w2: 0,
-            w3: 0,
-            w4: 0,
-            w5: 0,
-            done: false,
+    pub fn new(step_size: f32) -> PyResult<Self> {
+        Ok(Self {
+            simplex: Simplex::new(step_size)?,
+        })
+    }
+
+    /// Number of weight combinations
+    #[getter]
+    pub fn count(&self) -> u64 {
+        self.simplex.count()
+    }
+
+    /// The combination at `rank`, in the order `WeightGenerator` produces them
+    pub fn weights_at(&self, rank: u64) -> PyResult<Weights> {
+        if rank >= self.simplex.count() {
+            return Err(PyIndexError::new_err(format!(
+                "rank {} out of range for {} combinations", rank, self.simplex.count()
+            )));
         }
+        Ok(self.simplex.weights(&self.simplex.unrank(rank)))
     }
 
-    /// Generate up to `max_combos` weight combinations
-    /// Returns a flat Vec<f32> (length = 7 * combos)
-    pub fn next_chunk(&mut self, max_combos: usize) -> Vec<f32> {
-        if self.done {
-            return Vec::new();
+    /// Rank of `weights`, which must lie on this step size's grid
+    pub fn rank_of(&self, weights: Weights) -> PyResult<u64> {
+        let values = [
+            weights.gpg, weights.five_gpg, weights.hgpg, weights.tgpg,
+            weights.otga, weights.hppg_otshga, weights.is_home,
+        ];
+        let step = self.simplex.step;
+        let to_steps = |value: f32| (value / step).round() as i32;
+        let off_grid = values.iter().any(|&value| (value - to_steps(value) as f32 * step).abs() > step * 1e-3);
+        let steps: Steps = std::array::from_fn(|i| to_steps(values[i]));
+        let total = steps.iter().sum::<i32>() + to_steps(values[FREE_WEIGHTS]);
+        if off_grid || steps.iter().any(|&s| s < 0) || total != self.simplex.n {
+            return Err(PyValueError::new_err(format!(
+                "weights {:?} are not on the {} step grid", weights, self.simplex.step
+            )));
         }
+        Ok(self.simplex.rank(&steps))
+    }
 
-        let mut out = Vec::with_capacity(max_combos * 7);
-        let mut produced = 0;
-
-        let n = self.n;
-        let step = self.step;
-
-        while produced < max_combos {
-            let r0 = n - self.w0;
-            let r1 = r0 - self.w1;
-            let r2 = r1 - self.w2;
-            let r3 = r2 - self.w3;
-            let r4 = r3 - self.w4;
-
-            if self.w5 <= r4 {
-                let w6 = r4 - self.w5;
-
-                out.extend_from_slice(&[
-                    self.w0 as f32 * step,
-                    self.w1 as f32 * step,
-                    self.w2 as f32 * step,
-                    self.w3 as f32 * step,
-                    self.w4 as f32 * step,
-                    self.w5 as f32 * step,
-                    w6 as f32 * step,
-                ]);
-
-                produced += 1;
-                self.w5 += 1;
-                continue;
-            }
+    /// Combinations `[start, end)` as a list of `Weights`
+    pub fn weights_in(&self, py: Python, start: u64, end: u64) -> Vec<Weights> {
+        py.allow_threads(|| self.simplex.range(start, end).collect())
+    }
 
-            // carry logic (manual nested-loop unwinding)
-            self.w5 = 0;
-            self.w4 += 1;
-            if self.w4 <= r3 {
-                continue;
-            }
+    fn __len__(&self) -> usize {
+        self.simplex.count() as usize
+    }
 
-            self.w4 = 0;
-            self.w3 += 1;
-            if self.w3 <= r2 {
-                continue;
-            }
+    fn __repr__(&self) -> String {
+        format!("WeightSpace(step: {}, combinations: {})", self.simplex.step, self.simplex.count())
+    }
+}
 
-            self.w3 = 0;
-            self.w2 += 1;
-            if self.w2 <= r1 {
-                continue;
-            }
+/// Streams the combinations `[start, end)` in flat chunks, holding only the current position
+#[pyclass]
+pub struct WeightGenerator {
+    simplex: Simplex,
+    steps: Steps,
+    remaining: u64,
+}
 
-            self.w2 = 0;
-            self.w1 += 1;
-            if self.w1 <= r0 {
-                continue;
-            }
+#[pymethods]
+impl WeightGenerator {
+    #[new]
+    #[pyo3(signature = (step_size, start=0, end=None))]
+    pub fn new(step_size: f32, start: u64, end: Option<u64>) -> PyResult<Self> {
+        let simplex = Simplex::new(step_size)?;
+        let range = simplex.range(start, end.unwrap_or(u64::MAX));
+        Ok(Self {
+            simplex,
+            steps: range.steps,
+            remaining: range.remaining,
+        })
+    }
 
-            self.w1 = 0;
-            self.w0 += 1;
-            if self.w0 <= n {
-                continue;
-            }
+    /// Generate up to `max_combos` weight combinations
+    /// Returns a flat Vec<f32> (length = 7 * combos)
+    pub fn next_chunk(&mut self, max_combos: usize) -> Vec<f32> {
+        let produced = (max_combos as u64).min(self.remaining);
+        let mut out = Vec::with_capacity(produced as usize * 7);
+        let mut range = SimplexRange {
+            simplex: self.simplex,
+            steps: self.steps,
+            remaining: self.remaining,
+        };
 
-            self.done = true;
-            break;
+        for weights in range.by_ref().take(produced as usize) {
+            out.extend_from_slice(&[
+                weights.gpg,
+                weights.five_gpg,
+                weights.hgpg,
+                weights.tgpg,
+                weights.otga,
+                weights.hppg_otshga,
+                weights.is_home,
+            ]);
         }
 
+        self.steps = range.steps;
+        self.remaining = range.remaining;
         out
     }
+
+    /// Combinations left to generate
+    #[getter]
+    pub fn remaining(&self) -> u64 {
+        self.remaining
+    }
 }
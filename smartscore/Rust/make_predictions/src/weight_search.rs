@@ -0,0 +1,59 @@
+use crate::data_types::{MinMax, Weights};
+use crate::player_batch::Players;
+use crate::weight_generation::Simplex;
+use crate::weight_testing::{Evaluator, SearchResult, TILE_WEIGHTS};
+use pyo3::prelude::*;
+use rayon::prelude::*;
+
+/// Weight combinations handed to a rayon task at a time
+const RANKS_PER_TASK: u64 = 4096;
+
+/// Search the weight combinations for `step_size` (in percent) natively, all of them or the ranks
+/// `[start, end)` only. The GIL is released, rank ranges are fanned out over rayon and the best
+/// result is reduced in Rust. Combinations are visited in `WeightGenerator` order, so ties resolve
+/// the same way as `test_weights` over the generator's output. An empty range returns a correct count of -1.
+/// `early_exit` stops each combination once it cannot reach the best so far, `best_known` (e.g. the best
+/// of an earlier shard) seeds that bound; a range with nothing reaching it also returns -1.
+#[pyfunction]
+#[pyo3(signature = (players, min_max, step_size, start=0, end=None, early_exit=false, best_known=0))]
+pub fn search_weights(
+    py: Python,
+    players: Players,
+    min_max: MinMax,
+    step_size: f32,
+    start: u64,
+    end: Option<u64>,
+    early_exit: bool,
+    best_known: i32,
+) -> PyResult<(Weights, i32, i32)> {
+    let batch = players.into_columns();
+    let simplex = Simplex::new(step_size)?;
+    let end = end.unwrap_or(u64::MAX).min(simplex.count());
+
+    let best = py.allow_threads(|| {
+        let evaluator = Evaluator::new(&batch, &min_max, early_exit, best_known);
+        let num_tasks = end.saturating_sub(start).div_ceil(RANKS_PER_TASK) as usize;
+
+        (0..num_tasks)
+            .into_par_iter()
+            .map_init(
+                || (evaluator.scratch(), Vec::with_capacity(TILE_WEIGHTS)),
+                |(scratch, block), task| {
+                    let task_start = start + task as u64 * RANKS_PER_TASK;
+                    let mut combinations = simplex.range(task_start, (task_start + RANKS_PER_TASK).min(end));
+                    let mut best = SearchResult::none();
+                    loop {
+                        block.clear();
+                        block.extend(combinations.by_ref().take(TILE_WEIGHTS));
+                        if block.is_empty() {
+                            return best;
+                        }
+                        best = best.keep_later(evaluator.best_of(block, scratch));
+                    }
+                },
+            )
+            .reduce(SearchResult::none, SearchResult::keep_later)
+    });
+
+    Ok(best.into_tuple())
+}
@@ -1,110 +1,291 @@
-use crate::data_types::{PlayerInfo, Weights};
-use crate::predictions::{normalize_stats, calculate_probabilities};
+use crate::data_types::{MinMax, Weights, WEIGHT_COLUMNS};
+use crate::player_batch::{BatchColumns, Players, ScoringColumns};
+use numpy::{PyArray1, PyReadonlyArray2, PyUntypedArrayMethods};
+use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
+use rayon::prelude::*;
+use std::sync::atomic::{AtomicI32, Ordering};
 
-#[pyfunction]
-pub fn test_weights(_py: Python, mut players: Vec<PlayerInfo>, min_max: crate::data_types::MinMax, weight_combinations: Vec<Weights>) -> PyResult<(Weights, i32, i32)> {
-    let mut max_correct = -1;
-    let mut best_weights = <Weights as Default>::default();
-    let mut best_total = 0;
-    let _total_combinations = weight_combinations.len();
-    let _last_progress = 0;
-
-    normalize_stats(&mut players, &min_max);
-
-    for (_i, weights) in weight_combinations.iter().enumerate() {
-        let mut probabilities = vec![0.0; players.len()];
-        calculate_probabilities(&players, &mut probabilities, &weights);
+/// Best weights found so far. Ties keep the combination that comes later, like the sequential `>=` scan.
+#[derive(Clone, Copy, Debug)]
+pub struct SearchResult {
+    pub weights: Weights,
+    pub correct: i32,
+    pub total: i32,
+}
 
-        let (correct, total) = evaluate_correctness_with_total(&players, &probabilities);
+impl SearchResult {
+    pub fn none() -> Self {
+        Self {
+            weights: <Weights as Default>::default(),
+            correct: -1,
+            total: 0,
+        }
+    }
 
-        if correct >= max_correct {
-            max_correct = correct;
-            best_total = total;
-            best_weights = *weights;
+    // `later` must come after `self` in weight order, rayon's reduce keeps that order
+    pub fn keep_later(self, later: Self) -> Self {
+        if later.correct >= self.correct {
+            later
+        } else {
+            self
         }
+    }
 
-        // Print progress every 1%
-        // let current_progress = ((i + 1) as f64 / total_combinations as f64 * 100.0) as i32;
-        // if current_progress > last_progress {
-        //     println!("Progress: {}% ({}/{})", current_progress, i + 1, total_combinations);
-        //     last_progress = current_progress;
-        // }
+    pub fn into_tuple(self) -> (Weights, i32, i32) {
+        (self.weights, self.correct, self.total)
     }
+}
+
+// Score one weight combination into the `probabilities` scratch buffer and count correct picks
+pub fn evaluate_weights(batch: &BatchColumns, columns: &ScoringColumns, weights: &Weights, probabilities: &mut [f32]) -> SearchResult {
+    columns.score(weights, probabilities);
+    let (correct, total) = evaluate_correctness_with_total(batch, probabilities);
+    SearchResult { weights: *weights, correct, total }
+}
 
-    Ok((best_weights, max_correct, best_total))
+/// One date as seen by the early-exit evaluator
+struct DateRun {
+    /// Date index into the batch's `SegmentIndex`
+    date: usize,
+    /// Tims groups with at least one scorer, the most this date can add to the correct count
+    possible: i32,
 }
 
+/// Dates ordered so weak weights are rejected early, with the most correct picks still available after each
+pub struct DatePlan {
+    runs: Vec<DateRun>,
+    /// `remaining[k]` is the sum of `possible` over `runs[k..]`
+    remaining: Vec<i32>,
+    total: i32,
+}
 
-// Helper function to evaluate correctness and return both correct and total predictions
-pub fn evaluate_correctness_with_total(players: &[PlayerInfo], probabilities: &[f32]) -> (i32, i32) {
+impl DatePlan {
+    pub fn new(batch: &BatchColumns) -> Self {
+        let segments = &batch.segments;
+        let scorers = |group: &[u32]| group.iter().filter(|&&i| batch.scored[i as usize] > 0.0).count();
+        let mut runs: Vec<DateRun> = (0..segments.num_dates())
+            .map(|date| DateRun {
+                date,
+                possible: segments.groups(date).iter().filter(|group| scorers(group) > 0).count() as i32,
+            })
+            .collect();
+
+        // Dates where few of the candidates scored are the ones weak weights get wrong,
+        // visiting them first drops the upper bound of a weak combination fastest
+        let scorer_fraction = |run: &DateRun| {
+            let groups = segments.groups(run.date);
+            let picks: usize = groups.iter().map(|group| group.len()).sum();
+            let scored: usize = groups.iter().map(|group| scorers(group)).sum();
+            if picks == 0 { 1.0 } else { scored as f32 / picks as f32 }
+        };
+        runs.sort_by(|a, b| scorer_fraction(a).total_cmp(&scorer_fraction(b)).then(b.possible.cmp(&a.possible)));
+
+        let mut remaining = vec![0; runs.len()];
+        let mut left = 0;
+        for (k, run) in runs.iter().enumerate().rev() {
+            left += run.possible;
+            remaining[k] = left;
+        }
+        let total = 3 * runs.len() as i32;
+        Self { runs, remaining, total }
+    }
+}
+
+/// Like `evaluate_weights`, but gives up (correct -1) as soon as the combination cannot reach `best`.
+/// Only combinations strictly below the best are dropped, so the winner and its ties are always counted.
+pub fn evaluate_weights_bounded(
+    batch: &BatchColumns,
+    columns: &ScoringColumns,
+    plan: &DatePlan,
+    weights: &Weights,
+    probabilities: &mut [f32],
+    best: &AtomicI32,
+) -> SearchResult {
+    let pruned = SearchResult { weights: *weights, correct: -1, total: plan.total };
     let mut correct = 0;
-    let mut total_predictions = 0;
-    let mut current_date_players = Vec::new();
-    let mut last_date = players[0].date.clone();
-
-    for (i, player) in players.iter().enumerate() {
-        if last_date != player.date {
-            // Process previous date - select 1 player from each TIMS group
-            let date_correct = process_date_predictions(&current_date_players, players, probabilities);
-            correct += date_correct;
-            total_predictions += 3;
-
-            // Reset for next date
-            current_date_players.clear();
-            last_date = player.date.clone();
+    for (run, remaining) in plan.runs.iter().zip(plan.remaining.iter()) {
+        if correct + remaining < best.load(Ordering::Relaxed) {
+            return pruned;
         }
+        columns.score_rows(weights, batch.segments.date_rows(run.date), probabilities);
+        correct += batch.segments.count_correct(run.date, &batch.scored, |i| probabilities[i]);
+    }
+    if best.fetch_max(correct, Ordering::Relaxed) > correct {
+        return pruned;
+    }
+    SearchResult { weights: *weights, correct, total: plan.total }
+}
 
-        // Only consider TIMS picks for predictions
-        if let Some(tims) = player.tims {
-            if tims >= 1 && tims <= 3 {
-                current_date_players.push(i);
-            }
+/// Correct counts for a block of weight combinations, scored one date at a time into a
+/// (date rows x weights) tile so each date's players are read once for the whole block.
+/// The per-date, per-group argmax then walks the tile one weight column at a time.
+pub fn evaluate_weight_block(
+    batch: &BatchColumns,
+    columns: &ScoringColumns,
+    plan: &DatePlan,
+    weights: &[Weights],
+    tile: &mut Vec<f32>,
+    correct: &mut [i32],
+) {
+    let values: Vec<[f32; 7]> = weights.iter().map(Weights::values).collect();
+    let correct = &mut correct[..weights.len()];
+    correct.fill(0);
+    let segments = &batch.segments;
+    for run in &plan.runs {
+        let rows = segments.date_rows(run.date);
+        let len = rows.len();
+        tile.resize(tile.len().max(len * weights.len()), 0.0);
+        columns.score_tile_rows(&values, rows.clone(), tile);
+        for (count, scores) in correct.iter_mut().zip(tile.chunks_exact(len)) {
+            *count += segments.count_correct(run.date, &batch.scored, |i| scores[i - rows.start]);
         }
     }
+}
 
-    // Process the last date
-    let date_correct = process_date_predictions(&current_date_players, players, probabilities);
-    correct += date_correct;
-    total_predictions += 3;
+/// Weight combinations scored per tile, a date's tile of a few hundred rows still fits in L2
+pub const TILE_WEIGHTS: usize = 64;
 
-    (correct, total_predictions)
+/// Reused buffers of one worker thread
+pub struct Scratch {
+    probabilities: Vec<f32>,
+    tile: Vec<f32>,
+    correct: Vec<i32>,
 }
 
-// Helper function to process predictions for a single date
-pub fn process_date_predictions(player_indices: &[usize], players: &[PlayerInfo], probabilities: &[f32]) -> i32 {
-    let mut correct = 0;
-    let mut selected_players = [None; 3]; // One for each TIMS group (1, 2, 3)
-
-    // Find the best player for each TIMS group
-    for &player_idx in player_indices.iter() {
-        let player = &players[player_idx];
-        let prob = probabilities[player_idx];
-        if let Some(tims) = player.tims {
-            let group_idx = (tims - 1) as usize;
-
-            if group_idx < 3 {
-                match &selected_players[group_idx] {
-                    None => selected_players[group_idx] = Some((player_idx, prob)),
-                    Some((_, current_prob)) if prob > *current_prob => {
-                        selected_players[group_idx] = Some((player_idx, prob));
-                    }
-                    _ => {}
-                }
-            }
+/// Scores weight combinations for one search, with or without the shared early-exit bound
+pub struct Evaluator<'a> {
+    batch: &'a BatchColumns,
+    columns: ScoringColumns,
+    plan: DatePlan,
+    bound: Option<AtomicI32>,
+}
+
+impl<'a> Evaluator<'a> {
+    /// `best_known` seeds the bound with a count already reached elsewhere, e.g. by another shard
+    pub fn new(batch: &'a BatchColumns, min_max: &MinMax, early_exit: bool, best_known: i32) -> Self {
+        Self {
+            batch,
+            columns: ScoringColumns::new(batch, min_max),
+            plan: DatePlan::new(batch),
+            bound: early_exit.then(|| AtomicI32::new(best_known)),
+        }
+    }
+
+    pub fn scratch(&self) -> Scratch {
+        Scratch {
+            probabilities: vec![0.0; self.batch.len()],
+            tile: Vec::new(),
+            correct: vec![0; TILE_WEIGHTS],
+        }
+    }
+
+    pub fn evaluate(&self, weights: &Weights, scratch: &mut Scratch) -> SearchResult {
+        match &self.bound {
+            Some(best) => evaluate_weights_bounded(self.batch, &self.columns, &self.plan, weights, &mut scratch.probabilities, best),
+            None => evaluate_weights(self.batch, &self.columns, weights, &mut scratch.probabilities),
         }
     }
 
-    // Count correct predictions and total predictions made
-    for selected in selected_players.iter() {
-        if let Some((player_idx, _)) = selected {
-            if let Some(scored) = players[*player_idx].scored {
-                if scored > 0.0 {
-                    correct += 1;
-                }
-            }
+    /// Correct counts for up to `TILE_WEIGHTS` combinations, never cut short by the bound
+    pub fn count_block<'s>(&self, weights: &[Weights], scratch: &'s mut Scratch) -> &'s [i32] {
+        evaluate_weight_block(self.batch, &self.columns, &self.plan, weights, &mut scratch.tile, &mut scratch.correct);
+        &scratch.correct[..weights.len()]
+    }
+
+    /// Best of up to `TILE_WEIGHTS` combinations in order, one at a time when the bound can cut them short
+    pub fn best_of(&self, weights: &[Weights], scratch: &mut Scratch) -> SearchResult {
+        if self.bound.is_some() {
+            return weights
+                .iter()
+                .map(|weights| self.evaluate(weights, scratch))
+                .fold(SearchResult::none(), SearchResult::keep_later);
         }
+        let total = self.plan.total;
+        weights
+            .iter()
+            .zip(self.count_block(weights, scratch))
+            .map(|(weights, &correct)| SearchResult { weights: *weights, correct, total })
+            .fold(SearchResult::none(), SearchResult::keep_later)
     }
+}
+
+/// Test every weight combination and return the best. Runs on rayon with the GIL released.
+/// With `early_exit` a combination stops as soon as it cannot reach the best count found so far,
+/// the returned best is the same.
+#[pyfunction]
+#[pyo3(signature = (players, min_max, weight_combinations, early_exit=false))]
+pub fn test_weights(
+    py: Python,
+    players: Players,
+    min_max: MinMax,
+    weight_combinations: Vec<Weights>,
+    early_exit: bool,
+) -> PyResult<(Weights, i32, i32)> {
+    let batch = players.into_columns();
 
-    correct
-}
\ No newline at end of file
+    let best = py.allow_threads(|| {
+        let evaluator = Evaluator::new(&batch, &min_max, early_exit, 0);
+        weight_combinations
+            .par_chunks(TILE_WEIGHTS)
+            .map_init(|| evaluator.scratch(), |scratch, block| evaluator.best_of(block, scratch))
+            .reduce(SearchResult::none, SearchResult::keep_later)
+    });
+
+    Ok(best.into_tuple())
+}
+
+/// Correct picks for every row of a (K x 7) float32 weights matrix in `WEIGHT_COLUMNS` order.
+/// Returns the counts as an int32 array plus the total number of predictions, which is the same for every row.
+/// Rows are scored `TILE_WEIGHTS` at a time, see `evaluate_weight_block`.
+#[pyfunction]
+pub fn evaluate_weight_array<'py>(
+    py: Python<'py>,
+    players: Players,
+    min_max: MinMax,
+    weights: PyReadonlyArray2<'py, f32>,
+) -> PyResult<(Bound<'py, PyArray1<i32>>, i32)> {
+    if weights.shape()[1] != WEIGHT_COLUMNS.len() {
+        return Err(PyValueError::new_err(format!(
+            "expected {} weight columns {:?}, got {}", WEIGHT_COLUMNS.len(), WEIGHT_COLUMNS, weights.shape()[1]
+        )));
+    }
+    let weight_combinations: Vec<Weights> = weights
+        .as_array()
+        .rows()
+        .into_iter()
+        .map(|row| Weights {
+            gpg: row[0],
+            five_gpg: row[1],
+            hgpg: row[2],
+            tgpg: row[3],
+            otga: row[4],
+            hppg_otshga: row[5],
+            is_home: row[6],
+        })
+        .collect();
+    let batch = players.into_columns();
+
+    let correct: Vec<i32> = py.allow_threads(|| {
+        let evaluator = Evaluator::new(&batch, &min_max, false, 0);
+        weight_combinations
+            .par_chunks(TILE_WEIGHTS)
+            .map_init(|| evaluator.scratch(), |scratch, block| evaluator.count_block(block, scratch).to_vec())
+            .flatten_iter()
+            .collect()
+    });
+    // Every date counts three predictions, see `evaluate_correctness_with_total`
+    let total = 3 * batch.segments.num_dates() as i32;
+
+    Ok((PyArray1::from_vec(py, correct), total))
+}
+
+// Helper function to evaluate correctness and return both correct and total predictions
+pub fn evaluate_correctness_with_total(batch: &BatchColumns, probabilities: &[f32]) -> (i32, i32) {
+    let segments = &batch.segments;
+    let correct = (0..segments.num_dates())
+        .map(|date| segments.count_correct(date, &batch.scored, |i| probabilities[i]))
+        .sum();
+    // Every date counts three predictions, one per TIMS group
+    (correct, 3 * segments.num_dates() as i32)
+}
@@ -31,3 +31,12 @@ GMAIL_APP_PASSWORD = os.environ.get("GMAIL_APP_PASSWORD")
 BREVO_SMTP_LOGIN = os.environ.get("BREVO_SMTP_LOGIN")
 BREVO_SMTP_KEY = os.environ.get("BREVO_SMTP_KEY")
 BREVO_FROM_EMAIL = os.environ.get("BREVO_FROM_EMAIL")
+
+# NHL roster fetches, one token bucket shared by every worker of a GetPlayersFromTeams run
+ROSTER_REQUESTS_PER_SECOND = float(os.environ.get("ROSTER_REQUESTS_PER_SECOND", 2))
+ROSTER_BURST = int(os.environ.get("ROSTER_BURST", 4))
+ROSTER_WORKERS = int(os.environ.get("ROSTER_WORKERS", 8))
+
+# NHL API response cache, see response_cache. Kept small for the 128 MB Lambdas, a day of scores can be ~200 KB
+RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR")
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 64))
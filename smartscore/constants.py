@@ -29,6 +29,12 @@ CURRENT_PICK_ACCURACY = "current_pick_accuracy"
 # This includes the current day
 DAYS_TO_KEEP_HISTORIC_DATA = 8
 
+# Dates fetched at once when backfilling scores
+BACKFILL_WORKERS = 8
+
+# Player fields fed to make_predictions_rust.predict_array, in make_predictions_rust.FEATURE_COLUMNS order
+PREDICTION_FEATURES = ["gpg", "hgpg", "five_gpg", "tgpg", "otga", "hppg", "otshga", "home"]
+
 # Prediction weights
 WEIGHTS = make_predictions_rust.Weights(
     gpg=0.190,
@@ -0,0 +1,70 @@
+"""
+Time left in the current Lambda invocation.
+
+lambda_handler_error_responder starts a deadline from the Lambda context, and every request helper
+checks it before another attempt or retry wait. A slow upstream then fails the invocation while there
+is still time to log the error, instead of the Lambda timing out mid-request. Outside a Lambda there is
+no deadline and nothing is cut short.
+"""
+
+import contextvars
+import time
+
+# Kept back from the Lambda timeout to log the error and return
+DEADLINE_MARGIN = 2.0
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The invocation does not have enough time left for the next step."""
+
+
+def start(seconds):
+    """
+    Starts a deadline this many seconds from now, less DEADLINE_MARGIN.
+
+    Args:
+        seconds: Time left in the invocation, or None for no deadline
+
+    Returns:
+        Token to pass to reset once the invocation ends
+    """
+    if seconds is None:
+        return _deadline.set(None)
+    return _deadline.set(time.monotonic() + seconds - DEADLINE_MARGIN)
+
+
+def start_from_context(context):
+    """Starts a deadline from a Lambda context, or no deadline if it has no remaining time."""
+    get_remaining_time = getattr(context, "get_remaining_time_in_millis", None)
+    if not callable(get_remaining_time):
+        return start(None)
+    return start(get_remaining_time() / 1000)
+
+
+def reset(token):
+    _deadline.reset(token)
+
+
+def remaining():
+    """Seconds until the deadline, or None if there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check(needed=0.0):
+    """Raises DeadlineExceeded unless more than `needed` seconds are left."""
+    left = remaining()
+    if left is not None and left <= needed:
+        raise DeadlineExceeded(f"Needed {needed:.2f} seconds but only {max(left, 0.0):.2f} are left")
+
+
+def clamp(timeout):
+    """The timeout cut down to the time left, so one attempt cannot outlive the deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(0.0, min(timeout, left))
@@ -2,11 +2,14 @@ import traceback
 
 from aws_lambda_powertools import Logger
 
+import deadline
+
 logger = Logger()
 
 
 def lambda_handler_error_responder(func):
     def wrapper(event, context):
+        token = deadline.start_from_context(context)
         try:
             return func(event, context)
         except Exception as exc:
@@ -14,5 +17,7 @@ def lambda_handler_error_responder(func):
             logger.error(f"Error occurred: {str(exc)}\nTraceback:\n{tb_str}")
 
             raise exc
+        finally:
+            deadline.reset(token)
 
     return wrapper
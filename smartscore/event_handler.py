@@ -12,6 +12,7 @@ from service import (
     get_date,
     get_injury_data,
     get_players_from_team,
+    get_players_from_teams,
     get_teams,
     get_tims,
     get_todays_schedule,
@@ -121,6 +122,32 @@ def handle_get_players_from_team(event, context):
     players = get_players_from_team(team)
     logger.info(f"Found [{len(players)}] players for team")
 
+    return team_with_players(event, players)
+
+
+@lambda_handler_error_responder
+def handle_get_players_from_teams(event, context):
+    """
+    Gets players for every team playing today in one pass.
+
+    Args:
+        event (dict): The output of handle_get_teams, with the list of team data under "teams".
+        context (dict): Unused Lambda context.
+
+    Returns:
+        list: One dictionary per team, the same structure handle_get_players_from_team returns.
+    """
+    team_events = event.get("teams", [])
+    teams = [TeamInfo(**team_event) for team_event in team_events]
+
+    logger.info(f"Getting players for [{len(teams)}] teams")
+    rosters = get_players_from_teams(teams)
+    logger.info(f"Found [{sum(len(players) for players in rosters)}] players")
+
+    return [team_with_players(team_event, players) for team_event, players in zip(team_events, rosters)]
+
+
+def team_with_players(event, players):
     return {
         "team_name": event.get("team_name"),
         "team_abbr": event.get("team_abbr"),
@@ -11,6 +11,8 @@ def _get_bool_env(name: str, default: bool = False) -> bool:
 
 FLAGS = {
     "send_emails": _get_bool_env("FEATURE_SEND_EMAILS", default=False),
+    # Send postponed games in POST_BACKFILL, needs the Api Lambda to accept "delete_games"
+    "batch_delete_games": _get_bool_env("FEATURE_BATCH_DELETE_GAMES", default=False),
 }
 
 
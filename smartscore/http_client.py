@@ -0,0 +1,150 @@
+"""
+Pooled HTTP session shared by every outbound request.
+
+The session keeps one connection pool per host alive between calls, so repeated NHL, RotoWire and
+DraftKings requests skip the TCP and TLS handshakes. It lives at module level, so a warm Lambda keeps
+its connections between invocations too.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from aws_lambda_powertools import Logger
+from requests.adapters import HTTPAdapter
+
+import deadline
+
+logger = Logger()
+
+# Hosts with a pool kept open, and connections kept per host (at least ROSTER_WORKERS)
+POOL_HOSTS = 8
+POOL_SIZE = 16
+
+DEFAULT_TIMEOUT = 10
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+class RetriesExhausted(requests.RequestException):
+    """Every attempt allowed by the retry policy failed."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a request.
+
+    Args:
+        max_retries: Attempts in total, including the first
+        base_delay: Delay after the first failure in seconds, doubled after each failure
+        max_delay: Longest wait between attempts, also caps Retry-After
+        jitter: Fraction of each delay that is randomized, so parallel callers spread out
+        retry_statuses: HTTP statuses worth another attempt, other error statuses fail at once
+    """
+
+    max_retries: int = 5
+    base_delay: float = 1
+    max_delay: float = 60
+    jitter: float = 0.5
+    retry_statuses: frozenset = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+    def __post_init__(self):
+        if self.max_retries < 1:
+            raise ValueError(f"max_retries must be at least 1, got {self.max_retries}")
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        backoff = min(self.base_delay * (2**attempt), self.max_delay)
+        return backoff * (1 - self.jitter * random.random())  # noqa: S311
+
+    def should_retry(self, error):
+        # Timeouts and connection errors have no response
+        response = getattr(error, "response", None)
+        return response is None or response.status_code in self.retry_statuses
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+def get_session():
+    # Locked so concurrent first calls still end up sharing one pool
+    with _session_lock:
+        if "session" not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            _sessions["session"] = session
+        return _sessions["session"]
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+def request(method, url, policy=DEFAULT_POLICY, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Sends a request on the shared session, retrying as the policy allows and the deadline leaves time for.
+
+    Args:
+        method: HTTP method
+        url: URL to send the request to
+        policy: RetryPolicy deciding which failures to retry and how long to wait
+        timeout: Seconds to wait for each attempt, cut down to the time left before the deadline
+        **kwargs: Passed on to requests.Session.request
+
+    Returns:
+        The successful response
+
+    Raises:
+        RetriesExhausted: If every attempt failed
+        deadline.DeadlineExceeded: If the deadline leaves no time for the next attempt
+        requests.RequestException: On an error the policy does not retry
+    """
+    session = get_session()
+    for attempt in range(policy.max_retries):
+        retry_after = None
+        deadline.check()
+        try:
+            response = session.request(method, url, timeout=deadline.clamp(timeout), **kwargs)
+            if response.status_code in policy.retry_statuses:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.raise_for_status()
+            return response
+        except requests.RequestException as e:
+            if not policy.should_retry(e):
+                raise
+            error = e
+
+        if attempt + 1 < policy.max_retries:
+            wait_time = policy.delay(attempt, retry_after)
+            try:
+                deadline.check(wait_time)
+            except deadline.DeadlineExceeded as e:
+                raise deadline.DeadlineExceeded(f"No time left to retry {url} after: {error}") from e
+            logger.info(f"Attempt {attempt + 1} failed: {error}. Retrying in {wait_time:.2f} seconds...")
+            time.sleep(wait_time)
+
+    raise RetriesExhausted(f"Max retries reached for {url}: {error}")
@@ -0,0 +1,205 @@
+"""
+Cache of NHL API responses that will not change again.
+
+Scores, schedules and game stories stop changing once every game in them is over, so those are kept
+forever. Rosters are kept for a few minutes, and anything without a rule, like the live scoreboard, is
+never cached. Entries sit in an in-memory LRU that a warm Lambda keeps between invocations. With a file
+backend, from RESPONSE_CACHE_DIR or use_file_backend as the scripts do, they are also written there as
+files so later runs skip the network too.
+"""
+
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import pytz
+from aws_lambda_powertools import Logger
+
+from config import RESPONSE_CACHE_DIR, RESPONSE_CACHE_SIZE
+
+logger = Logger()
+
+FOREVER = math.inf
+
+# gameState of a game that is over, and gameScheduleState of one that will not be played that day
+FINAL_GAME_STATES = {"FINAL", "OFF"}
+UNPLAYED_SCHEDULE_STATES = {"PPD", "CNCL"}
+
+
+def game_over(game):
+    return game.get("gameState") in FINAL_GAME_STATES or game.get("gameScheduleState") in UNPLAYED_SCHEDULE_STATES
+
+
+def games_over(payload):
+    """Every game of a score or schedule payload is over, so the payload is final."""
+    games = payload.get("games")
+    if games is None:
+        games = [game for day in payload.get("gameWeek", []) for game in day.get("games", [])]
+    return all(game_over(game) for game in games)
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    """
+    How long responses from matching URLs are kept.
+
+    Args:
+        pattern: Regex matched against the full URL, a "date" group marks a dated endpoint
+        ttl: Seconds to keep a response, FOREVER for as long as the cache holds it
+        is_final: Check the payload must pass to be cached, so unfinished games are fetched again
+    """
+
+    pattern: re.Pattern
+    ttl: float
+    is_final: Optional[Callable] = None
+
+    def ttl_for(self, match, payload):
+        date = match.groupdict().get("date")
+        if date is not None and date >= today():
+            return 0
+        if self.is_final is not None and not self.is_final(payload):
+            return 0
+        return self.ttl
+
+
+RULES = (
+    CacheRule(re.compile(r"https://api-web\.nhle\.com/v1/score/(?P<date>\d{4}-\d{2}-\d{2})"), FOREVER, games_over),
+    CacheRule(re.compile(r"https://api-web\.nhle\.com/v1/schedule/(?P<date>\d{4}-\d{2}-\d{2})"), FOREVER, games_over),
+    CacheRule(re.compile(r"https://api-web\.nhle\.com/v1/wsc/game-story/\d+"), FOREVER, game_over),
+    CacheRule(re.compile(r"https://api-web\.nhle\.com/v1/roster/[A-Z]+/current"), 10 * 60),
+)
+
+
+def today():
+    return datetime.datetime.now(pytz.timezone("America/Toronto")).strftime("%Y-%m-%d")
+
+
+def find_rule(url):
+    for rule in RULES:
+        match = rule.pattern.fullmatch(url)
+        if match:
+            return rule, match
+    return None, None
+
+
+class MemoryBackend:
+    """Least recently used entries are dropped once more than max_entries are held."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileBackend:
+    """One JSON file per URL, written to a temporary file first so readers never see half an entry."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{hashlib.sha256(key.encode()).hexdigest()}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != key:
+            return None
+        expires = math.inf if entry["expires"] is None else entry["expires"]
+        return expires, entry["body"]
+
+    def put(self, key, entry):
+        expires, body = entry
+        os.makedirs(self.directory, exist_ok=True)
+        record = {"url": key, "expires": None if math.isinf(expires) else expires, "body": body}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(record, file)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not write response cache entry for {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_memory = MemoryBackend(RESPONSE_CACHE_SIZE)
+_file = FileBackend(RESPONSE_CACHE_DIR) if RESPONSE_CACHE_DIR else None
+
+
+def use_file_backend(directory):
+    """Also keeps entries as files in `directory` from now on, or only in memory if it is None."""
+    global _file  # noqa: PLW0603
+    _file = FileBackend(directory) if directory else None
+
+
+def lookup(url):
+    """The cached payload for a URL, or None if it has no fresh entry."""
+    if find_rule(url)[0] is None:
+        return None
+
+    entry = _memory.get(url)
+    if entry is None and _file is not None:
+        entry = _file.get(url)
+        if entry is not None:
+            _memory.put(url, entry)
+    if entry is None:
+        return None
+
+    expires, body = entry
+    if expires <= time.time():
+        return None
+    # Stored as text, so every caller gets its own copy to modify
+    return json.loads(body)
+
+
+def store(url, body, payload):
+    """Caches a response body for as long as the URL's rule allows, given its parsed payload."""
+    rule, match = find_rule(url)
+    if rule is None:
+        return
+
+    ttl = rule.ttl_for(match, payload)
+    if ttl <= 0:
+        return
+
+    entry = (time.time() + ttl, body)
+    _memory.put(url, entry)
+    if _file is not None:
+        _file.put(url, entry)
+
+
+def clear():
+    """Empties the in-memory cache, the file backend keeps its entries."""
+    _memory.clear()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Side-by-side benchmark of the weight-search engines on a synthetic season.
+
+Every engine searches the same step grid over the same generated players, each in its own process
+so the peak RSS belongs to that engine alone. The report lists combinations per second, peak RSS
+and whether each engine found the same best weights and correct count as the first engine that ran.
+Results are written as JSON so runs can be compared over time.
+
+    python benchmark_engines.py --dates 160 --players 300 --group-sizes 8 8 8 --step 10
+    python benchmark_engines.py --engines rust c numpy --out benchmark.json
+
+Engines that cannot run here (no compiled C library, no Warp) are reported as skipped.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import make_predictions_rust
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENGINES = ["rust", "rust-early-exit", "rust-test-weights", "c", "numpy", "warp", "python"]
+MIN_MAX_FEATURES = ["gpg", "hgpg", "five_gpg", "tgpg", "otga", "hppg", "otshga"]
+
+
+def synthetic_season(num_dates, players_per_date, group_sizes, seed=0):
+    """Players sorted by date in the ``load_search_data`` layout, plus the min/max of their features.
+
+    Every date has ``players_per_date`` players, ``group_sizes[g]`` of them picked at random for
+    Tims group ``g + 1``. A hidden skill drives both the features and the chance to score, so the
+    weights change the picks the way they do on real data.
+    """
+    rng = np.random.default_rng(seed)
+    n = num_dates * players_per_date
+
+    skill = rng.gamma(2.0, 0.15, n)
+    team = rng.normal(3.1, 0.4, n)
+    opponent = rng.normal(3.1, 0.4, n)
+    features = {
+        "gpg": skill + rng.normal(0, 0.05, n),
+        "hgpg": skill + rng.normal(0, 0.08, n),
+        "five_gpg": skill + rng.normal(0, 0.25, n),
+        "tgpg": team,
+        "otga": opponent,
+        "hppg": 0.3 * skill + rng.normal(0, 0.05, n),
+        "otshga": rng.normal(0.6, 0.15, n),
+        "is_home": rng.integers(0, 2, n),
+    }
+    columns = [np.clip(features[name], 0, None) for name in make_predictions_rust.FEATURE_COLUMNS]
+    matrix = np.column_stack(columns).astype(np.float32)
+
+    chance = np.clip(0.05 + 0.55 * skill + 0.03 * (opponent - 3.1) + 0.02 * features["is_home"], 0, 0.95)
+    scored = (rng.random(n) < chance).astype(np.float32)
+
+    tims = np.zeros(n, dtype=np.int32)
+    groups = np.repeat(np.arange(1, 4, dtype=np.int32), group_sizes)
+    for date in range(num_dates):
+        picks = rng.permutation(players_per_date)[: len(groups)]
+        tims[date * players_per_date + picks] = groups
+
+    arrays = {
+        "features": matrix,
+        "scored": scored,
+        "tims": tims,
+        "dates": np.repeat(np.arange(num_dates, dtype=np.int32), players_per_date),
+    }
+    min_max = {}
+    for name in MIN_MAX_FEATURES:
+        column = matrix[:, make_predictions_rust.FEATURE_COLUMNS.index(name)]
+        min_max[f"min_{name}"] = float(column.min())
+        min_max[f"max_{name}"] = float(column.max())
+    return arrays, min_max
+
+
+def weight_list(weights):
+    return [float(getattr(weights, column)) for column in make_predictions_rust.WEIGHT_COLUMNS]
+
+
+def run_rust(arrays, min_max, step, early_exit=False):
+    batch = make_predictions_rust.PlayerBatch(
+        arrays["features"], scored=arrays["scored"], tims=arrays["tims"], dates=arrays["dates"]
+    )
+    weights, correct, total = make_predictions_rust.search_weights(
+        batch, make_predictions_rust.MinMax(**min_max), step, early_exit=early_exit
+    )
+    return weight_list(weights), correct, total
+
+
+def run_rust_early_exit(arrays, min_max, step):
+    return run_rust(arrays, min_max, step, early_exit=True)
+
+
+def run_rust_test_weights(arrays, min_max, step):
+    """The materialized path: every combination built as a ``Weights`` object, then ``test_weights``."""
+    generator = make_predictions_rust.WeightGenerator(step)
+    values = np.array(generator.next_chunk(generator.remaining), dtype=np.float32).reshape(-1, 7)
+    combinations = [
+        make_predictions_rust.Weights(**dict(zip(make_predictions_rust.WEIGHT_COLUMNS, map(float, row))))
+        for row in values
+    ]
+    batch = make_predictions_rust.PlayerBatch(
+        arrays["features"], scored=arrays["scored"], tims=arrays["tims"], dates=arrays["dates"]
+    )
+    weights, correct, total = make_predictions_rust.test_weights(
+        batch, make_predictions_rust.MinMax(**min_max), combinations
+    )
+    return weight_list(weights), correct, total
+
+
+def run_c(arrays, min_max, step):
+    import find_weights_c
+
+    result = find_weights_c.search(arrays, min_max, step)
+    return [float(getattr(result.weights, label)) for label in find_weights_c.LABELS], result.correct, result.total
+
+
+def run_numpy(arrays, min_max, step):
+    from find_weights_numpy import SegmentScorer
+    from find_weights_numpy import search as numpy_search
+
+    scorer = SegmentScorer(arrays, min_max)
+    weights, correct = numpy_search(scorer, step, memory_mb=512)
+    return [float(value) for value in weights], correct, scorer.total
+
+
+def run_warp(arrays, min_max, step, device=None):
+    from find_weights_gpu import call_warp_function
+
+    weights, correct = call_warp_function(arrays, min_max, device=device, step_size=step / 100)
+    return [float(value) for value in weights], correct, 3 * len(np.unique(arrays["dates"]))
+
+
+def run_python(arrays, min_max, step):
+    """The ``calculate_accuracy.py`` loop for every combination: predict, then pick per (date, Tims group) in Python."""
+    from shared import build_segment_index
+
+    index = build_segment_index(arrays["tims"], arrays["dates"])
+    offsets = index["group_offsets"].tolist()
+    rows = index["rows"].tolist()
+    groups = [rows[start:end] for start, end in zip(offsets, offsets[1:]) if end > start]
+    scored = (arrays["scored"] > 0).tolist()
+    min_max_obj = make_predictions_rust.MinMax(**min_max)
+    probabilities = np.empty(len(arrays["scored"]), dtype=np.float32)
+
+    generator = make_predictions_rust.WeightGenerator(step)
+    best_weights, best_correct = None, -1
+    while generator.remaining:
+        for values in np.array(generator.next_chunk(10_000), dtype=np.float32).reshape(-1, 7).tolist():
+            weights = make_predictions_rust.Weights(**dict(zip(make_predictions_rust.WEIGHT_COLUMNS, values)))
+            make_predictions_rust.predict_array(arrays["features"], min_max_obj, weights, out=probabilities)
+            scores = probabilities.tolist()
+            # max keeps the first of tied players, >= keeps the later of tied combinations
+            correct = sum(scored[max(group, key=scores.__getitem__)] for group in groups)
+            if correct >= best_correct:
+                best_weights, best_correct = values, correct
+    return best_weights, best_correct, 3 * (len(index["date_offsets"]) - 1)
+
+
+RUNNERS = {
+    "rust": run_rust,
+    "rust-early-exit": run_rust_early_exit,
+    "rust-test-weights": run_rust_test_weights,
+    "c": run_c,
+    "numpy": run_numpy,
+    "warp": run_warp,
+    "python": run_python,
+}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(args):
+    """Child process: load the season, run one engine ``--repeat`` times and write its result as JSON."""
+    season = np.load(args.data)
+    arrays = {name: season[name] for name in ("features", "scored", "tims", "dates")}
+    with open(args.data.replace(".npz", ".json"), encoding="utf-8") as f:
+        min_max = json.load(f)
+
+    options = {"device": args.warp_device} if args.worker == "warp" else {}
+    result = {"engine": args.worker}
+    try:
+        # The fastest of the repeats, so one-off costs like Warp's kernel build don't count
+        seconds = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            weights, correct, total = RUNNERS[args.worker](arrays, min_max, args.step, **options)
+            seconds.append(time.perf_counter() - start)
+    except (ImportError, OSError) as e:
+        result.update(status="skipped", reason=f"{type(e).__name__}: {e}")
+    else:
+        result.update(
+            status="ok", seconds=min(seconds), weights=[float(w) for w in weights], correct=int(correct), total=total
+        )
+    result["peak_rss_mb"] = peak_rss_mb()
+
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def run_engine(engine, data_path, args, workdir):
+    result_path = os.path.join(workdir, f"{engine}.json")
+    command = [sys.executable, os.path.abspath(__file__), "--worker", engine, "--data", data_path]
+    command += ["--result", result_path, "--step", str(args.step), "--repeat", str(args.repeat)]
+    if args.warp_device:
+        command += ["--warp-device", args.warp_device]
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout, check=False)  # noqa: S603
+    except subprocess.TimeoutExpired:
+        return {"engine": engine, "status": "timeout", "reason": f"no result after {args.timeout}s"}
+
+    if process.returncode != 0 or not os.path.exists(result_path):
+        lines = process.stderr.strip().splitlines() or ["no output"]
+        return {"engine": engine, "status": "failed", "reason": lines[-1]}
+    with open(result_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, combinations):
+    """Combinations per second, and agreement with the first engine that ran."""
+    reference = next((r for r in results if r["status"] == "ok"), None)
+    for result in results:
+        if result["status"] != "ok":
+            continue
+        result["combinations_per_second"] = combinations / result["seconds"] if result["seconds"] else None
+        result["agrees"] = result["correct"] == reference["correct"] and np.allclose(
+            result["weights"], reference["weights"], atol=1e-6
+        )
+    return reference["engine"] if reference else None
+
+
+def print_report(results, reference):
+    print(
+        f"\n{'Engine':<18} {'Status':<8} {'Seconds':>9} {'Combos/sec':>14} {'Peak RSS MB':>12} {'Correct':>8}  Agrees"
+    )
+    print("-" * 84)
+    for r in results:
+        if r["status"] != "ok":
+            print(f"{r['engine']:<18} {r['status']:<8} {r.get('reason', '')}")
+            continue
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        agrees = "reference" if r["engine"] == reference else ("yes" if r["agrees"] else "NO")
+        print(
+            f"{r['engine']:<18} {r['status']:<8} {r['seconds']:>9.3f} {r['combinations_per_second']:>14,.0f} "
+            f"{rss:>12} {r['correct']:>5}/{r['total']:<4} {agrees}"
+        )
+
+
+def run(args):
+    arrays, min_max = synthetic_season(args.dates, args.players, args.group_sizes, args.seed)
+    combinations = make_predictions_rust.WeightSpace(args.step).count
+    print(
+        f"Synthetic season: {args.dates} dates x {args.players} players, Tims groups of {args.group_sizes}, "
+        f"{combinations} weight combinations at step {args.step}%"
+    )
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "season.npz")
+        np.savez(data_path, **arrays)
+        with open(data_path.replace(".npz", ".json"), "w", encoding="utf-8") as f:
+            json.dump(min_max, f)
+
+        results = []
+        for engine in args.engines:
+            print(f"Running {engine}...")
+            results.append(run_engine(engine, data_path, args, workdir))
+
+    reference = compare(results, combinations)
+    print_report(results, reference)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "season": {
+            "dates": args.dates,
+            "players_per_date": args.players,
+            "group_sizes": args.group_sizes,
+            "seed": args.seed,
+            "rows": len(arrays["scored"]),
+        },
+        "step": args.step,
+        "combinations": combinations,
+        "repeat": args.repeat,
+        "reference": reference,
+        "agree": all(r.get("agrees", True) for r in results),
+        "engines": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.out}")
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dates", type=int, default=160, help="dates in the season")
+    parser.add_argument("--players", type=int, default=300, help="players per date")
+    parser.add_argument(
+        "--group-sizes", type=int, nargs=3, default=[8, 8, 8], metavar="N", help="players in Tims groups 1, 2 and 3"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--step", type=float, default=10, help="step size in percent")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--warp-device", help="Warp device, e.g. cpu or cuda:0 (default: the preferred device)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per engine, the fastest is reported")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds before an engine is abandoned")
+    parser.add_argument("--out", default="benchmark_engines.json", help="JSON report path")
+    # Internal: run one engine in this process
+    parser.add_argument("--worker", choices=ENGINES, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if sum(args.group_sizes) > args.players:
+        parser.error(f"Tims groups of {args.group_sizes} need at least {sum(args.group_sizes)} players per date")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+    else:
+        run(args)
@@ -11,7 +11,8 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import make_predictions_rust
-from shared import get_data
+import numpy as np
+from shared import load_columns, select_rows
 
 from service import get_min_max
 
@@ -35,33 +36,6 @@ def create_min_max_dict(min_max):
     }
 
 
-def get_players_with_names():
-    data, labels = get_data()
-
-    all_players = []
-    for index, row in data.iterrows():
-        if row["tims"] not in {0, 1, 2, 3}:
-            row["tims"] = 0.0
-
-        player = make_predictions_rust.PlayerInfo(
-            gpg=row["gpg"],
-            hgpg=row["hgpg"],
-            five_gpg=row["five_gpg"],
-            tgpg=row.get("tgpg", 0.0),
-            otga=row.get("otga", 0.0),
-            hppg=row["hppg"],
-            otshga=row.get("otshga", 0.0),
-            is_home=row.get("home", 0.0),
-            hppg_otshga=0.0,
-            scored=row.get("scored", 0.0),
-            tims=int(row.get("tims", 0.0)),
-            date=row["date"],
-        )
-        name = row["name"]
-        all_players.append((player, name))
-    return all_players
-
-
 def main():
     # Create Weights object
     weights = make_predictions_rust.Weights(
@@ -86,37 +60,33 @@ def main():
     # Total predictions: 639
     # Accuracy: 31.0%
 
-    # Get players with names
-    all_players_with_names = get_players_with_names()
+    # Players with scoring data, as columns with their names
+    columns = load_columns()
 
-    # Only include players on or after the start date
+    # Only include players on or after the start date, each distinct date is parsed once
     from datetime import datetime
 
     start_date = datetime.strptime("2025-10-07", "%Y-%m-%d")
-    filtered_players_with_names = [
-        (player, name)
-        for player, name in all_players_with_names
-        if player.scored in {0.0, 1.0} and datetime.strptime(player.date, "%Y-%m-%d") >= start_date
-    ]
+    in_season = np.array(
+        [datetime.strptime(date, "%Y-%m-%d") >= start_date for date in columns["date_labels"]], dtype=bool
+    )
+    players = select_rows(columns, np.isin(columns["scored"], [0.0, 1.0]) & in_season[columns["dates"]])
 
     # Create min_max object
     min_max = create_min_max_dict(get_min_max())
     min_max_obj = make_predictions_rust.MinMax(**min_max)
 
-    # Separate players and names
-    filtered_players = [player for player, name in filtered_players_with_names]
-
     # Get probabilities for all players at once
-    probabilities = make_predictions_rust.predict(filtered_players, min_max_obj, weights)
+    probabilities = make_predictions_rust.predict_array(players["features"], min_max_obj, weights)
 
     # Group players by date and tims group
     from collections import defaultdict
 
     date_tims_groups = defaultdict(lambda: defaultdict(list))
 
-    for (player, name), probability in zip(filtered_players_with_names, probabilities):
-        if player.tims in {1, 2, 3}:
-            date_tims_groups[player.date][player.tims].append((player, name, probability))
+    scored, tims, names = players["scored"], players["tims"], players["names"]
+    for i in np.flatnonzero(tims >= 1):
+        date_tims_groups[players["date_labels"][players["dates"][i]]][tims[i]].append((i, probabilities[i]))
 
     # Print header
     print(f"{'Date':<12} {'Name':<20} {'Probability':<12} {'Scored (T/F)':<12} {'Tims':<8}")
@@ -132,20 +102,20 @@ def main():
         for tims_group in [1, 2, 3]:
             if tims_group in tims_groups:
                 # Sort by probability descending and take the top one
-                top_player = max(tims_groups[tims_group], key=lambda x: x[2])
+                top_player = max(tims_groups[tims_group], key=lambda x: x[1])
                 selected_players.append(top_player)
 
         # Sort selected players by probability descending
-        selected_players.sort(key=lambda x: x[2], reverse=True)
+        selected_players.sort(key=lambda x: x[1], reverse=True)
 
-        for player, name, probability in selected_players:
-            scored_tf = "T" if player.scored == 1.0 else "F"
-            print(f"{date:<12} {name:<20} {probability:<12.2f} {scored_tf:<12} {player.tims:<8}")
-            all_selected_players.append((player, name, probability))
+        for i, probability in selected_players:
+            scored_tf = "T" if scored[i] == 1.0 else "F"
+            print(f"{date:<12} {names[i]:<20} {probability:<12.2f} {scored_tf:<12} {tims[i]:<8}")
+            all_selected_players.append((i, probability))
 
     # Calculate statistics
     total_picks = len(all_selected_players)
-    correct_picks = sum(1 for player, _, _ in all_selected_players if player.scored == 1.0)
+    correct_picks = sum(1 for i, _ in all_selected_players if scored[i] == 1.0)
     wrong_picks = total_picks - correct_picks
     correct_percentage = (correct_picks / total_picks * 100) if total_picks > 0 else 0
 
@@ -153,10 +123,10 @@ def main():
     from collections import defaultdict
 
     group_stats = defaultdict(lambda: {"total": 0, "correct": 0, "wrong": 0})
-    for player, _, _ in all_selected_players:
-        group = player.tims
+    for i, _ in all_selected_players:
+        group = int(tims[i])
         group_stats[group]["total"] += 1
-        if player.scored == 1.0:
+        if scored[i] == 1.0:
             group_stats[group]["correct"] += 1
         else:
             group_stats[group]["wrong"] += 1
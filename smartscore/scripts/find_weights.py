@@ -1,19 +1,14 @@
 import os
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import make_predictions_rust
-from shared import get_data
+from shared import load_columns, prune_batch, search_rows, select_rows
 
 from service import get_min_max  # noqa: E402
 
 
-def test_chunk(filtered_players, min_max_obj, weight_chunk):
-    return make_predictions_rust.test_weights(filtered_players, min_max_obj, weight_chunk)
-
-
 def create_min_max_dict(min_max):
     return {
         "min_gpg": min_max.get("gpg", {}).get("min"),
@@ -33,63 +28,31 @@ def create_min_max_dict(min_max):
     }
 
 
-def get_players():
-    data, labels = get_data()
-
-    all_players = []
-    for index, row in data.iterrows():
-        if row["tims"] not in {0, 1, 2, 3}:
-            row["tims"] = 0.0
-
-        all_players.append(
-            make_predictions_rust.PlayerInfo(
-                gpg=row["gpg"],
-                hgpg=row["hgpg"],
-                five_gpg=row["five_gpg"],
-                tgpg=row.get("tgpg", 0.0),
-                otga=row.get("otga", 0.0),
-                hppg=row["hppg"],
-                otshga=row.get("otshga", 0.0),
-                is_home=row.get("home", 0.0),
-                hppg_otshga=0.0,
-                scored=row.get("scored", 0.0),
-                tims=int(row.get("tims", 0.0)),
-                date=row["date"],
-            )
-        )
-    return all_players
+def call_rust_function(columns):
+    # Tims picks with scoring data, sorted by date so each date is one run of rows
+    picks = select_rows(columns, search_rows(columns))
 
-
-def call_rust_function(all_players):
-    # Filter players who have scoring data and were tims picks
-    filtered_players = [player for player in all_players if player.scored in {0.0, 1.0} and player.tims in {1, 2, 3}]
-
-    # Sort players by date to ensure proper grouping
-    filtered_players.sort(key=lambda p: p.date)
+    # Build the columnar batch once, the native search shares it without copying
+    player_batch = make_predictions_rust.PlayerBatch(
+        picks["features"], scored=picks["scored"], tims=picks["tims"], dates=picks["dates"]
+    )
 
     # Create min_max object
     min_max = create_min_max_dict(get_min_max())
     min_max_obj = make_predictions_rust.MinMax(**min_max)
 
-    # Generate all possible weight combinations using Rust implementation
-    print("Generating weight permutations...")
-    weight_combinations = make_predictions_rust.generate_weight_permutations(5)
-
-    # Split weights and test in parallel
-    logical_cores = os.cpu_count() or 4
-    print(f"Testing {len(weight_combinations) // logical_cores} weight combinations using {logical_cores} CPU cores...")
-    num_processes = min(logical_cores, len(weight_combinations))
-    weight_chunks = [weight_combinations[i::num_processes] for i in range(num_processes)]
+    # Players that can never be a group's pick are dropped before the search
+    player_batch, _ = prune_batch(player_batch, min_max_obj)
 
+    # Generate and test every weight combination natively, the search releases the GIL and uses every core.
+    # Combinations stop early once they cannot reach the best count, the result is unchanged
+    print(f"Searching weight combinations using {os.cpu_count()} CPU cores...")
     start_time_rust = time.time()
-    with ThreadPoolExecutor(max_workers=num_processes) as executor:
-        results = list(executor.map(lambda wc: test_chunk(filtered_players, min_max_obj, wc), weight_chunks))
+    best_weights, max_correct, total_predictions = make_predictions_rust.search_weights(
+        player_batch, min_max_obj, 5, early_exit=True
+    )
     rust_duration = time.time() - start_time_rust
 
-    # Find the best among results
-    best_result = max(results, key=lambda x: x[1])
-    best_weights, max_correct, total_predictions = best_result
-
     print(f"Rust function took {rust_duration:.2f} seconds")
     print(f"Best weights: {best_weights}")
     print(f"Max correct: {max_correct}")
@@ -100,5 +63,4 @@ def call_rust_function(all_players):
 
 
 if __name__ == "__main__":
-    all_players = get_players()
-    best_weights, max_correct = call_rust_function(all_players)
+    best_weights, max_correct = call_rust_function(load_columns())
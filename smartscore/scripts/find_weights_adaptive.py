@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Coarse-to-fine weight search.
+
+Weights live on the integer lattice of the target step: seven non-negative step counts that add up to
+``100 / target``. The whole lattice is scored at the coarse step, then only the neighborhoods of the
+top-K combinations are searched again with half the stride, until the stride is a single target step.
+A final polish pass walks the neighborhoods at the target step until the best count stops improving.
+
+    python find_weights_adaptive.py --target 0.5 --coarse 5 --top-k 10
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import make_predictions_rust
+from shared import create_min_max_dict, load_search_data
+
+from service import get_min_max  # noqa: E402
+
+MAX_POLISH_PASSES = 10
+
+
+class LatticeSearch:
+    """Scores lattice points with the Rust evaluator and remembers every count it has seen."""
+
+    def __init__(self, player_batch, min_max_obj, target_step):
+        self.player_batch = player_batch
+        self.min_max_obj = min_max_obj
+        self.total_units = round(100 / target_step)
+        # Same float32 arithmetic as the Rust generators: units * (step_size / 100)
+        self.step = np.float32(target_step) / np.float32(100)
+        self.scores = {}
+        self.total = 0
+
+    def evaluate(self, points):
+        """Score the points (N x 7 step counts) that have not been scored yet."""
+        points = np.unique(points, axis=0).tolist()
+        new = np.array([point for point in points if tuple(point) not in self.scores], dtype=np.int64)
+        if len(new) == 0:
+            return 0
+
+        weights = new.astype(np.float32) * self.step
+        correct, self.total = make_predictions_rust.evaluate_weight_array(
+            self.player_batch, self.min_max_obj, np.ascontiguousarray(weights)
+        )
+        self.scores.update(zip(map(tuple, new.tolist()), correct.tolist()))
+        return len(new)
+
+    def top(self, k):
+        # Ties go to the later combination in generator order, like the exhaustive search
+        ranked = sorted(self.scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return [np.array(point) for point, _ in ranked[:k]]
+
+    def neighborhood(self, center, stride, radius):
+        """Lattice points within `radius * stride` steps of `center` on each of the first six weights."""
+        offsets = np.array(list(itertools.product(range(-radius, radius + 1), repeat=6)), dtype=np.int64) * stride
+        free = center[:6] + offsets
+        last = self.total_units - free.sum(axis=1, keepdims=True)
+        points = np.hstack([free, last])
+        return points[(points >= 0).all(axis=1)]
+
+
+def coarse_points(coarse_step, total_units):
+    space = make_predictions_rust.WeightSpace(coarse_step)
+    generator = make_predictions_rust.WeightGenerator(coarse_step)
+    flat = np.array(generator.next_chunk(space.count), dtype=np.float32).reshape(-1, 7)
+    return np.rint(flat * total_units).astype(np.int64)
+
+
+def run(args):
+    if not (args.target > 0 and args.coarse >= args.target):
+        raise ValueError("Need 0 < target <= coarse")
+    stride = round(args.coarse / args.target)
+    total_units = round(100 / args.target)
+    if total_units % stride or abs(stride * args.target - args.coarse) > 1e-9:
+        raise ValueError(f"The coarse step {args.coarse} must be a multiple of the target {args.target} dividing 100")
+
+    min_max = create_min_max_dict(get_min_max())
+    arrays = load_search_data(min_max)
+    player_batch = make_predictions_rust.PlayerBatch(
+        arrays["features"], scored=arrays["scored"], tims=arrays["tims"], dates=arrays["dates"]
+    )
+    search = LatticeSearch(player_batch, make_predictions_rust.MinMax(**min_max), args.target)
+    start_time = time.time()
+
+    evaluated = search.evaluate(coarse_points(args.coarse, total_units))
+    print(f"Coarse {args.coarse}% grid: {evaluated} combinations")
+
+    # Halve the stride each level, searching around the current top-K
+    while stride > 1:
+        finer = stride // 2
+        radius = stride // finer
+        evaluated = sum(search.evaluate(search.neighborhood(point, finer, radius)) for point in search.top(args.top_k))
+        print(f"Stride {finer * args.target:g}%: {evaluated} new combinations")
+        stride = finer
+
+    best_correct = -1
+    for _ in range(MAX_POLISH_PASSES):
+        evaluated = sum(search.evaluate(search.neighborhood(point, 1, 1)) for point in search.top(args.top_k))
+        correct = search.scores[tuple(search.top(1)[0])]
+        print(f"Polish at {args.target:g}%: {evaluated} new combinations, best {correct}")
+        if evaluated == 0 or correct <= best_correct:
+            break
+        best_correct = correct
+
+    duration = time.time() - start_time
+    best_point = search.top(1)[0]
+    best_correct = search.scores[tuple(best_point)]
+    full_grid = make_predictions_rust.WeightSpace(args.target).count
+    labels = make_predictions_rust.WEIGHT_COLUMNS
+
+    print(f"\nEvaluated {len(search.scores)} of {full_grid} combinations on the full {args.target:g}% grid")
+    print(f"({len(search.scores) / full_grid:.4%}) in {duration:.2f} seconds")
+    print("\nBest weights:")
+    for label, units in zip(labels, best_point):
+        print(f"  {label}: {units * search.step:.3f}")
+    print(f"\nMax correct: {best_correct}")
+    print(f"Total predictions: {search.total}")
+    print(f"Accuracy: {best_correct / search.total:.1%}")
+
+    return best_point * search.step, best_correct
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", type=float, default=0.5, help="final step size in percent")
+    parser.add_argument("--coarse", type=float, default=5, help="step size of the first full grid, in percent")
+    parser.add_argument("--top-k", type=int, default=10, help="neighborhoods refined at each level")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    run(parse_args())
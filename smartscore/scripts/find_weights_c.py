@@ -3,10 +3,11 @@ import os
 import sys
 import time
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from shared import get_data
+import numpy as np
 
-from service import get_min_max  # noqa: E402
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import make_predictions_rust
+from shared import build_segment_index, load_search_data
 
 # Load the compiled C library
 lib_path = os.path.join(os.path.dirname(__file__), "..", "compiled_code.so")
@@ -41,7 +42,14 @@ class TestingPlayerInfo(ctypes.Structure):
         ("hppg_otshga", ctypes.c_float),
         ("scored", ctypes.c_float),
         ("tims", ctypes.c_float),
-        ("date", ctypes.c_char_p),
+    ]
+
+
+class SegmentIndex(ctypes.Structure):
+    _fields_ = [
+        ("group_offsets", ctypes.POINTER(ctypes.c_int)),
+        ("rows", ctypes.POINTER(ctypes.c_int)),
+        ("num_dates", ctypes.c_int),
     ]
 
 
@@ -76,15 +84,28 @@ class Weights(ctypes.Structure):
     ]
 
 
+class SearchResult(ctypes.Structure):
+    _fields_ = [
+        ("weights", Weights),
+        ("correct", ctypes.c_int),
+        ("total", ctypes.c_int),
+    ]
+
+
+# Players are handed to C as a NumPy structured array with the TestingPlayerInfo layout, no copies
+PLAYER_DTYPE = np.dtype(TestingPlayerInfo)
+STEP_SIZE = 2.5  # In percent
+LABELS = ["gpg", "five_gpg", "hgpg", "tgpg", "otga", "hppg_otshga", "is_home"]
+
 # Define function signatures
-c_lib.test_weights.argtypes = [
+c_lib.search_weights.argtypes = [
     ctypes.POINTER(TestingPlayerInfo),
     ctypes.c_int,
     MinMax,
-    ctypes.POINTER(ctypes.c_float),
-    ctypes.c_int,
+    SegmentIndex,
+    ctypes.c_float,
 ]
-c_lib.test_weights.restype = None
+c_lib.search_weights.restype = SearchResult
 
 
 def create_min_max_dict(min_max):
@@ -106,65 +127,67 @@ def create_min_max_dict(min_max):
     }
 
 
-def get_players():
-    data, labels = get_data()
-
-    all_players = []
-    for index, row in data.iterrows():
-        if row["tims"] not in {0, 1, 2, 3}:
-            row["tims"] = 0.0
-
-        all_players.append(
-            TestingPlayerInfo(
-                gpg=row["gpg"],
-                hgpg=row["hgpg"],
-                five_gpg=row["five_gpg"],
-                tgpg=row.get("tgpg", 0.0),
-                otga=row.get("otga", 0.0),
-                hppg=row["hppg"],
-                otshga=row.get("otshga", 0.0),
-                is_home=row.get("home", 0.0),
-                hppg_otshga=0.0,  # Will be calculated in C
-                scored=row.get("scored", 0.0),
-                tims=row.get("tims", 0.0),
-                date=row["date"].encode("utf-8"),  # Convert to bytes
-            )
-        )
-    return all_players
-
-
-def call_c_function(all_players):
-    # Filter players who have scoring data and were tims picks
-    filtered_players = [player for player in all_players if player.scored in {0.0, 1.0} and player.tims in {1, 2, 3}]
-
-    # Sort players by date to ensure proper grouping
-    filtered_players.sort(key=lambda p: p.date.decode("utf-8"))
-
-    # Create min_max object
-    min_max_dict = create_min_max_dict(get_min_max())
-    min_max = MinMax(**min_max_dict)
-
-    # Count unique dates with TIMS picks
-    unique_dates = set()
-    for player in filtered_players:
-        unique_dates.add(player.date.decode("utf-8"))
-    num_tims_dates = len(unique_dates)
+def to_player_array(arrays):
+    """Structured array in the TestingPlayerInfo layout, built column by column from the loaded data."""
+    players = np.zeros(len(arrays["scored"]), dtype=PLAYER_DTYPE)
+    for column, field in zip(arrays["features"].T, make_predictions_rust.FEATURE_COLUMNS):
+        players[field] = column
+    players["scored"] = arrays["scored"]
+    players["tims"] = arrays["tims"]
+    return players
+
+
+def search(arrays, min_max_dict, step_size=STEP_SIZE):
+    """Best weights over the step grid for players loaded by ``load_search_data``, as a SearchResult.
+
+    Raises:
+        RuntimeError: If the C search could not run, it reports that as a correct count of -1
+    """
+    players = to_player_array(arrays)
+
+    # Dates and Tims groups as offsets, the C loop never looks at a date string
+    index = build_segment_index(arrays["tims"], arrays["dates"])
+    segments = SegmentIndex(
+        group_offsets=index["group_offsets"].ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+        rows=index["rows"].ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+        num_dates=len(index["date_offsets"]) - 1,
+    )
+    result = c_lib.search_weights(
+        players.ctypes.data_as(ctypes.POINTER(TestingPlayerInfo)),
+        len(players),
+        MinMax(**min_max_dict),
+        segments,
+        step_size,
+    )
+    if result.correct < 0:
+        raise RuntimeError(f"C weight search failed at step {step_size}%, out of memory or the step is not in (0, 100]")
+    return result
+
+
+def call_c_function(step_size=STEP_SIZE):
+    from service import get_min_max
 
-    # Prepare arrays for C function
-    num_players = len(filtered_players)
-    players_array = (TestingPlayerInfo * num_players)(*filtered_players)
-    probabilities = (ctypes.c_float * num_players)()
+    min_max_dict = create_min_max_dict(get_min_max())
+    arrays = load_search_data(min_max_dict)
+    count = make_predictions_rust.WeightSpace(step_size).count
 
-    print("Testing weights using C implementation")
+    print(f"Testing {count} weight combinations using C implementation on {os.cpu_count()} CPU cores")
 
     # Call C function
     start_time_c = time.time()
-    c_lib.test_weights(players_array, num_players, min_max, probabilities, num_tims_dates)
+    result = search(arrays, min_max_dict, step_size)
     c_duration = time.time() - start_time_c
 
-    print(f"C function took {c_duration:.2f} seconds")
+    print(f"C function took {c_duration:.2f} seconds ({count / c_duration:,.0f} combinations per second)")
+    print("\nBest weights:")
+    for label in LABELS:
+        print(f"  {label}: {getattr(result.weights, label):.3f}")
+    print(f"\nMax correct: {result.correct}")
+    print(f"Total predictions: {result.total}")
+    print(f"Accuracy: {result.correct / result.total:.1%}")
+
+    return result
 
 
 if __name__ == "__main__":
-    all_players = get_players()
-    call_c_function(all_players)
+    call_c_function()
@@ -1,3 +1,5 @@
+import argparse
+import math
 import os
 import sys
 import time
@@ -7,21 +9,43 @@ import warp as wp
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import make_predictions_rust
-from shared import get_data
+from shared import build_segment_index, load_search_data, scoring_columns
 
-from service import get_min_max  # noqa: E402
-
-# Define the number of weights and step size (should match Rust logic)
-NUM_WEIGHTS = 7
+# Step size as a fraction, should match Rust logic
 STEP_SIZE = 0.01
-MAX_PLAYERS = 120000  # Maximum number of players to process
 CHUNK_SIZE = 150_000  # Number of weight combinations per batch
 LABELS = ["gpg", "five_gpg", "hgpg", "tgpg", "otga", "hppg_otshga", "is_home"]
 
 
-# Warp kernel to evaluate weights
+# Ranks fit in the low bits of a search key, the correct count sits above them. The largest key
+# is the best count with the latest rank, the same tie-break as the sequential search.
+RANK_BITS = 40
+RANK_LIMIT = wp.constant(wp.int64(1 << RANK_BITS))
+
+
+@wp.func
+def unrank_value(rank: wp.int64, budget: int, later: int, completions: wp.array2d(dtype=wp.int64)) -> int:
+    # Value of the next weight: skip whole blocks of combinations until `rank` falls inside one
+    remaining = wp.int64(rank)
+    value = int(0)
+    while remaining >= completions[budget - value, later]:
+        remaining = remaining - completions[budget - value, later]
+        value = value + 1
+    return value
+
+
+@wp.func
+def skipped_ranks(budget: int, value: int, later: int, completions: wp.array2d(dtype=wp.int64)) -> wp.int64:
+    # Ranks before the first combination with this weight at `value`
+    skipped = wp.int64(0)
+    for smaller in range(value):
+        skipped = skipped + completions[budget - smaller, later]
+    return skipped
+
+
+# Warp kernel that unranks its own weight combination from the thread index and reduces on the device
 @wp.kernel
-def evaluate_weights(
+def search_ranks(
     gpg: wp.array(dtype=wp.float32),
     hgpg: wp.array(dtype=wp.float32),
     five_gpg: wp.array(dtype=wp.float32),
@@ -30,99 +54,84 @@ def evaluate_weights(
     hppg_otshga: wp.array(dtype=wp.float32),
     is_home: wp.array(dtype=wp.float32),
     scored: wp.array(dtype=wp.float32),
-    tims: wp.array(dtype=wp.int32),
-    date: wp.array(dtype=wp.int32),
-    weights: wp.array(dtype=wp.float32),
-    num_players: int,
-    num_combinations: int,
-    best_scores: wp.array(dtype=wp.int32),
-    best_totals: wp.array(dtype=wp.int32),
+    group_offsets: wp.array(dtype=wp.int32),
+    rows: wp.array(dtype=wp.int32),
+    num_segments: int,
+    completions: wp.array2d(dtype=wp.int64),
+    num_steps: int,
+    step: wp.float32,
+    start_rank: wp.int64,
+    end_rank: wp.int64,
+    best_key: wp.array(dtype=wp.int64),
 ):
-    tid = wp.tid()
-    if tid >= num_combinations:
+    rank = start_rank + wp.int64(wp.tid())
+    if rank >= end_rank:
         return
-    # Each thread evaluates one weight combination
-    offset = tid * NUM_WEIGHTS
-    w0 = weights[offset + 0]
-    w1 = weights[offset + 1]
-    w2 = weights[offset + 2]
-    w3 = weights[offset + 3]
-    w4 = weights[offset + 4]
-    w5 = weights[offset + 5]
-    w6 = weights[offset + 6]
-    # Evaluate correctness: group by date, pick best per TIMS group (1,2,3) per date
-    correct = float(0.0)
-    total = float(0.0)
-    if num_players > 0:
-        current_date = date[0]
-        best_idx0 = float(-1.0)
-        best_idx1 = float(-1.0)
-        best_idx2 = float(-1.0)
-        best_prob0 = float(-1e20)
-        best_prob1 = float(-1e20)
-        best_prob2 = float(-1e20)
-        for i in range(num_players):
-            if date[i] != current_date:
-                # Process previous date
-                if best_idx0 != -1.0:
-                    if scored[int(best_idx0)] > 0.0:
-                        correct = correct + 1.0
-                    total = total + 1.0
-                if best_idx1 != -1.0:
-                    if scored[int(best_idx1)] > 0.0:
-                        correct = correct + 1.0
-                    total = total + 1.0
-                if best_idx2 != -1.0:
-                    if scored[int(best_idx2)] > 0.0:
-                        correct = correct + 1.0
-                    total = total + 1.0
-                # Reset for new date
-                best_idx0 = float(-1.0)
-                best_idx1 = float(-1.0)
-                best_idx2 = float(-1.0)
-                best_prob0 = float(-1e20)
-                best_prob1 = float(-1e20)
-                best_prob2 = float(-1e20)
-                current_date = date[i]
-            # Compute probability for this player
-            prob = (
-                gpg[i] * w0
-                + five_gpg[i] * w1
-                + hgpg[i] * w2
-                + tgpg[i] * w3
-                + otga[i] * w4
-                + hppg_otshga[i] * w5
-                + is_home[i] * w6
-            )
-            t = tims[i]
-            if t == 1:
-                if prob > best_prob0:
-                    best_prob0 = prob
-                    best_idx0 = float(i)
-            elif t == 2:
-                if prob > best_prob1:
-                    best_prob1 = prob
-                    best_idx1 = float(i)
-            elif t == 3:
-                if prob > best_prob2:
-                    best_prob2 = prob
-                    best_idx2 = float(i)
-        # Process the last date
-        if best_idx0 != -1.0:
-            if scored[int(best_idx0)] > 0.0:
-                correct = correct + 1.0
-            total = total + 1.0
-        if best_idx1 != -1.0:
-            if scored[int(best_idx1)] > 0.0:
-                correct = correct + 1.0
-            total = total + 1.0
-        if best_idx2 != -1.0:
-            if scored[int(best_idx2)] > 0.0:
-                correct = correct + 1.0
-            total = total + 1.0
-
-    best_scores[tid] = int(correct)
-    best_totals[tid] = int(total)
+
+    # Step counts of this rank in WeightGenerator order, is_home takes what is left
+    budget = num_steps
+    remaining = wp.int64(rank)
+    s0 = unrank_value(remaining, budget, 5, completions)
+    remaining = remaining - skipped_ranks(budget, s0, 5, completions)
+    budget = budget - s0
+    s1 = unrank_value(remaining, budget, 4, completions)
+    remaining = remaining - skipped_ranks(budget, s1, 4, completions)
+    budget = budget - s1
+    s2 = unrank_value(remaining, budget, 3, completions)
+    remaining = remaining - skipped_ranks(budget, s2, 3, completions)
+    budget = budget - s2
+    s3 = unrank_value(remaining, budget, 2, completions)
+    remaining = remaining - skipped_ranks(budget, s3, 2, completions)
+    budget = budget - s3
+    s4 = unrank_value(remaining, budget, 1, completions)
+    remaining = remaining - skipped_ranks(budget, s4, 1, completions)
+    budget = budget - s4
+    s5 = unrank_value(remaining, budget, 0, completions)
+    budget = budget - s5
+
+    w0 = float(s0) * step
+    w1 = float(s1) * step
+    w2 = float(s2) * step
+    w3 = float(s3) * step
+    w4 = float(s4) * step
+    w5 = float(s5) * step
+    w6 = float(budget) * step
+
+    correct = int(0)
+    for segment in range(num_segments):
+        start = group_offsets[segment]
+        end = group_offsets[segment + 1]
+        if end > start:
+            best_idx = int(-1)
+            best_prob = float(-1e20)
+            for k in range(start, end):
+                i = rows[k]
+                prob = (
+                    gpg[i] * w0
+                    + five_gpg[i] * w1
+                    + hgpg[i] * w2
+                    + tgpg[i] * w3
+                    + otga[i] * w4
+                    + hppg_otshga[i] * w5
+                    + is_home[i] * w6
+                )
+                if prob > best_prob:
+                    best_prob = prob
+                    best_idx = i
+            if best_idx != -1:
+                if scored[best_idx] > 0.0:
+                    correct = correct + 1
+
+    wp.atomic_max(best_key, 0, wp.int64(correct) * RANK_LIMIT + rank)
+
+
+def completions_table(num_steps):
+    """completions[budget, parts]: ways to give `parts` weights at most `budget` steps, C(budget + parts, parts)."""
+    table = np.zeros((num_steps + 1, 6), dtype=np.int64)
+    for budget in range(num_steps + 1):
+        for parts in range(6):
+            table[budget, parts] = math.comb(budget + parts, parts)
+    return table
 
 
 def create_min_max_dict(min_max):
@@ -144,73 +153,28 @@ def create_min_max_dict(min_max):
     }
 
 
-def get_players():
-    data, labels = get_data()
-    all_players = []
-    for index, row in data.iterrows():
-        if row["tims"] not in {0, 1, 2, 3}:
-            row["tims"] = 0.0
-        all_players.append(row)
-    return all_players
-
-
-def normalize_stats(players, min_max):
-    def norm(val, minv, maxv):
-        return (val - minv) / (maxv - minv) if maxv > minv else 0.0
-
-    for p in players:
-        p["gpg"] = norm(p["gpg"], min_max["min_gpg"], min_max["max_gpg"])
-        p["hgpg"] = norm(p["hgpg"], min_max["min_hgpg"], min_max["max_hgpg"])
-        p["five_gpg"] = norm(p["five_gpg"], min_max["min_five_gpg"], min_max["max_five_gpg"])
-        p["tgpg"] = norm(p.get("tgpg", 0.0), min_max["min_tgpg"], min_max["max_tgpg"])
-        p["otga"] = norm(p.get("otga", 0.0), min_max["min_otga"], min_max["max_otga"])
-        p["hppg"] = norm(p["hppg"], min_max["min_hppg"], min_max["max_hppg"])
-        p["otshga"] = norm(p.get("otshga", 0.0), min_max["min_otshga"], min_max["max_otshga"])
-        p["hppg_otshga"] = p["hppg"] * p["otshga"]
-
-
-def generate_weight_combinations(step=STEP_SIZE):
-    print("Generating weight permutations...")
-    start_time = time.time()
-    # weight_combinations = make_predictions_rust.generate_permutations(int(step * 100))
-    weight_combinations = make_predictions_rust.generate_permutations(int(step * 100))
-    print(f"Time to generate permutations: {time.time() - start_time:.2f} seconds")
-    print(f"Testing {len(weight_combinations) // 7} weight combinations")
-
-    # weight_combinations is now a flat list of floats, just reshape
-    start_time = time.time()
-    combos = np.array(weight_combinations, dtype=np.float32).reshape(-1, 7)
-    print(f"Time to convert to numpy array: {time.time() - start_time:.2f} seconds")
-    return combos
-
-
-def call_warp_function(all_players):
-    # ------------------------------
-    # Prepare player data (unchanged)
-    # ------------------------------
-    filtered = [p for p in all_players if p["scored"] in {0.0, 1.0} and p["tims"] in {1, 2, 3}]
-    filtered.sort(key=lambda p: p["date"])
-
-    min_max = create_min_max_dict(get_min_max())
-    normalize_stats(filtered, min_max)
-
-    num_players = len(filtered)
+def call_warp_function(arrays, min_max, device=None, step_size=STEP_SIZE):
+    """Search the step grid over players loaded by ``load_search_data``, sorted by date and pruned."""
+    space = make_predictions_rust.WeightSpace(step_size * 100)
+    num_steps = round(1 / step_size)
+    count = space.count
+    if count > 1 << RANK_BITS:
+        raise ValueError(
+            f"Step size {step_size} gives {count} combinations, more than the {1 << RANK_BITS} ranks a search key holds"
+        )
 
-    gpg = np.array([p["gpg"] for p in filtered], dtype=np.float32)
-    hgpg = np.array([p["hgpg"] for p in filtered], dtype=np.float32)
-    five_gpg = np.array([p["five_gpg"] for p in filtered], dtype=np.float32)
-    tgpg = np.array([p.get("tgpg", 0.0) for p in filtered], dtype=np.float32)
-    otga = np.array([p.get("otga", 0.0) for p in filtered], dtype=np.float32)
-    hppg_otshga = np.array([p["hppg_otshga"] for p in filtered], dtype=np.float32)
-    is_home = np.array([p.get("home", 0.0) for p in filtered], dtype=np.float32)
-    scored = np.array([p.get("scored", 0.0) for p in filtered], dtype=np.float32)
-    tims = np.array([int(p.get("tims", 0)) for p in filtered], dtype=np.int32)
-    date = np.array([int(str(p["date"]).replace("-", "")) for p in filtered], dtype=np.int32)
+    # Normalized with the same float32 arithmetic as the Rust and NumPy engines
+    columns = scoring_columns(arrays["features"], min_max)
+    gpg, five_gpg, hgpg, tgpg, otga, hppg_otshga, is_home = (np.ascontiguousarray(column) for column in columns.T)
+    scored = arrays["scored"]
+    # Dates and TIMS groups as offsets, built once here instead of compared in the kernel
+    segments = build_segment_index(arrays["tims"], arrays["dates"])
+    num_segments = len(segments["group_offsets"]) - 1
 
     # ------------------------------
     # Move static data to GPU ONCE
     # ------------------------------
-    device = wp.get_preferred_device()
+    device = device or wp.get_preferred_device()
 
     gpg_d = wp.array(gpg, dtype=wp.float32, device=device)
     hgpg_d = wp.array(hgpg, dtype=wp.float32, device=device)
@@ -220,36 +184,25 @@ def call_warp_function(all_players):
     hppg_otshga_d = wp.array(hppg_otshga, dtype=wp.float32, device=device)
     is_home_d = wp.array(is_home, dtype=wp.float32, device=device)
     scored_d = wp.array(scored, dtype=wp.float32, device=device)
-    tims_d = wp.array(tims, dtype=wp.int32, device=device)
-    date_d = wp.array(date, dtype=wp.int32, device=device)
+    group_offsets_d = wp.array(segments["group_offsets"], dtype=wp.int32, device=device)
+    rows_d = wp.array(segments["rows"], dtype=wp.int32, device=device)
 
     # ------------------------------
-    # Initialize Rust generator
+    # Weights are unranked on the device, only the best search key comes back
     # ------------------------------
-    gen = make_predictions_rust.WeightGenerator(int(STEP_SIZE * 100))
-
-    best_score = -1
-    best_weights = None
-    best_total = 0
+    completions_d = wp.array(completions_table(num_steps), dtype=wp.int64, device=device)
+    best_key_d = wp.full(1, -1, dtype=wp.int64, device=device)
+    # Same float32 step as the Rust generator
+    step = np.float32(step_size * 100) / np.float32(100)
 
     total_batches = 0
     start_all = time.time()
 
-    while True:
-        flat = gen.next_chunk(CHUNK_SIZE)
-        if not flat:
-            break
-
-        combos = np.array(flat, dtype=np.float32).reshape(-1, 7)
-        num_combos = combos.shape[0]
-
-        weights_d = wp.array(combos.flatten(), dtype=wp.float32, device=device)
-        best_scores_d = wp.zeros(num_combos, dtype=wp.int32, device=device)
-        best_totals_d = wp.zeros(num_combos, dtype=wp.int32, device=device)
-
+    for start_rank in range(0, count, CHUNK_SIZE):
+        end_rank = min(start_rank + CHUNK_SIZE, count)
         wp.launch(
-            kernel=evaluate_weights,
-            dim=num_combos,
+            kernel=search_ranks,
+            dim=end_rank - start_rank,
             inputs=[
                 gpg_d,
                 hgpg_d,
@@ -259,31 +212,26 @@ def call_warp_function(all_players):
                 hppg_otshga_d,
                 is_home_d,
                 scored_d,
-                tims_d,
-                date_d,
-                weights_d,
-                num_players,
-                num_combos,
-                best_scores_d,
-                best_totals_d,
+                group_offsets_d,
+                rows_d,
+                num_segments,
+                completions_d,
+                num_steps,
+                step,
+                start_rank,
+                end_rank,
+                best_key_d,
             ],
             device=device,
         )
-        wp.synchronize()
-
-        scores = best_scores_d.numpy()
-        totals = best_totals_d.numpy()
-        del weights_d, best_scores_d, best_totals_d
-        wp.synchronize()
-
-        idx = np.argmax(scores)
-        if scores[idx] > best_score:
-            best_score = scores[idx]
-            best_total = totals[idx]
-            best_weights = combos[idx].copy()
-
         total_batches += 1
 
+    best_key = int(best_key_d.numpy()[0])
+    best_score = best_key >> RANK_BITS
+    best_weights = space.weights_at(best_key & ((1 << RANK_BITS) - 1))
+    best_weights = [getattr(best_weights, label) for label in LABELS]
+    best_total = 3 * (len(segments["date_offsets"]) - 1)
+
     duration = time.time() - start_all
 
     print(f"\nProcessed {total_batches} batches")
@@ -301,5 +249,11 @@ def call_warp_function(all_players):
 
 
 if __name__ == "__main__":
-    all_players = get_players()
-    best_weights, max_correct = call_warp_function(all_players)
+    parser = argparse.ArgumentParser(description="Exhaustive weight search with NVIDIA Warp")
+    parser.add_argument("--device", help="Warp device, e.g. cuda:0 or cpu (default: the preferred device)")
+    args = parser.parse_args()
+
+    from service import get_min_max
+
+    min_max = create_min_max_dict(get_min_max())
+    best_weights, max_correct = call_warp_function(load_search_data(min_max), min_max, device=args.device)
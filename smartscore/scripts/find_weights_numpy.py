@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Weight search on the CPU with NumPy, for boxes without a GPU.
+
+Each chunk of K weight combinations is scored against every Tims pick at once as an (N x K) matrix.
+The pick of each (date, Tims group) segment is then found with ``np.maximum.reduceat`` over the segment
+offsets. Scores are summed in the same float32 order as the Rust evaluator and ties go to the first
+player, so the result matches ``make_predictions_rust.test_weights`` over the same combinations.
+
+    python find_weights_numpy.py --step 5 --memory-mb 512
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import make_predictions_rust
+from shared import build_segment_index, create_min_max_dict, load_search_data, scoring_columns
+
+# Bytes of scratch per (pick, combination) cell: scores, products, maxima, the max mask and positions
+BYTES_PER_CELL = 17
+
+
+class SegmentScorer:
+    """Correct counts for chunks of weight combinations, the Tims picks grouped into (date, group) segments."""
+
+    def __init__(self, arrays, min_max):
+        index = build_segment_index(arrays["tims"], arrays["dates"])
+        lengths = np.diff(index["group_offsets"])
+        # reduceat needs non-empty segments, an empty group has no pick to count anyway
+        self.starts = index["group_offsets"][:-1][lengths > 0]
+        self.lengths = lengths[lengths > 0]
+
+        rows = index["rows"]
+        self.columns = scoring_columns(arrays["features"][rows], min_max)
+        self.scored = arrays["scored"][rows] > 0
+        self.positions = np.arange(len(rows), dtype=np.int32)[:, None]
+        self.total = 3 * (len(index["date_offsets"]) - 1)
+
+    @property
+    def num_picks(self):
+        return len(self.columns)
+
+    def count_correct(self, weights):
+        """Correct picks for each row of a (K x 7) float32 weights array."""
+        if len(self.starts) == 0:
+            return np.zeros(len(weights), dtype=np.int64)
+
+        # Column by column, so every score is summed in the same order as the Rust kernels. A BLAS
+        # matmul would reorder the sum and could flip near-ties between players.
+        scores = np.multiply(self.columns[:, :1], weights[:, 0])
+        products = np.empty_like(scores)
+        for j in range(1, weights.shape[1]):
+            np.multiply(self.columns[:, j : j + 1], weights[:, j], out=products)
+            np.add(scores, products, out=scores)
+
+        # Like the Rust `prob > best` scan, a NaN score never beats the best so far, but a NaN first
+        # player is never beaten. Mapped to -inf and +inf, so the max of every segment is one of its scores.
+        nan = np.isnan(scores)
+        if nan.any():
+            np.copyto(scores, -np.inf, where=nan)
+            first_scores = scores[self.starts]
+            np.copyto(first_scores, np.inf, where=nan[self.starts])
+            scores[self.starts] = first_scores
+
+        # Each segment picks its first player with the highest score
+        maxima = np.maximum.reduceat(scores, self.starts, axis=0)
+        is_max = scores == np.repeat(maxima, self.lengths, axis=0)
+        first = np.minimum.reduceat(np.where(is_max, self.positions, self.num_picks), self.starts, axis=0)
+        # A segment without a max would leave num_picks, fall back to its first player like Rust
+        first = np.where(first < self.num_picks, first, self.starts[:, None])
+        return self.scored[first].sum(axis=0)
+
+
+def chunk_size(num_picks, memory_mb):
+    return max(1, memory_mb * 1024 * 1024 // (max(1, num_picks) * BYTES_PER_CELL))
+
+
+def search(scorer, step, memory_mb):
+    """Best (weights, correct) over the step grid. Ties keep the later combination, like the sequential search."""
+    generator = make_predictions_rust.WeightGenerator(step)
+    size = chunk_size(scorer.num_picks, memory_mb)
+
+    best_correct = -1
+    best_weights = None
+    while generator.remaining:
+        weights = np.array(generator.next_chunk(size), dtype=np.float32).reshape(-1, 7)
+        correct = scorer.count_correct(weights)
+        last_best = len(correct) - 1 - int(np.argmax(correct[::-1]))
+        if correct[last_best] >= best_correct:
+            best_correct = int(correct[last_best])
+            best_weights = weights[last_best]
+    return best_weights, best_correct
+
+
+def run(args):
+    from service import get_min_max
+
+    min_max = create_min_max_dict(get_min_max())
+    scorer = SegmentScorer(load_search_data(min_max), min_max)
+    count = make_predictions_rust.WeightSpace(args.step).count
+    size = chunk_size(scorer.num_picks, args.memory_mb)
+    print(f"Searching {count} weight combinations over {scorer.num_picks} Tims picks, {size} per chunk")
+
+    start_time = time.time()
+    best_weights, best_correct = search(scorer, args.step, args.memory_mb)
+    duration = time.time() - start_time
+
+    print(f"NumPy search took {duration:.2f} seconds ({count / duration:,.0f} combinations per second)")
+    print("\nBest weights:")
+    for label, value in zip(make_predictions_rust.WEIGHT_COLUMNS, best_weights):
+        print(f"  {label}: {value:.3f}")
+    print(f"\nMax correct: {best_correct}")
+    print(f"Total predictions: {scorer.total}")
+    print(f"Accuracy: {best_correct / scorer.total:.1%}")
+
+    return best_weights, best_correct
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--step", type=float, default=5, help="step size in percent")
+    parser.add_argument("--memory-mb", type=int, default=512, help="scratch memory per chunk")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    run(parse_args())
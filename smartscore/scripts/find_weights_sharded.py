@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Sharded, resumable weight search.
+
+The weight combinations for a step size are numbered 0..count-1 (see ``WeightSpace``) and split into
+``--shards`` contiguous rank ranges. Each shard writes a JSON checkpoint after every segment, so an
+interrupted run resumes where it stopped. Shards can be spread over boxes by running the same command
+with different ``--shard`` values and copying the checkpoint files into one directory before ``merge``.
+
+    python find_weights_sharded.py run --shards 16 --shard 0-7 --workers 2
+    python find_weights_sharded.py run --shards 16 --shard 8-15    # on a second box
+    python find_weights_sharded.py merge
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import make_predictions_rust
+from shared import PATH, create_min_max_dict, load_search_data
+
+from service import get_min_max  # noqa: E402
+
+CHECKPOINT_DIR = os.path.join(PATH, "weight_search")
+SEGMENT_SIZE = 5_000_000  # Ranks searched between checkpoints
+LABELS = ["gpg", "five_gpg", "hgpg", "tgpg", "otga", "hppg_otshga", "is_home"]
+
+# Set in each worker process by init_worker
+worker_batch = None
+worker_min_max = None
+
+
+def data_fingerprint(arrays, min_max):
+    """Checkpoints are only resumed or merged against the exact same players and min/max values."""
+    digest = hashlib.sha256(json.dumps(min_max, sort_keys=True).encode("utf-8"))
+    for name in sorted(arrays):
+        digest.update(arrays[name].tobytes())
+    return digest.hexdigest()[:16]
+
+
+def shard_range(count, num_shards, shard):
+    return count * shard // num_shards, count * (shard + 1) // num_shards
+
+
+def parse_shards(spec, num_shards):
+    shards = set()
+    for part in spec.split(","):
+        first, _, last = part.partition("-")
+        shards.update(range(int(first), int(last or first) + 1))
+    if not shards or min(shards) < 0 or max(shards) >= num_shards:
+        raise ValueError(f"Shards {spec} are outside 0-{num_shards - 1}")
+    return sorted(shards)
+
+
+def checkpoint_path(checkpoint_dir, shard, num_shards):
+    return os.path.join(checkpoint_dir, f"shard-{shard:04d}-of-{num_shards:04d}.json")
+
+
+def read_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, checkpoint):
+    # Write then rename, so a crash mid-write never leaves a truncated checkpoint behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def keep_later(best, candidate):
+    """Same tie-break as the sequential search: a later rank with an equal count wins."""
+    if candidate is None:
+        return best
+    if best is None or (candidate["correct"], candidate["rank"]) >= (best["correct"], best["rank"]):
+        return candidate
+    return best
+
+
+def init_worker(arrays, min_max, rayon_threads):
+    global worker_batch, worker_min_max  # noqa: PLW0603
+
+    # Must be set before the first native call starts rayon's thread pool
+    os.environ.setdefault("RAYON_NUM_THREADS", str(rayon_threads))
+    worker_batch = make_predictions_rust.PlayerBatch(
+        arrays["features"], scored=arrays["scored"], tims=arrays["tims"], dates=arrays["dates"]
+    )
+    worker_min_max = make_predictions_rust.MinMax(**min_max)
+
+
+def run_shard(shard, num_shards, step_size, checkpoint_dir, fingerprint):
+    space = make_predictions_rust.WeightSpace(step_size)
+    start, end = shard_range(space.count, num_shards, shard)
+    path = checkpoint_path(checkpoint_dir, shard, num_shards)
+
+    checkpoint = read_checkpoint(path)
+    expected = {"step_size": step_size, "num_shards": num_shards, "shard": shard, "start": start, "end": end}
+    if checkpoint is None:
+        checkpoint = {**expected, "data": fingerprint, "next_rank": start, "best": None}
+    elif {key: checkpoint.get(key) for key in expected} != expected or checkpoint.get("data") != fingerprint:
+        raise ValueError(f"{path} belongs to a different search, move it away or use another --checkpoint-dir")
+
+    while checkpoint["next_rank"] < end:
+        segment_start = checkpoint["next_rank"]
+        segment_end = min(segment_start + SEGMENT_SIZE, end)
+        # Segments only need to beat (or tie) what this shard already found, weaker combinations stop early
+        best_known = checkpoint["best"]["correct"] if checkpoint["best"] else 0
+        weights, correct, total = make_predictions_rust.search_weights(
+            worker_batch,
+            worker_min_max,
+            step_size,
+            start=segment_start,
+            end=segment_end,
+            early_exit=True,
+            best_known=best_known,
+        )
+        if correct >= 0:
+            candidate = {
+                "rank": space.rank_of(weights),
+                "correct": correct,
+                "total": total,
+                "weights": {label: getattr(weights, label) for label in LABELS},
+            }
+            checkpoint["best"] = keep_later(checkpoint["best"], candidate)
+        checkpoint["next_rank"] = segment_end
+        write_checkpoint(path, checkpoint)
+        print(f"Shard {shard}: {segment_end - start}/{end - start} ranks done", flush=True)
+
+    return checkpoint
+
+
+def run(args):
+    step_size = args.step
+    shards = parse_shards(args.shard or f"0-{args.shards - 1}", args.shards)
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+
+    min_max = create_min_max_dict(get_min_max())
+    arrays = load_search_data(min_max)
+    fingerprint = data_fingerprint(arrays, min_max)
+
+    workers = max(1, min(args.workers, len(shards)))
+    rayon_threads = max(1, (os.cpu_count() or 1) // workers)
+    space = make_predictions_rust.WeightSpace(step_size)
+    print(f"Searching {len(shards)} of {args.shards} shards ({space.count} combinations in total)")
+    print(f"Using {workers} processes with {rayon_threads} threads each, checkpoints in {args.checkpoint_dir}")
+
+    start_time = time.time()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(arrays, min_max, rayon_threads)
+    ) as executor:
+        futures = [
+            executor.submit(run_shard, shard, args.shards, step_size, args.checkpoint_dir, fingerprint)
+            for shard in shards
+        ]
+        for future in futures:
+            future.result()
+    print(f"Shards finished in {time.time() - start_time:.2f} seconds")
+
+    merge(args)
+
+
+def merge(args):
+    paths = sorted(
+        os.path.join(args.checkpoint_dir, name)
+        for name in os.listdir(args.checkpoint_dir)
+        if name.startswith("shard-") and name.endswith(".json")
+    )
+    checkpoints = [read_checkpoint(path) for path in paths]
+    if not checkpoints:
+        print(f"No checkpoints found in {args.checkpoint_dir}")
+        return None
+
+    first = checkpoints[0]
+    if any(
+        (c["step_size"], c["num_shards"], c["data"]) != (first["step_size"], first["num_shards"], first["data"])
+        for c in checkpoints
+    ):
+        raise ValueError("Checkpoints come from different searches, merge them separately")
+
+    done = {c["shard"] for c in checkpoints if c["next_rank"] >= c["end"]}
+    missing = sorted(set(range(first["num_shards"])) - done)
+    if missing:
+        print(f"Warning: {len(missing)} of {first['num_shards']} shards are incomplete or missing: {missing}")
+
+    best = None
+    for checkpoint in checkpoints:
+        best = keep_later(best, checkpoint["best"])
+    if best is None:
+        print("No weights searched yet")
+        return None
+
+    print("\nBest weights:")
+    for label, value in best["weights"].items():
+        print(f"  {label}: {value:.3f}")
+    print(f"\nMax correct: {best['correct']}")
+    print(f"Total predictions: {best['total']}")
+    print(f"Accuracy: {best['correct'] / best['total']:.1%}")
+    return best
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="search shards, resuming from existing checkpoints")
+    run_parser.add_argument("--step", type=float, default=1, help="step size in percent")
+    run_parser.add_argument("--shards", type=int, default=64, help="total number of shards in the search")
+    run_parser.add_argument("--shard", help="shards to run on this box, e.g. 0-7 or 1,3,5 (default: all)")
+    run_parser.add_argument("--workers", type=int, default=1, help="local processes, threads are split between them")
+    run_parser.set_defaults(func=run)
+
+    merge_parser = subparsers.add_parser("merge", help="combine the checkpoints into the overall best")
+    merge_parser.set_defaults(func=merge)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    args.func(args)
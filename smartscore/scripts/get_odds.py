@@ -14,7 +14,6 @@ import json
 import os
 import secrets
 import sys
-import time
 from collections import defaultdict
 from datetime import datetime
 
@@ -24,7 +23,9 @@ from unidecode import unidecode
 
 sys.path.append("../smartscore")
 
+import http_client  # noqa: E402
 from constants import DRAFTKINGS_GOAL_SCORER_CATEGORY, DRAFTKINGS_NHL_ID, DRAFTKINGS_PROVIDER_ID  # noqa: E402
+from http_client import RetriesExhausted, RetryPolicy  # noqa: E402
 from utility import adjust_name, get_today_db  # noqa: E402
 
 logger = Logger()
@@ -57,27 +58,21 @@ def link_odds(players, player_infos):
 
 def fetch_draftkings_data(url, user_agents, retries=3, delay=1):
     """Fetch data from DraftKings API with retry logic."""
-    for attempt in range(retries):
-        try:
-            headers = {
-                "User-Agent": secrets.choice(user_agents),
-                "Accept": "application/json, text/html",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Referer": "https://www.google.com",
-                "Connection": "keep-alive",
-            }
-            logger.info("Making request to DraftKings")
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            return response.json()
-        except (requests.Timeout, requests.ConnectionError) as e:
-            logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay} seconds...")
-            time.sleep(delay)
-        except requests.RequestException as e:
-            logger.error(f"Failed to retrieve data: {e}")
-            break
-
-    logger.error("Max retries reached. Could not gather odds.")
+    headers = {
+        "User-Agent": secrets.choice(user_agents),
+        "Accept": "application/json, text/html",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Referer": "https://www.google.com",
+    }
+    policy = RetryPolicy(max_retries=retries, base_delay=delay)
+    try:
+        logger.info("Making request to DraftKings")
+        return http_client.request("get", url, policy=policy, headers=headers, timeout=15).json()
+    except RetriesExhausted as e:
+        logger.error(f"Max retries reached. Could not gather odds: {e}")
+    except requests.RequestException as e:
+        logger.error(f"Failed to retrieve data: {e}")
+
     return None
 
 
@@ -3,9 +3,9 @@ import sys
 import time
 from collections import defaultdict
 
-import requests
-
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import http_client  # noqa: E402
+from http_client import RetryPolicy  # noqa: E402
 from service import get_date  # noqa: E402
 
 # ANSI escape code for green text
@@ -22,6 +22,9 @@ goal_scorers = {}
 recent_scorers = {}
 SCORER_HIGHLIGHT_TIME = 30  # Time in seconds to keep a scorer highlighted
 
+# Short waits, the next refresh is never far away
+LIVE_RETRY_POLICY = RetryPolicy(max_retries=3, base_delay=0.5, max_delay=SLEEP_TIME)
+
 # create from get_odds get_names function, can't be generated dynamically as games will have started
 WATCHLIST = {
     "Toronto": ["Auston Matthews"],
@@ -35,7 +38,7 @@ def clear_terminal():
 
 def get_goal_scorers(game_id):
     URL = f"https://api-web.nhle.com/v1/wsc/game-story/{game_id}"
-    response = requests.get(URL, timeout=10).json()
+    response = http_client.request("get", URL, policy=LIVE_RETRY_POLICY).json()
 
     cur_goal_scorers = {}
     for scoring_play in response.get("summary", {}).get("scoring", []):
@@ -99,7 +102,7 @@ def get_scoreboard():
     games = {}
 
     URL = "https://api-web.nhle.com/v1/scoreboard/now"
-    response = requests.get(URL, timeout=10).json()
+    response = http_client.request("get", URL, policy=LIVE_RETRY_POLICY).json()
     today = get_date()
 
     for day in response.get("gamesByDate", []):
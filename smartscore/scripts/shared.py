@@ -1,29 +1,47 @@
 import base64
+import codecs
 import csv
+import datetime
 import gzip
+import hashlib
 import json
 import os
+import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+import make_predictions_rust
+import numpy as np
 import pandas as pd
 
 PATH = "smartscore\\lib"
 DATA_PATH = f"{PATH}\\data.csv"
+# Parsed columns of DATA_PATH as .npy files, one directory per CSV hash, see load_columns
+COLUMN_CACHE_PATH = f"{PATH}\\columns"
+
+# NHL API responses kept between runs, see use_http_cache
+HTTP_CACHE_PATH = f"{PATH}\\http_cache"
+
+# Base64 characters decoded per step of a streamed payload, a multiple of 4 so every slice decodes alone
+DECODE_CHUNK = 1 << 20
+# GET_DATE requests in flight during a sync
+SYNC_WORKERS = 8
 
 # FEATURES = ["gpg", "hgpg", "five_gpg", "tgpg", "otga"]
 FEATURES = ["gpg", "hgpg", "five_gpg", "tgpg", "otga", "hppg", "otshga", "home"]
 
 
-def invoke_lambda(function_name, payload, wait=True):
+def lambda_arn(function_name):
     sts_client = boto3.client("sts")
-    lambda_client = boto3.client("lambda")
-
     session = boto3.session.Session()
     region = session.region_name
     account_id = sts_client.get_caller_identity()["Account"]
-    invocation_type = "RequestResponse" if wait else "Event"
+    return f"arn:aws:lambda:{region}:{account_id}:function:{function_name}"
+
 
-    function_arn = f"arn:aws:lambda:{region}:{account_id}:function:{function_name}"
+def invoke_function(lambda_client, function_arn, payload, wait=True):
+    invocation_type = "RequestResponse" if wait else "Event"
     response = lambda_client.invoke(
         FunctionName=function_arn, InvocationType=invocation_type, Payload=json.dumps(payload)
     )
@@ -31,6 +49,18 @@ def invoke_lambda(function_name, payload, wait=True):
     return response_payload
 
 
+def invoke_lambda(function_name, payload, wait=True):
+    return invoke_function(boto3.client("lambda"), lambda_arn(function_name), payload, wait)
+
+
+def use_http_cache(path=HTTP_CACHE_PATH):
+    """Keep the NHL API responses that can no longer change in ``path`` between runs, see ``response_cache``."""
+    # Imported here, response_cache reads config and scripts that never fetch from the NHL API skip it
+    import response_cache
+
+    response_cache.use_file_backend(path)
+
+
 def unpack_response(body):
     compressed_data = base64.b64decode(body)
     decompressed_data = gzip.decompress(compressed_data).decode("utf-8")
@@ -39,36 +69,213 @@ def unpack_response(body):
     return original_data
 
 
+def iter_payload_text(body):
+    """Text of a base64 encoded gzip payload, decoded and decompressed one chunk at a time.
+
+    Only the compressed payload and one chunk of output are held at once, never the whole JSON document.
+    """
+    # wbits=31 reads the gzip header and trailer, like gzip.decompress
+    decompressor = zlib.decompressobj(wbits=31)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for start in range(0, len(body), DECODE_CHUNK):
+        yield decoder.decode(decompressor.decompress(base64.b64decode(body[start : start + DECODE_CHUNK])))
+    yield decoder.decode(decompressor.flush(), final=True)
+
+
+def iter_json_array(chunks):
+    """Items of a JSON array whose text arrives in ``chunks``, parsed as soon as each one is complete.
+
+    An item only counts as complete once the ``,`` or ``]`` after it has arrived, so a number cut by a chunk
+    boundary (``186.`` then ``99``) is parsed again in full instead of yielded early.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    opened = False
+    for chunk in chunks:
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or (opened and buffer[position] == ",")):
+                position += 1
+            if position == len(buffer):
+                break
+            if not opened:
+                if buffer[position] != "[":
+                    raise ValueError(f"Expected a JSON array, found {buffer[position]!r}")
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # The item continues in the next chunk
+            following = end
+            while following < len(buffer) and buffer[following].isspace():
+                following += 1
+            if following == len(buffer) or buffer[following] not in ",]":
+                break  # A number could still go on, parse it again with what follows
+            yield item
+            position = end
+        buffer = buffer[position:]
+    raise ValueError("JSON array ended before its closing bracket")
+
+
+def iter_entries(body):
+    """Rows of a GET_ALL ``entries`` payload, one at a time, see ``iter_payload_text``."""
+    return iter_json_array(iter_payload_text(body))
+
+
 def create_csv():
     response = invoke_lambda("Api-prod", {"method": "GET_ALL"})
-    data = unpack_response(response.get("entries"))
-
-    # Get the fields from the last entry (which should have all fields), set missing fields to None
-    all_fields = data[-1].keys()
-    for entry in data:
-        for field in all_fields:
-            entry.setdefault(field, None)
+    body = response.get("entries")
 
+    # Rows are written as they stream in, with their fields in the order they were first seen. The header
+    # is only known once the stream ends, so the rows go to a scratch file and are put after it then.
+    # Missing fields are written empty, like None.
     os.makedirs(PATH, exist_ok=True)
-    with open(DATA_PATH, "w+", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=all_fields)
-        writer.writeheader()
-        writer.writerows(data)
+    rows_path = f"{DATA_PATH}.{os.getpid()}.rows.tmp"
+    tmp_path = f"{DATA_PATH}.{os.getpid()}.tmp"
+    fields = {}
+    num_rows = 0
+    padded = False
+    try:
+        with open(rows_path, "w", newline="", encoding="utf-8") as rows_file:
+            writer = csv.writer(rows_file)
+            for entry in iter_entries(body):
+                if any(field not in fields for field in entry):
+                    # Rows already written are short of the new fields
+                    padded = padded or num_rows > 0
+                    fields.update(dict.fromkeys(entry))
+                writer.writerow([entry.get(field) for field in fields])
+                num_rows += 1
 
+        with (
+            open(tmp_path, "w", newline="", encoding="utf-8") as f,
+            open(rows_path, newline="", encoding="utf-8") as rows_file,
+        ):
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            if padded:
+                writer.writerows(row + [""] * (len(fields) - len(row)) for row in csv.reader(rows_file))
+            else:
+                shutil.copyfileobj(rows_file, f)
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        if os.path.exists(rows_path):
+            os.remove(rows_path)
+    os.replace(tmp_path, DATA_PATH)
 
-def get_data():
+
+def local_sync_state(path=DATA_PATH):
+    """Newest date in the local CSV, and the dates that still have rows without a result."""
+    dates = pd.read_csv(path, usecols=["date", "scored"], dtype=str, encoding="utf-8")
+    dates = dates.dropna(subset=["date"])
+    if dates.empty:
+        return None, set()
+    unscored = set(dates.loc[dates["scored"].isna() | (dates["scored"] == "None"), "date"])
+    return dates["date"].max(), unscored
+
+
+def dates_to_sync(newest, unscored, today=None):
+    """Every day from the newest local date to today, which may have new rows, plus the unscored dates."""
+    today = today or datetime.date.today()
+    day = datetime.date.fromisoformat(newest)
+    dates = set(unscored)
+    while day <= today:
+        dates.add(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return sorted(dates)
+
+
+def fetch_dates(dates, function_name="Api-prod"):
+    """Rows of each date from GET_DATE, fetched concurrently over one Lambda client."""
+    lambda_client = boto3.client("lambda")
+    function_arn = lambda_arn(function_name)
+
+    def fetch(date):
+        response = invoke_function(lambda_client, function_arn, {"method": "GET_DATE", "date": date})
+        rows = json.loads(response.get("body", "[]"))
+        for row in rows:
+            row.setdefault("date", date)
+        return rows
+
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+        return dict(zip(dates, pool.map(fetch, dates)))
+
+
+def merge_dates(rows_by_date, path=DATA_PATH):
+    """Replace the rows of every date in ``rows_by_date`` and append the new dates, as one atomic rewrite.
+
+    The merged CSV is written next to ``path`` and renamed over it, so a crash or a concurrent reader
+    never sees a half-written file. Columns the API added since the last full download are appended.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(path, newline="", encoding="utf-8") as src:
+        reader = csv.DictReader(src)
+        fieldnames = list(reader.fieldnames)
+        for rows in rows_by_date.values():
+            for row in rows:
+                fieldnames.extend(field for field in row if field not in fieldnames)
+
+        with open(tmp_path, "w", newline="", encoding="utf-8") as dst:
+            writer = csv.DictWriter(dst, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(row for row in reader if row["date"] not in rows_by_date)
+            for date in sorted(rows_by_date):
+                writer.writerows(rows_by_date[date])
+            dst.flush()
+            os.fsync(dst.fileno())
+    os.replace(tmp_path, path)
+
+
+def sync_csv(path=DATA_PATH):
+    """Bring the local CSV up to date with GET_DATE requests for the days it is missing.
+
+    Only the days after the newest local date and the dates whose results were still unknown are
+    requested, so a refresh costs a handful of small requests instead of the whole history.
+    """
+    newest, unscored = local_sync_state(path)
+    if newest is None:
+        create_csv()
+        return
+
+    dates = dates_to_sync(newest, unscored)
+    print(f"Syncing {len(dates)} dates from {dates[0]}")
+    # A date that comes back empty keeps its local rows
+    rows_by_date = {date: rows for date, rows in fetch_dates(dates).items() if rows}
+    if not rows_by_date:
+        print("Local data is up to date")
+        return
+
+    merge_dates(rows_by_date, path)
+    print(f"Updated {sum(len(rows) for rows in rows_by_date.values())} rows over {len(rows_by_date)} dates")
+
+
+def ask_download():
     # Comment this to skip ask about downloading data each time
-    print("Do you want to download the data from the database? (y/n)")
+    print("Do you want to download the data from the database? (y = new rows only / f = full download / n)")
     choice = input().split()[0].lower()
-    if choice == "y":
+    if choice == "y" and os.path.exists(DATA_PATH):
+        sync_csv()
+    elif choice in ("y", "f"):
         create_csv()
 
+
+def read_data():
     data = pd.read_csv(DATA_PATH, encoding="utf-8", low_memory=False)
 
     # Clean the data
     for col in [col for col in data.columns if col not in ["date", "name"]]:
         data[col] = pd.to_numeric(data[col], errors="coerce")
-    data = data.dropna(subset=FEATURES + ["scored"])
+    return data.dropna(subset=FEATURES + ["scored"])
+
+
+def get_data():
+    ask_download()
+    data = read_data()
     labels = data["scored"].astype(int)
 
     # Display info about the data
@@ -77,3 +284,222 @@ def get_data():
     print(f"Ratio of goal scorers: {labels.mean():.2f}\n")
 
     return data, labels
+
+
+def encode_dates(dates):
+    """Dictionary-encode date strings to int32 day numbers, ISO dates keep their order."""
+    return np.unique(np.asarray(dates), return_inverse=True)[1].astype(np.int32).reshape(-1)
+
+
+def build_segment_index(tims, dates):
+    """CSR offsets of the dates and (date, Tims group) segments of players sorted by date.
+
+    Same layout as the Rust ``SegmentIndex``: the rows of date ``d`` are
+    ``date_offsets[d]:date_offsets[d + 1]``, and the Tims picks of group ``g`` (1-3) on date ``d`` are
+    ``rows[group_offsets[3 * d + g - 1]:group_offsets[3 * d + g]]``, in their original order.
+    """
+    tims = np.asarray(tims, dtype=np.int32)
+    dates = np.asarray(dates)
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]]) if len(dates) else np.empty(0, dtype=np.int64)
+    date_offsets = np.r_[starts, len(dates)]
+
+    date_of_row = np.repeat(np.arange(len(starts)), np.diff(date_offsets))
+    picks = np.flatnonzero((tims >= 1) & (tims <= 3))
+    segment = date_of_row[picks] * 3 + tims[picks] - 1
+    counts = np.bincount(segment, minlength=3 * len(starts))
+
+    return {
+        "date_offsets": date_offsets.astype(np.int32),
+        "group_offsets": np.r_[0, np.cumsum(counts)].astype(np.int32),
+        "rows": picks[np.argsort(segment, kind="stable")].astype(np.int32),
+    }
+
+
+def prune_dominated(features, tims, dates, min_max_obj):
+    """Indices of the players that can still be picked for their date and Tims group.
+
+    Features are in ``FEATURES`` order and the players must already be sorted by date. Players that
+    an earlier groupmate matches or beats on every normalized feature can never be picked with
+    non-negative weights, so dropping them leaves the search results unchanged.
+    """
+    batch = make_predictions_rust.PlayerBatch(
+        np.asarray(features, dtype=np.float32).reshape(-1, len(FEATURES)),
+        tims=np.asarray(tims, dtype=np.int32),
+        dates=encode_dates(dates),
+    )
+    _, kept = prune_batch(batch, min_max_obj)
+    return kept
+
+
+def prune_batch(batch, min_max_obj):
+    """``PlayerBatch.prune`` with a report of how many rows it dropped, returns ``(pruned_batch, kept)``."""
+    pruned, kept = batch.prune(min_max_obj)
+
+    reduction = 1 - len(kept) / len(batch) if len(batch) else 0.0
+    print(f"Pruned dominated players: kept {len(kept)} of {len(batch)} ({reduction:.1%} fewer rows per weight)")
+    return pruned, kept
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def frame_columns(data):
+    """Typed column arrays of a cleaned frame from ``read_data``, see ``load_columns``."""
+    tims = data["tims"].to_numpy(dtype=np.float64)
+    date_labels, dates = np.unique(data["date"].to_numpy(dtype=str), return_inverse=True)
+
+    return {
+        "features": np.ascontiguousarray(data[FEATURES].to_numpy(dtype=np.float32)),
+        "scored": data["scored"].to_numpy(dtype=np.float32),
+        "tims": np.where(np.isin(tims, [0, 1, 2, 3]), tims, 0).astype(np.int32),
+        "dates": dates.astype(np.int32).reshape(-1),
+        "date_labels": date_labels,
+        "names": data["name"].to_numpy(dtype=str),
+    }
+
+
+def write_json(path, value):
+    # Write then rename, readers never see a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_column_cache(csv_path=DATA_PATH, cache_path=COLUMN_CACHE_PATH):
+    """Cached columns of ``csv_path`` as read-only memory maps, or None when the cache is missing or stale.
+
+    A matching size and mtime is trusted as is. When only the mtime moved (e.g. the same data was
+    downloaded again) the CSV is hashed, and an unchanged hash keeps the cache.
+    """
+    try:
+        with open(os.path.join(cache_path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    stat = os.stat(csv_path)
+    if stat.st_size != manifest["size"]:
+        return None
+    if stat.st_mtime_ns != manifest["mtime_ns"]:
+        if file_sha256(csv_path) != manifest["sha256"]:
+            return None
+        write_json(os.path.join(cache_path, "manifest.json"), dict(manifest, mtime_ns=stat.st_mtime_ns))
+
+    directory = os.path.join(cache_path, manifest["sha256"])
+    try:
+        return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in manifest["columns"]}
+    except FileNotFoundError:
+        return None
+
+
+def write_column_cache(columns, sha256, stat, cache_path=COLUMN_CACHE_PATH):
+    """Save ``columns`` as the cache of the CSV with hash ``sha256`` and ``os.stat`` result ``stat``.
+
+    Each CSV hash gets its own directory, moved into place once complete, so processes still mapping
+    an older cache keep reading consistent files while a new one is written.
+    """
+    directory = os.path.join(cache_path, sha256)
+    if not os.path.isdir(directory):
+        tmp_directory = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(tmp_directory, exist_ok=True)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_directory, f"{name}.npy"), values)
+        try:
+            os.replace(tmp_directory, directory)
+        except OSError:
+            # Another process finished the same cache first
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+
+    write_json(
+        os.path.join(cache_path, "manifest.json"),
+        {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256, "columns": sorted(columns)},
+    )
+    # Older caches are dropped where nothing holds them open
+    for entry in os.listdir(cache_path):
+        if entry != sha256 and os.path.isdir(os.path.join(cache_path, entry)):
+            shutil.rmtree(os.path.join(cache_path, entry), ignore_errors=True)
+
+
+def load_columns():
+    """Every player of the dataset as typed column arrays.
+
+    ``features`` is (N x 8) float32 in ``FEATURES`` order (the Rust ``FEATURE_COLUMNS``), ``scored`` is
+    float32, ``tims`` is int32 with anything outside 0-3 set to 0, ``dates`` are int32 codes into the
+    sorted ``date_labels`` and ``names`` are the player names. Rows missing a feature or ``scored``
+    are dropped.
+
+    The first load parses the CSV and writes the columns to ``COLUMN_CACHE_PATH``. Later loads
+    memory-map that cache read-only, so worker processes share one copy of the pages.
+    """
+    ask_download()
+
+    columns = read_column_cache()
+    if columns is not None:
+        print(f"Loaded {len(columns['scored'])} players from the column cache")
+        return columns
+
+    stat = os.stat(DATA_PATH)
+    sha256 = file_sha256(DATA_PATH)
+    columns = frame_columns(read_data())
+    write_column_cache(columns, sha256, stat)
+    print(f"Parsed {len(columns['scored'])} players from {DATA_PATH}, cached in {COLUMN_CACHE_PATH}")
+    return columns
+
+
+def select_rows(columns, rows):
+    """The rows ``rows`` (indices or a mask) of every per-player column, ``date_labels`` is shared."""
+    return {name: values if name == "date_labels" else values[rows] for name, values in columns.items()}
+
+
+def search_rows(columns):
+    """Indices of the Tims picks with a known result, sorted by date."""
+    picks = np.flatnonzero(np.isin(columns["scored"], [0.0, 1.0]) & (columns["tims"] >= 1))
+    return picks[np.argsort(columns["dates"][picks], kind="stable")]
+
+
+def create_min_max_dict(min_max):
+    """Flattens the min/max of each feature from ``get_min_max`` into the ``MinMax`` keyword arguments."""
+    return {
+        "min_gpg": min_max.get("gpg", {}).get("min"),
+        "max_gpg": min_max.get("gpg", {}).get("max"),
+        "min_hgpg": min_max.get("hgpg", {}).get("min"),
+        "max_hgpg": min_max.get("hgpg", {}).get("max"),
+        "min_five_gpg": min_max.get("five_gpg", {}).get("min"),
+        "max_five_gpg": min_max.get("five_gpg", {}).get("max"),
+        "min_tgpg": min_max.get("tgpg", {}).get("min"),
+        "max_tgpg": min_max.get("tgpg", {}).get("max"),
+        "min_otga": min_max.get("otga", {}).get("min"),
+        "max_otga": min_max.get("otga", {}).get("max"),
+        "min_hppg": min_max.get("hppg", {}).get("min"),
+        "max_hppg": min_max.get("hppg", {}).get("max"),
+        "min_otshga": min_max.get("otshga", {}).get("min"),
+        "max_otshga": min_max.get("otshga", {}).get("max"),
+    }
+
+
+def load_search_data(min_max):
+    """Tims picks with a known result as plain arrays, sorted by date and pruned of dominated players."""
+    columns = load_columns()
+    picks = select_rows(columns, search_rows(columns))
+    kept = prune_dominated(picks["features"], picks["tims"], picks["dates"], make_predictions_rust.MinMax(**min_max))
+    return {name: np.ascontiguousarray(picks[name][kept]) for name in ("features", "scored", "tims", "dates")}
+
+
+def scoring_columns(features, min_max):
+    """Normalized (N x 7) float32 columns in ``WEIGHT_COLUMNS`` order, same arithmetic as the Rust normalization."""
+
+    def normalize(name):
+        column = features[:, make_predictions_rust.FEATURE_COLUMNS.index(name)]
+        low, high = np.float32(min_max[f"min_{name}"]), np.float32(min_max[f"max_{name}"])
+        return (column - low) / (high - low)
+
+    is_home = features[:, make_predictions_rust.FEATURE_COLUMNS.index("is_home")]
+    hppg_otshga = normalize("hppg") * normalize("otshga")
+    columns = [normalize("gpg"), normalize("five_gpg"), normalize("hgpg"), normalize("tgpg"), normalize("otga")]
+    return np.ascontiguousarray(np.column_stack(columns + [hppg_otshga, is_home]), dtype=np.float32)
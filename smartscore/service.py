@@ -1,3 +1,4 @@
+import contextvars
 import datetime
 import json
 import time
@@ -6,17 +7,29 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List
 
 import make_predictions_rust
+import numpy as np
 import pytz
 import requests
 from aws_lambda_powertools import Logger
 from smartscore_info_client.schemas.player_info import PLAYER_INFO_SCHEMA, PlayerInfo
 from smartscore_info_client.schemas.team_info import TEAM_INFO_SCHEMA, TeamInfo
 
-from config import ENV
-from constants import DAYS_TO_KEEP_HISTORIC_DATA, LAMBDA_API_NAME, NUM_EXPECTED_PLAYERS, WEIGHTS
+import deadline
+import http_client
+from config import ENV, ROSTER_BURST, ROSTER_REQUESTS_PER_SECOND, ROSTER_WORKERS
+from constants import (
+    BACKFILL_WORKERS,
+    DAYS_TO_KEEP_HISTORIC_DATA,
+    LAMBDA_API_NAME,
+    NUM_EXPECTED_PLAYERS,
+    PREDICTION_FEATURES,
+    WEIGHTS,
+)
 from email_utility import send_email
 from feature_flags import is_feature_enabled
+from http_client import RetryPolicy
 from utility import (
+    TokenBucket,
     exponential_backoff_request,
     get_cur_pick_pct,
     get_emails,
@@ -32,6 +45,9 @@ from utility import (
 
 logger = Logger()
 
+# The injury report is optional, a few quick retries before going without it
+INJURY_RETRY_POLICY = RetryPolicy(max_retries=3, max_delay=5)
+
 
 def get_date(hour=False, add_days=0, subtract_days=0):
     toronto_tz = pytz.timezone("America/Toronto")
@@ -98,7 +114,7 @@ def get_teams(data):
     return teams
 
 
-def get_players_from_team(team):
+def fetch_roster(team):
     players = []
 
     URL = f"https://api-web.nhle.com/v1/roster/{team.team_abbr}/current"
@@ -114,10 +130,40 @@ def get_players_from_team(team):
             )
             players.append(player_info)
 
+    return players
+
+
+def get_players_from_team(team):
+    players = fetch_roster(team)
+
     time.sleep(30)  # to avoid rate limiting
     return players
 
 
+def get_players_from_teams(
+    teams, requests_per_second=ROSTER_REQUESTS_PER_SECOND, burst=ROSTER_BURST, max_workers=ROSTER_WORKERS
+):
+    """
+    Fetches the roster of every team concurrently, all requests sharing one token bucket.
+
+    Returns:
+        list: The players of each team, in the same order as teams.
+    """
+    if not teams:
+        return []
+
+    bucket = TokenBucket(requests_per_second, burst)
+
+    def fetch(team):
+        bucket.acquire()
+        return fetch_roster(team)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(teams))) as executor:
+        # Each fetch runs in a copy of this context, so the workers see the invocation deadline
+        futures = [executor.submit(contextvars.copy_context().run, fetch, team) for team in teams]
+        return [future.result() for future in futures]
+
+
 def get_min_max():
     # payload = {
     #     "method": "GET_MIN_MAX",
@@ -139,21 +185,9 @@ def get_min_max():
 
 
 def make_predictions_teams(players):
-    rust_players = []
-    for player in players:
-        rust_players.append(
-            make_predictions_rust.PlayerInfo(
-                gpg=player["gpg"],
-                hgpg=player["hgpg"],
-                five_gpg=player["five_gpg"],
-                tgpg=player["tgpg"],
-                otga=player["otga"],
-                otshga=player["otshga"],
-                hppg=player["hppg"],
-                is_home=player["home"],
-                hppg_otshga=0.0,
-            )
-        )
+    features = np.array(
+        [[player[feature] for feature in PREDICTION_FEATURES] for player in players], dtype=np.float32
+    ).reshape(-1, len(PREDICTION_FEATURES))
 
     min_max_vals = get_min_max()
     min_max = make_predictions_rust.MinMax(
@@ -172,7 +206,7 @@ def make_predictions_teams(players):
         min_otshga=min_max_vals["otshga"]["min"],
         max_otshga=min_max_vals["otshga"]["max"],
     )
-    rust_probabilities = make_predictions_rust.predict(rust_players, min_max, WEIGHTS)
+    rust_probabilities = make_predictions_rust.predict_array(features, min_max, WEIGHTS).tolist()
     for i, player in enumerate(players):
         player["stat"] = rust_probabilities[i]
 
@@ -198,6 +232,45 @@ def get_tims(players):
     return players
 
 
+def score_date(date):
+    """
+    Fetches who scored on a date.
+
+    Returns:
+        tuple | None: The scorers' ids and the postponed games to delete, or None if a game on the date
+            is not over yet.
+    """
+    data = exponential_backoff_request(f"https://api-web.nhle.com/v1/score/{date}")
+
+    # get players who actually played
+    players = []
+    delete_games = []
+    for game in data.get("games"):
+        if game.get("gameScheduleState") == "OK":
+            if not game.get("gameOutcome"):
+                logger.info(
+                    f"Game not completed on {date}: {
+                        game.get('homeTeam', {}).get('abbrev')
+                    } vs {
+                        game.get('awayTeam', {}).get('abbrev')
+                    }"
+                )
+                return None
+        if game.get("gameScheduleState") == "PPD":
+            # Game was postponed, delete all entries
+            delete_games.append(
+                {
+                    "date": date,
+                    "home": game.get("homeTeam", {}).get("abbrev"),
+                    "away": game.get("awayTeam", {}).get("abbrev"),
+                }
+            )
+            continue
+
+        players.extend(list({goal.get("playerId") for goal in game.get("goals", {})}))
+    return players, delete_games
+
+
 def backfill_dates():
     yesterday = get_date(subtract_days=1)
     response = invoke_lambda(f"Api-{ENV}", {"method": "GET_DATES_NO_SCORED"})
@@ -210,41 +283,37 @@ def backfill_dates():
     if not dates_no_scored:
         return
 
-    scorers_dict = {}
-    for date in dates_no_scored:
-        data = exponential_backoff_request(f"https://api-web.nhle.com/v1/score/{date}")
-
-        # get players who actually played
-        players = []
-        for game in data.get("games"):
-            if game.get("gameScheduleState") == "OK":
-                if not game.get("gameOutcome"):
-                    logger.info(
-                        f"Game not completed: {
-                        game.get('homeTeam', {}).get('abbrev')
-                    } vs {
-                        game.get('awayTeam', {}).get('abbrev')
-                    }"
-                    )
-                    return
-            if game.get("gameScheduleState") == "PPD":
-                # Game was postponed, delete all entries
-                invoke_lambda(
-                    function_name=LAMBDA_API_NAME,
-                    payload={
-                        "method": "DELETE_GAME",
-                        "date": date,
-                        "home": game.get("homeTeam", {}).get("abbrev"),
-                        "away": game.get("awayTeam", {}).get("abbrev"),
-                    },
-                    wait=False,
-                )
-                continue
+    with ThreadPoolExecutor(max_workers=min(BACKFILL_WORKERS, len(dates_no_scored))) as executor:
+        # Each fetch runs in a copy of this context, so the workers see the invocation deadline
+        futures = {date: executor.submit(contextvars.copy_context().run, score_date, date) for date in dates_no_scored}
 
-            players.extend(list({goal.get("playerId") for goal in game.get("goals", {})}))
-        scorers_dict[date] = players
+    # Save every date that is complete, an unfinished or failed date is picked up again next run
+    scorers_dict = {}
+    delete_games = []
+    errors = []
+    for date, future in futures.items():
+        try:
+            result = future.result()
+        except Exception as e:  # noqa: BLE001
+            logger.error(f"Could not get scores for {date}: {e}")
+            errors.append(e)
+            continue
+        if result is not None:
+            scorers_dict[date], date_delete_games = result
+            delete_games.extend(date_delete_games)
+
+    if scorers_dict:
+        logger.info(f"Backfilling {list(scorers_dict)}, deleting {len(delete_games)} postponed games")
+        payload = {"method": "POST_BACKFILL", "data": scorers_dict}
+        if is_feature_enabled("batch_delete_games"):
+            payload["delete_games"] = delete_games
+        else:
+            for game in delete_games:
+                invoke_lambda(LAMBDA_API_NAME, {"method": "DELETE_GAME", **game}, wait=False)
+        invoke_lambda(LAMBDA_API_NAME, payload)
 
-    response = invoke_lambda(LAMBDA_API_NAME, {"method": "POST_BACKFILL", "data": scorers_dict})
+    if errors:
+        raise errors[0]
     return
 
 
@@ -385,10 +454,9 @@ def get_injury_data() -> List[Dict[str, str]]:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        response = http_client.request("get", url, policy=INJURY_RETRY_POLICY, headers=headers)
         data = response.json()
-    except requests.RequestException as e:
+    except (requests.RequestException, deadline.DeadlineExceeded) as e:
         logger.error(f"Error fetching injury data: {e}")
         return []
     except json.JSONDecodeError as e:
@@ -1,15 +1,19 @@
 import json
+import threading
 import time
 from datetime import timedelta
 
 import boto3
-import requests
 from aws_lambda_powertools import Logger
 from dateutil import parser
 from postgrest.exceptions import APIError
 
+import deadline
+import http_client
+import response_cache
 from config import ENV, SUPABASE_ADMIN_AUTH_CLIENT, SUPABASE_CLIENT
 from constants import CURRENT_PICK_ACCURACY
+from http_client import RetriesExhausted, RetryPolicy
 
 logger = Logger()
 
@@ -173,11 +177,44 @@ def schedule_run(times):
         print(f"Scheduled event for {trigger_time} with rule name {rule_name}")
 
 
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Most tokens held at once, the size of a burst
+    """
+
+    def __init__(self, rate, capacity):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"Invalid token bucket: rate={rate}, capacity={capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
 def exponential_backoff_request(
     url, method="get", data=None, json_data=None, headers=None, max_retries=5, base_delay=1
 ):
     """
-    Makes HTTP requests with exponential backoff retry strategy.
+    Makes HTTP requests on the pooled session with a jittered exponential backoff retry strategy.
+    GET responses that will not change are served from, and saved to, response_cache.
 
     Args:
         url: URL to send the request to
@@ -191,22 +228,24 @@ def exponential_backoff_request(
         Parsed JSON response
     """
     method = method.lower()
-    for attempt in range(max_retries):
-        try:
-            if method == "get":
-                response = requests.get(url, headers=headers, timeout=10)
-            elif method == "post":
-                response = requests.post(url, data=data, json=json_data, headers=headers, timeout=10)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+    if method not in ("get", "post"):
+        raise ValueError(f"Unsupported HTTP method: {method}")
 
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            wait_time = base_delay * (2**attempt)
-            print(f"Attempt {attempt + 1} failed: {e}. Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
-    raise Exception("Max retries reached. Request failed.")
+    if method == "get":
+        cached = response_cache.lookup(url)
+        if cached is not None:
+            return cached
+
+    policy = RetryPolicy(max_retries=max_retries, base_delay=base_delay)
+    try:
+        response = http_client.request(method, url, policy=policy, data=data, json=json_data, headers=headers)
+    except RetriesExhausted as e:
+        raise Exception("Max retries reached. Request failed.") from e
+
+    payload = response.json()
+    if method == "get":
+        response_cache.store(url, response.text, payload)
+    return payload
 
 
 def exponential_backoff_supabase_request(
@@ -230,6 +269,7 @@ def exponential_backoff_supabase_request(
 
     logger.info(f"Making {method} request to table: {table_name} with data: {json_data} select: {select} eq: {eq}")
     for attempt in range(max_retries):
+        deadline.check()
         try:
             if method == "GET":
                 query = SUPABASE_CLIENT.table(table_name).select(select)
@@ -261,6 +301,7 @@ def exponential_backoff_supabase_request(
                 f"Exception type: {type(e)}, Exception: {e}"
             )  # temporary logging, once we see a retryable error, we can remove this
             wait_time = base_delay * (2**attempt)
+            deadline.check(wait_time)
             logger.info(f"Attempt {attempt + 1} failed. Retrying in {wait_time} seconds...")
             time.sleep(wait_time)
 
@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent / "smartscore" / "scripts"))
+from benchmark_engines import MIN_MAX_FEATURES, compare, synthetic_season  # noqa: E402
+
+
+def engine_result(engine, correct=40, weights=None, seconds=2.0):
+    return {
+        "engine": engine,
+        "status": "ok",
+        "seconds": seconds,
+        "weights": weights or [0.5, 0.0, 0.0, 0.0, 0.0, 0.0, 0.5],
+        "correct": correct,
+        "total": 60,
+    }
+
+
+@pytest.mark.parametrize("group_sizes", [[1, 1, 1], [2, 3, 4], [0, 5, 1]])
+def test_synthetic_season_groups_per_date(group_sizes):
+    arrays, min_max = synthetic_season(6, 20, group_sizes, seed=1)
+
+    assert arrays["features"].shape == (120, 8)
+    assert arrays["features"].dtype == np.float32
+    assert arrays["scored"].dtype == np.float32
+    # Sorted by date, every date with all of its players
+    assert np.all(np.diff(arrays["dates"]) >= 0)
+    assert np.bincount(arrays["dates"]).tolist() == [20] * 6
+    for date in range(6):
+        tims = arrays["tims"][arrays["dates"] == date]
+        assert [int(np.sum(tims == group)) for group in (1, 2, 3)] == group_sizes
+        assert int(np.sum(tims == 0)) == 20 - sum(group_sizes)
+
+    assert set(min_max) == {f"{bound}_{name}" for name in MIN_MAX_FEATURES for bound in ("min", "max")}
+    assert all(min_max[f"min_{name}"] <= min_max[f"max_{name}"] for name in MIN_MAX_FEATURES)
+
+
+def test_synthetic_season_is_seeded():
+    first, _ = synthetic_season(3, 10, [1, 1, 1], seed=4)
+    again, _ = synthetic_season(3, 10, [1, 1, 1], seed=4)
+
+    for name in first:
+        np.testing.assert_array_equal(first[name], again[name])
+
+
+def test_compare_agreement():
+    results = [
+        engine_result("rust"),
+        engine_result("c", seconds=4.0),
+        engine_result("numpy", correct=39),
+        engine_result("warp", weights=[0.4, 0.1, 0.0, 0.0, 0.0, 0.0, 0.5]),
+    ]
+
+    assert compare(results, 1000) == "rust"
+    assert [result["agrees"] for result in results] == [True, True, False, False]
+    assert results[1]["combinations_per_second"] == 250
+
+
+def test_compare_skipped_reference():
+    results = [
+        {"engine": "rust", "status": "skipped", "reason": "ImportError: no module"},
+        engine_result("c"),
+        engine_result("numpy", correct=39),
+    ]
+
+    assert compare(results, 1000) == "c"
+    assert "agrees" not in results[0]
+    assert [result["agrees"] for result in results[1:]] == [True, False]
+
+
+def test_compare_nothing_ran():
+    results = [{"engine": "c", "status": "failed", "reason": "no output"}, {"engine": "warp", "status": "timeout"}]
+
+    assert compare(results, 1000) is None
+    assert all("agrees" not in result for result in results)
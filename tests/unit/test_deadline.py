@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+import deadline
+import http_client
+from deadline import DeadlineExceeded
+from decorators import lambda_handler_error_responder
+from utility import exponential_backoff_supabase_request
+
+
+@pytest.fixture
+def no_time_left():
+    token = deadline.start(deadline.DEADLINE_MARGIN)
+    yield
+    deadline.reset(token)
+
+
+def test_no_deadline_outside_lambda():
+    """Test that nothing is cut short without a Lambda context."""
+    assert deadline.remaining() is None
+    assert deadline.clamp(10) == 10
+    deadline.check(3600)
+
+
+def test_start_leaves_margin():
+    """Test that the deadline keeps DEADLINE_MARGIN back from the Lambda timeout."""
+    token = deadline.start(30)
+    try:
+        assert 30 - deadline.DEADLINE_MARGIN - 1 < deadline.remaining() <= 30 - deadline.DEADLINE_MARGIN
+        assert deadline.clamp(60) <= 30 - deadline.DEADLINE_MARGIN
+        with pytest.raises(DeadlineExceeded):
+            deadline.check(30)
+    finally:
+        deadline.reset(token)
+
+    assert deadline.remaining() is None
+
+
+def test_decorator_seeds_deadline_from_context():
+    """Test that handlers see the time left in the invocation, and no deadline once they return."""
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = 20_000
+
+    @lambda_handler_error_responder
+    def handler(event, context):
+        return deadline.remaining()
+
+    remaining = handler({}, context)
+
+    assert 20 - deadline.DEADLINE_MARGIN - 1 < remaining <= 20 - deadline.DEADLINE_MARGIN
+    assert deadline.remaining() is None
+
+
+def test_decorator_without_lambda_context():
+    """Test that a plain dict context runs without a deadline."""
+
+    @lambda_handler_error_responder
+    def handler(event, context):
+        return deadline.remaining()
+
+    assert handler({}, {}) is None
+
+
+@patch("http_client.time.sleep")
+@patch("http_client.get_session")
+def test_request_fails_fast_when_retry_cannot_finish(mock_get_session, mock_sleep):
+    """Test that a retry wait longer than the time left raises instead of sleeping."""
+    mock_get_session.return_value.request.side_effect = requests.exceptions.Timeout("Timeout")
+    token = deadline.start(deadline.DEADLINE_MARGIN + 0.5)
+    try:
+        with pytest.raises(DeadlineExceeded, match="No time left to retry"):
+            http_client.request("get", "http://test.com", policy=http_client.RetryPolicy(base_delay=4))
+    finally:
+        deadline.reset(token)
+
+    mock_get_session.return_value.request.assert_called_once()
+    assert mock_get_session.return_value.request.call_args[1]["timeout"] <= 0.5
+    mock_sleep.assert_not_called()
+
+
+@patch("http_client.get_session")
+def test_request_not_sent_after_deadline(mock_get_session, no_time_left):
+    """Test that no attempt starts once the deadline has passed."""
+    with pytest.raises(DeadlineExceeded):
+        http_client.request("get", "http://test.com")
+
+    mock_get_session.return_value.request.assert_not_called()
+
+
+@patch("utility.time.sleep")
+@patch("utility.SUPABASE_CLIENT")
+def test_supabase_request_fails_fast(mock_client, mock_sleep):
+    """Test that Supabase retries stop when the backoff would outlive the deadline."""
+    mock_client.table.return_value.select.return_value.execute.side_effect = ConnectionError("reset")
+    token = deadline.start(deadline.DEADLINE_MARGIN + 0.5)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            exponential_backoff_supabase_request("players", base_delay=1)
+    finally:
+        deadline.reset(token)
+
+    mock_sleep.assert_not_called()
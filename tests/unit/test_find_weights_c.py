@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+
+import make_predictions_rust
+import numpy as np
+import pytest
+
+SMARTSCORE = Path(__file__).parent.parent.parent / "smartscore"
+if not (SMARTSCORE / "compiled_code.so").exists():
+    pytest.skip("compiled_code.so is not built, run make compile_c", allow_module_level=True)
+
+sys.path.append(str(SMARTSCORE / "scripts"))
+from find_weights_c import LABELS, search  # noqa: E402
+
+# 25% steps, 210 combinations
+STEP = 25
+
+MIN_MAX = {
+    "min_gpg": 0.0,
+    "max_gpg": 1.0,
+    "min_hgpg": 0.0,
+    "max_hgpg": 1.0,
+    "min_five_gpg": 0.0,
+    "max_five_gpg": 1.0,
+    "min_tgpg": 2.0,
+    "max_tgpg": 4.0,
+    "min_otga": 2.0,
+    "max_otga": 4.0,
+    "min_hppg": 0.0,
+    "max_hppg": 0.5,
+    "min_otshga": 0.0,
+    "max_otshga": 1.0,
+}
+
+
+def synthetic_batch(scored=None, seed=3):
+    """Four dates of three Tims groups with four players each, rows ordered by date, date 2 without group 3."""
+    rng = np.random.default_rng(seed)
+    dates = np.repeat(np.arange(4, dtype=np.int32), 12)
+    tims = np.tile(np.repeat(np.arange(1, 4, dtype=np.int32), 4), 4)
+    tims[(dates == 2) & (tims == 3)] = 0
+    features = np.column_stack(
+        [
+            rng.uniform(0.0, 1.0, (len(dates), 3)),
+            rng.uniform(2.0, 4.0, (len(dates), 2)),
+            rng.uniform(0.0, 0.5, len(dates)),
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.integers(0, 2, len(dates)),
+        ]
+    ).astype(np.float32)
+    if scored is None:
+        scored = rng.integers(0, 2, len(dates))
+    return {
+        "features": features,
+        "scored": np.asarray(scored, dtype=np.float32),
+        "tims": tims,
+        "dates": dates,
+    }
+
+
+def rust_search(arrays):
+    batch = make_predictions_rust.PlayerBatch(
+        arrays["features"], scored=arrays["scored"], tims=arrays["tims"], dates=arrays["dates"]
+    )
+    weights, correct, total = make_predictions_rust.search_weights(batch, make_predictions_rust.MinMax(**MIN_MAX), STEP)
+    return [getattr(weights, label) for label in LABELS], correct, total
+
+
+def c_search(arrays):
+    result = search(arrays, MIN_MAX, STEP)
+    return [getattr(result.weights, label) for label in LABELS], result.correct, result.total
+
+
+@pytest.mark.parametrize("seed", [3, 4, 5])
+def test_c_search_matches_search_weights(seed):
+    arrays = synthetic_batch(seed=seed)
+
+    assert c_search(arrays) == rust_search(arrays)
+
+
+def test_c_search_ties_keep_latest_rank():
+    # Every pick scores, so all 210 combinations tie and the last rank must win
+    arrays = synthetic_batch(scored=np.ones(48))
+
+    weights, correct, total = c_search(arrays)
+
+    last = make_predictions_rust.WeightSpace(STEP).weights_at(209)
+    assert (correct, total) == (11, 12)
+    assert weights == [getattr(last, label) for label in LABELS]
+    assert (weights, correct, total) == rust_search(arrays)
+
+
+def test_c_search_failure_raises():
+    with pytest.raises(RuntimeError, match="C weight search failed"):
+        search(synthetic_batch(), MIN_MAX, 0)
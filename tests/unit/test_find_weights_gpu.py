@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+
+import make_predictions_rust
+import numpy as np
+import pytest
+
+pytest.importorskip("warp")
+sys.path.append(str(Path(__file__).parent.parent.parent / "smartscore" / "scripts"))
+from find_weights_gpu import RANK_BITS, call_warp_function  # noqa: E402
+
+# 25% steps, 210 combinations
+STEP = 25
+
+MIN_MAX = {
+    "min_gpg": 0.0,
+    "max_gpg": 1.0,
+    "min_hgpg": 0.0,
+    "max_hgpg": 1.0,
+    "min_five_gpg": 0.0,
+    "max_five_gpg": 1.0,
+    "min_tgpg": 2.0,
+    "max_tgpg": 4.0,
+    "min_otga": 2.0,
+    "max_otga": 4.0,
+    "min_hppg": 0.0,
+    "max_hppg": 0.5,
+    "min_otshga": 0.0,
+    "max_otshga": 1.0,
+}
+
+
+def synthetic_batch(scored=None, seed=7):
+    """Four dates of three Tims groups with four players each, rows ordered by date."""
+    rng = np.random.default_rng(seed)
+    dates = np.repeat(np.arange(4, dtype=np.int32), 12)
+    tims = np.tile(np.repeat(np.arange(1, 4, dtype=np.int32), 4), 4)
+    features = np.column_stack(
+        [
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.uniform(2.0, 4.0, len(dates)),
+            rng.uniform(2.0, 4.0, len(dates)),
+            rng.uniform(0.0, 0.5, len(dates)),
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.integers(0, 2, len(dates)),
+        ]
+    ).astype(np.float32)
+    if scored is None:
+        scored = rng.integers(0, 2, len(dates))
+    return {
+        "features": features,
+        "scored": np.asarray(scored, dtype=np.float32),
+        "tims": tims,
+        "dates": dates,
+    }
+
+
+def rust_search(arrays):
+    batch = make_predictions_rust.PlayerBatch(
+        arrays["features"], scored=arrays["scored"], tims=arrays["tims"], dates=arrays["dates"]
+    )
+    weights, correct, _total = make_predictions_rust.search_weights(
+        batch, make_predictions_rust.MinMax(**MIN_MAX), STEP
+    )
+    return [getattr(weights, label) for label in make_predictions_rust.WEIGHT_COLUMNS], correct
+
+
+def test_warp_cpu_matches_search_weights():
+    arrays = synthetic_batch()
+
+    weights, correct = call_warp_function(arrays, MIN_MAX, device="cpu", step_size=STEP / 100)
+
+    assert (weights, correct) == rust_search(arrays)
+
+
+def test_warp_cpu_ties_keep_latest_rank():
+    # Every pick scores, so all 210 combinations tie and the last rank must win
+    arrays = synthetic_batch(scored=np.ones(48))
+
+    weights, correct = call_warp_function(arrays, MIN_MAX, device="cpu", step_size=STEP / 100)
+
+    last = make_predictions_rust.WeightSpace(STEP).weights_at(209)
+    assert correct == 12
+    assert weights == [getattr(last, label) for label in make_predictions_rust.WEIGHT_COLUMNS]
+    assert (weights, correct) == rust_search(arrays)
+
+
+def test_warp_rejects_step_beyond_rank_bits():
+    # 0.25% steps give C(406, 6), about 6.0e12 combinations
+    assert make_predictions_rust.WeightSpace(0.25).count > 1 << RANK_BITS
+
+    with pytest.raises(ValueError, match="combinations"):
+        call_warp_function(synthetic_batch(), MIN_MAX, device="cpu", step_size=0.0025)
@@ -0,0 +1,139 @@
+import sys
+from pathlib import Path
+
+import make_predictions_rust
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent / "smartscore" / "scripts"))
+from find_weights_numpy import SegmentScorer, search  # noqa: E402
+
+# 25% steps, 210 combinations
+STEP = 25
+
+MIN_MAX = {
+    "min_gpg": 0.0,
+    "max_gpg": 1.0,
+    "min_hgpg": 0.0,
+    "max_hgpg": 1.0,
+    "min_five_gpg": 0.0,
+    "max_five_gpg": 1.0,
+    "min_tgpg": 2.0,
+    "max_tgpg": 4.0,
+    "min_otga": 2.0,
+    "max_otga": 4.0,
+    "min_hppg": 0.0,
+    "max_hppg": 0.5,
+    "min_otshga": 0.0,
+    "max_otshga": 1.0,
+}
+
+AVERAGE_PLAYER = [0.5, 0.5, 0.5, 3.0, 3.0, 0.25, 0.5, 0.0]
+
+
+def player_batch(players):
+    """Arrays for (date, tims, gpg, scored) players, every other feature the same, rows ordered by date."""
+    features = np.array([[gpg, *AVERAGE_PLAYER[1:]] for _, _, gpg, _ in players], dtype=np.float32)
+    return {
+        "features": features,
+        "scored": np.array([scored for *_, scored in players], dtype=np.float32),
+        "tims": np.array([tims for _, tims, _, _ in players], dtype=np.int32),
+        "dates": np.array([date for date, *_ in players], dtype=np.int32),
+    }
+
+
+def synthetic_batch(scored=None, seed=11):
+    """Four dates of three Tims groups with four players each, rows ordered by date.
+
+    The first two players of every group are tied, and date 2 has no group 3 picks.
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.repeat(np.arange(4, dtype=np.int32), 12)
+    tims = np.tile(np.repeat(np.arange(1, 4, dtype=np.int32), 4), 4)
+    tims[(dates == 2) & (tims == 3)] = 0
+    features = np.column_stack(
+        [
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.uniform(2.0, 4.0, len(dates)),
+            rng.uniform(2.0, 4.0, len(dates)),
+            rng.uniform(0.0, 0.5, len(dates)),
+            rng.uniform(0.0, 1.0, len(dates)),
+            rng.integers(0, 2, len(dates)),
+        ]
+    ).astype(np.float32)
+    features[1::4] = features[0::4]
+    if scored is None:
+        # Tied players with different results, so a wrong tie-break changes the count
+        scored = rng.integers(0, 2, len(dates))
+        scored[0::4], scored[1::4] = 0, 1
+    return {
+        "features": features,
+        "scored": np.asarray(scored, dtype=np.float32),
+        "tims": tims,
+        "dates": dates,
+    }
+
+
+def rust_search(arrays):
+    batch = make_predictions_rust.PlayerBatch(
+        arrays["features"], scored=arrays["scored"], tims=arrays["tims"], dates=arrays["dates"]
+    )
+    weights, correct, total = make_predictions_rust.search_weights(batch, make_predictions_rust.MinMax(**MIN_MAX), STEP)
+    return [getattr(weights, label) for label in make_predictions_rust.WEIGHT_COLUMNS], correct, total
+
+
+def numpy_search(arrays, memory_mb):
+    scorer = SegmentScorer(arrays, MIN_MAX)
+    weights, correct = search(scorer, STEP, memory_mb)
+    return [float(value) for value in weights], correct, scorer.total
+
+
+# 0 MB scores one combination per chunk, so ties are also resolved across chunks
+@pytest.mark.parametrize("memory_mb", [0, 64])
+def test_search_matches_search_weights(memory_mb):
+    arrays = synthetic_batch()
+
+    assert numpy_search(arrays, memory_mb) == rust_search(arrays)
+
+
+@pytest.mark.parametrize("memory_mb", [0, 64])
+def test_search_ties_keep_latest_combination(memory_mb):
+    # Every pick scores, so all 210 combinations tie and the last one must win
+    arrays = synthetic_batch(scored=np.ones(48))
+
+    weights, correct, total = numpy_search(arrays, memory_mb)
+
+    last = make_predictions_rust.WeightSpace(STEP).weights_at(209)
+    assert (correct, total) == (11, 12)
+    assert weights == [getattr(last, label) for label in make_predictions_rust.WEIGHT_COLUMNS]
+    assert (weights, correct, total) == rust_search(arrays)
+
+
+def test_search_matches_search_weights_with_nan_scores():
+    arrays = synthetic_batch()
+    arrays["features"][[0, 13, 26], 0] = np.nan
+
+    assert numpy_search(arrays, 64) == rust_search(arrays)
+
+
+def test_count_correct_skips_nan_scores():
+    nan = float("nan")
+    arrays = player_batch(
+        [
+            # A NaN player never beats the best so far
+            (0, 1, 0.2, 0),
+            (0, 1, nan, 0),
+            (0, 1, 0.5, 1),
+            # A NaN first player is never beaten
+            (0, 2, nan, 1),
+            (0, 2, 0.9, 0),
+            (0, 2, 0.5, 0),
+        ]
+    )
+
+    correct = SegmentScorer(arrays, MIN_MAX).count_correct(np.eye(7, dtype=np.float32))
+
+    # Only the gpg weight ranks group 1, the others leave its first player ahead
+    assert correct.tolist() == [2, 1, 1, 1, 1, 1, 1]
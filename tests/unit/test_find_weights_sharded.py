@@ -0,0 +1,173 @@
+import argparse
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import make_predictions_rust
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent / "smartscore" / "scripts"))
+import find_weights_sharded  # noqa: E402
+from find_weights_sharded import (  # noqa: E402
+    checkpoint_path,
+    data_fingerprint,
+    init_worker,
+    merge,
+    parse_shards,
+    read_checkpoint,
+    run_shard,
+    shard_range,
+    write_checkpoint,
+)
+
+# 25% steps, 210 combinations
+STEP = 25
+
+MIN_MAX = {
+    "min_gpg": 0.0,
+    "max_gpg": 1.0,
+    "min_hgpg": 0.0,
+    "max_hgpg": 1.0,
+    "min_five_gpg": 0.0,
+    "max_five_gpg": 1.0,
+    "min_tgpg": 2.0,
+    "max_tgpg": 4.0,
+    "min_otga": 2.0,
+    "max_otga": 4.0,
+    "min_hppg": 0.0,
+    "max_hppg": 0.5,
+    "min_otshga": 0.0,
+    "max_otshga": 1.0,
+}
+
+
+@pytest.fixture
+def arrays(monkeypatch):
+    """Four dates of three Tims groups with four players each, loaded into this process as the worker batch."""
+    rng = np.random.default_rng(5)
+    dates = np.repeat(np.arange(4, dtype=np.int32), 12)
+    arrays = {
+        "features": np.column_stack(
+            [
+                rng.uniform(0.0, 1.0, (len(dates), 3)),
+                rng.uniform(2.0, 4.0, (len(dates), 2)),
+                rng.uniform(0.0, 0.5, len(dates)),
+                rng.uniform(0.0, 1.0, len(dates)),
+                rng.integers(0, 2, len(dates)),
+            ]
+        ).astype(np.float32),
+        "scored": rng.integers(0, 2, len(dates)).astype(np.float32),
+        "tims": np.tile(np.repeat(np.arange(1, 4, dtype=np.int32), 4), 4),
+        "dates": dates,
+    }
+    monkeypatch.setenv("RAYON_NUM_THREADS", "1")
+    monkeypatch.setattr(find_weights_sharded, "SEGMENT_SIZE", 20)
+    init_worker(arrays, MIN_MAX, 1)
+    yield arrays
+    monkeypatch.setattr(find_weights_sharded, "worker_batch", None)
+    monkeypatch.setattr(find_weights_sharded, "worker_min_max", None)
+
+
+def checkpoint(shard, num_shards=3, count=210, next_rank=None, best=None, data="abc"):
+    start, end = shard_range(count, num_shards, shard)
+    return {
+        "step_size": STEP,
+        "num_shards": num_shards,
+        "shard": shard,
+        "start": start,
+        "end": end,
+        "data": data,
+        "next_rank": end if next_rank is None else next_rank,
+        "best": best,
+    }
+
+
+def best(rank, correct):
+    return {"rank": rank, "correct": correct, "total": 12, "weights": {"gpg": 1.0}}
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 210, 1001])
+@pytest.mark.parametrize("num_shards", [1, 3, 7, 16])
+def test_shard_range_covers_every_rank_once(count, num_shards):
+    ranges = [shard_range(count, num_shards, shard) for shard in range(num_shards)]
+
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == count
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert all(start <= end for start, end in ranges)
+    assert max(end - start for start, end in ranges) - min(end - start for start, end in ranges) <= 1
+
+
+def test_parse_shards():
+    assert parse_shards("0-7", 16) == [0, 1, 2, 3, 4, 5, 6, 7]
+    assert parse_shards("1,3,5", 16) == [1, 3, 5]
+    assert parse_shards("2-4,3,9", 16) == [2, 3, 4, 9]
+
+
+@pytest.mark.parametrize("spec", ["16", "14-16", "0,16"])
+def test_parse_shards_rejects_out_of_range(spec):
+    with pytest.raises(ValueError, match="outside 0-15"):
+        parse_shards(spec, 16)
+
+
+def test_run_shard_resumes_from_next_rank(arrays, tmp_path):
+    fingerprint = data_fingerprint(arrays, MIN_MAX)
+    (tmp_path / "full").mkdir()
+    expected = run_shard(0, 2, STEP, str(tmp_path / "full"), fingerprint)
+
+    search_weights = make_predictions_rust.search_weights
+
+    def interrupt_third_segment(*args, **kwargs):
+        if kwargs["start"] == 40:
+            raise KeyboardInterrupt
+        return search_weights(*args, **kwargs)
+
+    interrupted = tmp_path / "interrupted"
+    interrupted.mkdir()
+    with patch.object(make_predictions_rust, "search_weights", side_effect=interrupt_third_segment):
+        with pytest.raises(KeyboardInterrupt):
+            run_shard(0, 2, STEP, str(interrupted), fingerprint)
+    assert read_checkpoint(checkpoint_path(str(interrupted), 0, 2))["next_rank"] == 40
+
+    with patch.object(make_predictions_rust, "search_weights", wraps=search_weights) as mock:
+        resumed = run_shard(0, 2, STEP, str(interrupted), fingerprint)
+
+    assert [call.kwargs["start"] for call in mock.call_args_list] == [40, 60, 80, 100]
+    assert resumed == expected
+    assert resumed["next_rank"] == 105
+
+
+def test_run_shard_refuses_checkpoint_of_other_data(arrays, tmp_path):
+    path = checkpoint_path(str(tmp_path), 0, 2)
+    write_checkpoint(path, checkpoint(0, num_shards=2, next_rank=20, data="abc"))
+
+    with pytest.raises(ValueError, match="different search"):
+        run_shard(0, 2, STEP, str(tmp_path), data_fingerprint(arrays, MIN_MAX))
+    assert read_checkpoint(path) == checkpoint(0, num_shards=2, next_rank=20, data="abc")
+
+
+def test_merge_warns_about_missing_shards(tmp_path, capsys):
+    write_checkpoint(checkpoint_path(str(tmp_path), 0, 3), checkpoint(0, best=best(40, 8)))
+    write_checkpoint(checkpoint_path(str(tmp_path), 2, 3), checkpoint(2, next_rank=150, best=best(145, 7)))
+
+    merged = merge(argparse.Namespace(checkpoint_dir=str(tmp_path)))
+
+    assert merged == best(40, 8)
+    assert "2 of 3 shards are incomplete or missing: [1, 2]" in capsys.readouterr().out
+
+
+def test_merge_rejects_mixed_searches(tmp_path):
+    write_checkpoint(checkpoint_path(str(tmp_path), 0, 3), checkpoint(0, best=best(40, 8)))
+    write_checkpoint(checkpoint_path(str(tmp_path), 1, 3), checkpoint(1, best=best(90, 8), data="other"))
+
+    with pytest.raises(ValueError, match="different searches"):
+        merge(argparse.Namespace(checkpoint_dir=str(tmp_path)))
+
+
+def test_merge_keeps_later_rank_on_ties_across_shards(tmp_path):
+    write_checkpoint(checkpoint_path(str(tmp_path), 0, 3), checkpoint(0, best=best(40, 8)))
+    write_checkpoint(checkpoint_path(str(tmp_path), 1, 3), checkpoint(1, best=best(90, 8)))
+    write_checkpoint(checkpoint_path(str(tmp_path), 2, 3), checkpoint(2, best=best(200, 7)))
+
+    assert merge(argparse.Namespace(checkpoint_dir=str(tmp_path))) == best(90, 8)
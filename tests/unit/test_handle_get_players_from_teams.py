@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+import pytest
+from smartscore_info_client.schemas.player_info import PlayerInfo
+from smartscore_info_client.schemas.team_info import TeamInfo
+
+from event_handler import handle_get_players_from_teams
+
+
+@pytest.fixture
+def mock_get_players_from_teams():
+    with patch("event_handler.get_players_from_teams") as mock:
+        yield mock
+
+
+@pytest.fixture
+def sample_teams_event():
+    return {
+        "statusCode": 200,
+        "teams": [
+            {
+                "team_name": "Florida",
+                "team_abbr": "FLA",
+                "season": "20242025",
+                "team_id": 13,
+                "opponent_id": 14,
+                "home": True,
+            },
+            {
+                "team_name": "Tampa Bay",
+                "team_abbr": "TBL",
+                "season": "20242025",
+                "team_id": 14,
+                "opponent_id": 13,
+                "home": False,
+            },
+        ],
+    }
+
+
+def test_handle_get_players_from_teams_returns_one_entry_per_team(mock_get_players_from_teams, sample_teams_event):
+    """Test that every team comes back in order with its own players."""
+    mock_get_players_from_teams.return_value = [
+        [PlayerInfo(name="Aleksander Barkov", id=8477493, team_id=13)],
+        [
+            PlayerInfo(name="Nikita Kucherov", id=8476453, team_id=14),
+            PlayerInfo(name="Brayden Point", id=8478010, team_id=14),
+        ],
+    ]
+
+    result = handle_get_players_from_teams(sample_teams_event, {})
+
+    # Verify the service was called once with every team
+    mock_get_players_from_teams.assert_called_once()
+    called_teams = mock_get_players_from_teams.call_args[0][0]
+    assert all(isinstance(team, TeamInfo) for team in called_teams)
+    assert [team.team_abbr for team in called_teams] == ["FLA", "TBL"]
+
+    assert len(result) == 2
+    assert result[0]["team_abbr"] == "FLA"
+    assert result[0]["home"] is True
+    assert [p["name"] for p in result[0]["players"]] == ["Aleksander Barkov"]
+    assert result[1]["team_abbr"] == "TBL"
+    assert result[1]["opponent_id"] == 13
+    assert [p["id"] for p in result[1]["players"]] == [8476453, 8478010]
+
+
+def test_handle_get_players_from_teams_matches_single_team_structure(mock_get_players_from_teams, sample_teams_event):
+    """Test that each entry has the keys handle_get_players_from_team returns."""
+    mock_get_players_from_teams.return_value = [[], []]
+
+    result = handle_get_players_from_teams(sample_teams_event, {})
+
+    expected_keys = {"team_name", "team_abbr", "season", "team_id", "opponent_id", "home", "players"}
+    assert all(set(team.keys()) == expected_keys for team in result)
+    assert all(team["players"] == [] for team in result)
+
+
+def test_handle_get_players_from_teams_no_games(mock_get_players_from_teams):
+    """Test that a night without games returns an empty list for ParseData."""
+    mock_get_players_from_teams.return_value = []
+
+    result = handle_get_players_from_teams({"statusCode": 200, "teams": []}, {})
+
+    assert result == []
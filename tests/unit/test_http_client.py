@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+import http_client
+from http_client import RetriesExhausted, RetryPolicy, parse_retry_after
+
+
+@pytest.fixture
+def mock_session():
+    with patch("http_client.get_session") as mock:
+        yield mock.return_value
+
+
+@pytest.fixture
+def mock_sleep():
+    with patch("http_client.time.sleep") as sleep:
+        yield sleep
+
+
+def rate_limited(retry_after):
+    response = MagicMock(status_code=429, headers={"Retry-After": retry_after})
+    response.raise_for_status.side_effect = requests.exceptions.HTTPError("429 Too Many Requests", response=response)
+    return response
+
+
+def test_get_session_is_shared():
+    """Test that every call gets the same pooled session."""
+    assert http_client.get_session() is http_client.get_session()
+    assert http_client.get_session().headers["Accept-Encoding"] == "gzip, deflate"
+
+
+def test_request_waits_for_retry_after(mock_session, mock_sleep):
+    """Test that a rate limited response waits as long as the server asks."""
+    mock_session.request.side_effect = [rate_limited("7"), MagicMock(status_code=200)]
+
+    http_client.request("get", "http://test.com")
+
+    mock_sleep.assert_called_once_with(7.0)
+
+
+def test_request_caps_retry_after(mock_session, mock_sleep):
+    """Test that Retry-After never waits longer than the policy allows."""
+    mock_session.request.side_effect = [rate_limited("3600"), MagicMock(status_code=200)]
+
+    http_client.request("get", "http://test.com", policy=RetryPolicy(max_delay=20))
+
+    mock_sleep.assert_called_once_with(20)
+
+
+def test_request_raises_retries_exhausted(mock_session, mock_sleep):
+    """Test that the last failure is raised once every attempt is used."""
+    mock_session.request.side_effect = requests.exceptions.ConnectionError("Connection failed")
+
+    with pytest.raises(RetriesExhausted, match="Connection failed"):
+        http_client.request("get", "http://test.com", policy=RetryPolicy(max_retries=2))
+
+    assert mock_session.request.call_count == 2
+
+
+def test_retry_policy_delay_jitter():
+    """Test that jittered delays stay between half and all of the backoff."""
+    policy = RetryPolicy(base_delay=1, jitter=0.5)
+
+    delays = [policy.delay(3) for _ in range(200)]
+
+    assert all(4 <= delay <= 8 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_retry_policy_rejects_no_attempts():
+    """Test that a policy must allow at least one attempt."""
+    with pytest.raises(ValueError):
+        RetryPolicy(max_retries=0)
+
+
+def test_parse_retry_after_formats():
+    """Test Retry-After given as seconds, as an HTTP date, and malformed."""
+    in_ten_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+
+    assert parse_retry_after("5") == 5.0
+    assert 8 <= parse_retry_after(in_ten_seconds) <= 10
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after(None) is None
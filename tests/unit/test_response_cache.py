@@ -0,0 +1,156 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import response_cache
+from response_cache import FileBackend, MemoryBackend
+from utility import exponential_backoff_request
+
+SCORE_URL = "https://api-web.nhle.com/v1/score/2025-01-10"
+ROSTER_URL = "https://api-web.nhle.com/v1/roster/TOR/current"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+    with patch("response_cache.today", return_value="2025-01-15"):
+        yield
+    response_cache.clear()
+
+
+@pytest.fixture
+def mock_session():
+    with patch("http_client.get_session") as mock:
+        yield mock.return_value
+
+
+def score_payload(*states):
+    return {"games": [{"gameState": state, "gameScheduleState": "OK"} for state in states]}
+
+
+def json_response(payload):
+    return MagicMock(status_code=200, json=lambda: payload, text=json.dumps(payload))
+
+
+def test_finished_past_date_is_fetched_once(mock_session):
+    """Test that a past date with every game over never hits the network again."""
+    payload = score_payload("OFF", "FINAL")
+    mock_session.request.return_value = json_response(payload)
+
+    first = exponential_backoff_request(SCORE_URL)
+    second = exponential_backoff_request(SCORE_URL)
+
+    assert first == second == payload
+    mock_session.request.assert_called_once()
+
+
+def test_cached_payload_is_a_copy(mock_session):
+    """Test that changing a returned payload does not change the cache."""
+    mock_session.request.return_value = json_response(score_payload("OFF"))
+
+    exponential_backoff_request(SCORE_URL)["games"].clear()
+
+    assert exponential_backoff_request(SCORE_URL) == score_payload("OFF")
+
+
+def test_unfinished_games_are_not_cached(mock_session):
+    """Test that a date with a game still going is fetched again."""
+    mock_session.request.return_value = json_response(score_payload("OFF", "LIVE"))
+
+    exponential_backoff_request(SCORE_URL)
+    exponential_backoff_request(SCORE_URL)
+
+    assert mock_session.request.call_count == 2
+
+
+def test_today_is_not_cached(mock_session):
+    """Test that today's scores are always fetched, even once final."""
+    mock_session.request.return_value = json_response(score_payload("OFF"))
+
+    exponential_backoff_request("https://api-web.nhle.com/v1/score/2025-01-15")
+    exponential_backoff_request("https://api-web.nhle.com/v1/score/2025-01-15")
+
+    assert mock_session.request.call_count == 2
+
+
+def test_postponed_games_count_as_final():
+    """Test that a postponed game does not keep a date out of the cache."""
+    payload = {"games": [{"gameState": "FUT", "gameScheduleState": "PPD"}, {"gameState": "OFF"}]}
+
+    response_cache.store(SCORE_URL, json.dumps(payload), payload)
+
+    assert response_cache.lookup(SCORE_URL) == payload
+
+
+@patch("response_cache.time.time")
+def test_roster_expires(mock_time):
+    """Test that rosters are only kept for a few minutes."""
+    mock_time.return_value = 1000.0
+    response_cache.store(ROSTER_URL, '{"forwards": []}', {"forwards": []})
+
+    mock_time.return_value = 1000.0 + 5 * 60
+    assert response_cache.lookup(ROSTER_URL) == {"forwards": []}
+
+    mock_time.return_value = 1000.0 + 11 * 60
+    assert response_cache.lookup(ROSTER_URL) is None
+
+
+def test_live_endpoints_are_never_cached():
+    """Test that a URL without a rule is not stored."""
+    url = "https://api-web.nhle.com/v1/scoreboard/now"
+    response_cache.store(url, "{}", {})
+
+    assert response_cache.lookup(url) is None
+
+
+def test_post_requests_skip_cache(mock_session):
+    """Test that only GET responses are cached."""
+    mock_session.request.return_value = json_response(score_payload("OFF"))
+
+    exponential_backoff_request(SCORE_URL, method="post")
+
+    assert response_cache.lookup(SCORE_URL) is None
+
+
+def test_memory_backend_drops_least_recently_used():
+    """Test that the LRU keeps the entries read most recently."""
+    backend = MemoryBackend(max_entries=2)
+    backend.put("a", (1, "a"))
+    backend.put("b", (1, "b"))
+    backend.get("a")
+    backend.put("c", (1, "c"))
+
+    assert backend.get("a") == (1, "a")
+    assert backend.get("b") is None
+    assert backend.get("c") == (1, "c")
+
+
+def test_file_backend_round_trip(tmp_path):
+    """Test that file entries survive a new backend, forever entries included."""
+    FileBackend(str(tmp_path)).put(SCORE_URL, (float("inf"), '{"games": []}'))
+
+    assert FileBackend(str(tmp_path)).get(SCORE_URL) == (float("inf"), '{"games": []}')
+    assert FileBackend(str(tmp_path)).get(ROSTER_URL) is None
+
+
+def test_lookup_reads_file_backend(tmp_path):
+    """Test that a cold process is served from the file backend."""
+    with patch("response_cache._file", FileBackend(str(tmp_path))):
+        response_cache.store(SCORE_URL, json.dumps(score_payload("OFF")), score_payload("OFF"))
+        response_cache.clear()
+
+        assert response_cache.lookup(SCORE_URL) == score_payload("OFF")
+
+
+def test_use_file_backend(tmp_path):
+    """Test that a file backend can be turned on and off after config was imported."""
+    with patch("response_cache._file", None):
+        response_cache.use_file_backend(str(tmp_path))
+        response_cache.store(SCORE_URL, json.dumps(score_payload("OFF")), score_payload("OFF"))
+        response_cache.clear()
+        assert response_cache.lookup(SCORE_URL) == score_payload("OFF")
+
+        response_cache.use_file_backend(None)
+        response_cache.clear()
+        assert response_cache.lookup(SCORE_URL) is None
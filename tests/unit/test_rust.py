@@ -1,4 +1,6 @@
 import make_predictions_rust
+import numpy as np
+import pytest
 
 from service import get_min_max
 
@@ -122,3 +124,256 @@ def test_predict():
     ]
     for i in range(5):
         assert rust_probabilities[i] == expected_probabilities[i]
+
+
+def get_rust_features():
+    columns = make_predictions_rust.FEATURE_COLUMNS
+    return np.array(
+        [[getattr(player, column) for column in columns] for player in get_rust_players()], dtype=np.float32
+    )
+
+
+def test_predict_array_matches_predict():
+    expected = make_predictions_rust.predict(get_rust_players(), get_rust_min_max(), get_rust_weights())
+
+    probabilities = make_predictions_rust.predict_array(get_rust_features(), get_rust_min_max(), get_rust_weights())
+
+    assert probabilities.dtype == np.float32
+    assert probabilities.tolist() == expected
+
+
+def test_predict_array_columns_into_out():
+    expected = make_predictions_rust.predict(get_rust_players(), get_rust_min_max(), get_rust_weights())
+    columns = [np.ascontiguousarray(column) for column in get_rust_features().T]
+    out = np.empty(len(expected), dtype=np.float32)
+
+    result = make_predictions_rust.predict_array(columns, get_rust_min_max(), get_rust_weights(), out=out)
+
+    assert result is out
+    assert out.tolist() == expected
+
+
+def test_predict_array_partial_lane_block():
+    # 19 rows cover two full 8-player blocks and a partial one
+    features = np.tile(get_rust_features(), (4, 1))[:19]
+    expected = make_predictions_rust.predict(get_rust_players(), get_rust_min_max(), get_rust_weights()) * 4
+
+    from_matrix = make_predictions_rust.predict_array(features, get_rust_min_max(), get_rust_weights())
+    from_columns = make_predictions_rust.predict_array(list(features.T.copy()), get_rust_min_max(), get_rust_weights())
+    from_batch = make_predictions_rust.predict(
+        make_predictions_rust.PlayerBatch(features), get_rust_min_max(), get_rust_weights()
+    )
+
+    assert from_matrix.tolist() == expected[:19]
+    assert from_columns.tolist() == expected[:19]
+    assert from_batch == expected[:19]
+
+
+def test_predict_array_rejects_wrong_shape():
+    with pytest.raises(ValueError, match="feature columns"):
+        make_predictions_rust.predict_array(np.zeros((5, 3), dtype=np.float32), get_rust_min_max(), get_rust_weights())
+
+
+def get_rust_testing_players():
+    players = get_rust_players()
+    dates = ["2025-01-01", "2025-01-01", "2025-01-01", "2025-01-02", "2025-01-02"]
+    tims = [1, 1, 2, 1, 3]
+    scored = [0.0, 1.0, 1.0, 1.0, 0.0]
+    for player, date, group, goal in zip(players, dates, tims, scored):
+        player.date = date
+        player.tims = group
+        player.scored = goal
+    return players
+
+
+def get_rust_weight_combinations():
+    return [
+        get_rust_weights(),
+        make_predictions_rust.Weights(
+            gpg=0.0, five_gpg=0.0, hgpg=0.0, tgpg=0.0, otga=0.0, hppg_otshga=0.0, is_home=1.0
+        ),
+        make_predictions_rust.Weights(
+            gpg=1.0, five_gpg=0.0, hgpg=0.0, tgpg=0.0, otga=0.0, hppg_otshga=0.0, is_home=0.0
+        ),
+    ]
+
+
+def test_player_batch_from_players():
+    batch = make_predictions_rust.PlayerBatch.from_players(get_rust_testing_players())
+
+    assert len(batch) == 5
+    assert batch.num_dates == 2
+
+
+def test_player_batch_predict_matches_rows():
+    players = get_rust_players()
+    batch = make_predictions_rust.PlayerBatch(get_rust_features())
+
+    expected = make_predictions_rust.predict(players, get_rust_min_max(), get_rust_weights())
+
+    assert make_predictions_rust.predict(batch, get_rust_min_max(), get_rust_weights()) == expected
+
+
+def test_player_batch_test_weights_matches_rows():
+    players = get_rust_testing_players()
+    batch = make_predictions_rust.PlayerBatch(
+        get_rust_features(),
+        scored=np.array([player.scored for player in players], dtype=np.float32),
+        tims=np.array([player.tims for player in players], dtype=np.int32),
+        dates=np.array([0, 0, 0, 1, 1], dtype=np.int32),
+    )
+
+    best_rows = make_predictions_rust.test_weights(players, get_rust_min_max(), get_rust_weight_combinations())
+    best_batch = make_predictions_rust.test_weights(batch, get_rust_min_max(), get_rust_weight_combinations())
+
+    assert str(best_batch[0]) == str(best_rows[0])
+    assert best_batch[1:] == best_rows[1:]
+    assert best_batch[2] == 6
+
+
+def test_search_weights_matches_test_weights():
+    players = get_rust_testing_players()
+    flat = make_predictions_rust.WeightGenerator(25).next_chunk(1000)
+    weight_combinations = [
+        make_predictions_rust.Weights(
+            gpg=flat[i],
+            five_gpg=flat[i + 1],
+            hgpg=flat[i + 2],
+            tgpg=flat[i + 3],
+            otga=flat[i + 4],
+            hppg_otshga=flat[i + 5],
+            is_home=flat[i + 6],
+        )
+        for i in range(0, len(flat), 7)
+    ]
+    batch = make_predictions_rust.PlayerBatch.from_players(players)
+
+    tested = make_predictions_rust.test_weights(batch, get_rust_min_max(), weight_combinations)
+    searched = make_predictions_rust.search_weights(batch, get_rust_min_max(), 25)
+
+    assert len(weight_combinations) == 210
+    assert str(searched[0]) == str(tested[0])
+    assert searched[1:] == tested[1:]
+
+
+def test_early_exit_keeps_best():
+    batch = make_predictions_rust.PlayerBatch.from_players(get_rust_testing_players())
+    weight_combinations = make_predictions_rust.WeightSpace(25).weights_in(0, 210)
+
+    tested = make_predictions_rust.test_weights(batch, get_rust_min_max(), weight_combinations)
+    bounded = make_predictions_rust.test_weights(batch, get_rust_min_max(), weight_combinations, early_exit=True)
+    searched = make_predictions_rust.search_weights(batch, get_rust_min_max(), 25, early_exit=True)
+    seeded = make_predictions_rust.search_weights(
+        batch, get_rust_min_max(), 25, early_exit=True, best_known=tested[1] + 1
+    )
+
+    assert str(bounded[0]) == str(tested[0])
+    assert bounded[1:] == tested[1:]
+    assert str(searched[0]) == str(tested[0])
+    assert searched[1:] == tested[1:]
+    # Nothing can reach a count above the best, so every combination stops early
+    assert seeded[1] == -1
+
+
+def test_player_batch_prune_keeps_results():
+    batch = make_predictions_rust.PlayerBatch.from_players(get_rust_testing_players())
+
+    pruned, kept = batch.prune(get_rust_min_max())
+
+    # The second 2025-01-01 Tims 1 player trails the first on every stat
+    assert kept == [0, 2, 3, 4]
+    assert len(pruned) == 4
+    assert pruned.num_dates == batch.num_dates
+    for weights in get_rust_weight_combinations():
+        expected = make_predictions_rust.test_weights(batch, get_rust_min_max(), [weights])
+        assert make_predictions_rust.test_weights(pruned, get_rust_min_max(), [weights])[1:] == expected[1:]
+
+
+def test_player_batch_rejects_mismatched_columns():
+    with pytest.raises(ValueError, match="tims has length"):
+        make_predictions_rust.PlayerBatch(get_rust_features(), tims=np.zeros(3, dtype=np.int32))
+
+
+def weight_values(weights):
+    return (
+        weights.gpg,
+        weights.five_gpg,
+        weights.hgpg,
+        weights.tgpg,
+        weights.otga,
+        weights.hppg_otshga,
+        weights.is_home,
+    )
+
+
+def test_weight_space_count_and_rank():
+    space = make_predictions_rust.WeightSpace(25)
+
+    assert space.count == 210
+    assert len(make_predictions_rust.WeightSpace(1)) == 1_705_904_746
+    assert weight_values(space.weights_at(0)) == (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    assert weight_values(space.weights_at(209)) == (1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    for rank in (0, 1, 57, 209):
+        assert space.rank_of(space.weights_at(rank)) == rank
+
+
+def test_weight_space_rejects_bad_input():
+    space = make_predictions_rust.WeightSpace(25)
+
+    with pytest.raises(IndexError):
+        space.weights_at(210)
+    with pytest.raises(ValueError, match="step grid"):
+        space.rank_of(get_rust_weights())
+    with pytest.raises(ValueError, match="step_size"):
+        make_predictions_rust.WeightSpace(0)
+
+
+def test_weight_generator_slices_match_full_order():
+    space = make_predictions_rust.WeightSpace(25)
+    full = [weight_values(weights) for weights in make_predictions_rust.generate_weight_permutations(25)]
+
+    generator = make_predictions_rust.WeightGenerator(25, start=50, end=60)
+    flat = generator.next_chunk(4) + generator.next_chunk(100)
+
+    assert full == [weight_values(weights) for weights in space.weights_in(0, space.count)]
+    assert [tuple(flat[i : i + 7]) for i in range(0, len(flat), 7)] == full[50:60]
+    assert generator.remaining == 0
+    assert generator.next_chunk(10) == []
+
+
+def test_evaluate_weight_array_matches_test_weights():
+    batch = make_predictions_rust.PlayerBatch.from_players(get_rust_testing_players())
+    combinations = get_rust_weight_combinations()
+    weights = np.array([weight_values(weights) for weights in combinations], dtype=np.float32)
+
+    correct, total = make_predictions_rust.evaluate_weight_array(batch, get_rust_min_max(), weights)
+
+    assert correct.dtype == np.int32
+    assert total == 6
+    for weights, count in zip(combinations, correct.tolist()):
+        assert make_predictions_rust.test_weights(batch, get_rust_min_max(), [weights])[1] == count
+
+
+def test_evaluate_weight_array_tiles_match_single_weights():
+    batch = make_predictions_rust.PlayerBatch.from_players(get_rust_testing_players())
+    # More than one tile of weights, straight from the generator's flat chunks
+    flat = make_predictions_rust.WeightGenerator(25).next_chunk(1000)
+    weights = np.array(flat, dtype=np.float32).reshape(-1, 7)
+    space = make_predictions_rust.WeightSpace(25)
+
+    correct, total = make_predictions_rust.evaluate_weight_array(batch, get_rust_min_max(), weights)
+
+    assert len(correct) == 210
+    for rank, count in enumerate(correct.tolist()):
+        # Early exit scores one combination at a time, never cutting the only one short
+        single = make_predictions_rust.test_weights(
+            batch, get_rust_min_max(), [space.weights_at(rank)], early_exit=True
+        )
+        assert single[1:] == (count, total)
+
+
+def test_evaluate_weight_array_rejects_wrong_shape():
+    batch = make_predictions_rust.PlayerBatch.from_players(get_rust_testing_players())
+
+    with pytest.raises(ValueError, match="weight columns"):
+        make_predictions_rust.evaluate_weight_array(batch, get_rust_min_max(), np.zeros((2, 6), dtype=np.float32))
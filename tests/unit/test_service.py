@@ -1,11 +1,19 @@
+import json
 from datetime import datetime
 from unittest.mock import patch
 
+import pytest
 import pytz
+import requests
+from smartscore_info_client.schemas.team_info import TeamInfo
 
+import deadline
 from service import (
+    backfill_dates,
     choose_picks,
     get_date,
+    get_injury_data,
+    get_players_from_teams,
     merge_injury_data,
     send_emails,
     separate_players,
@@ -293,3 +301,182 @@ def test_send_emails_sends_when_feature_flag_enabled(mock_feature_enabled, mock_
     mock_feature_enabled.assert_called_once_with("send_emails")
     mock_get_date.assert_called_once()
     mock_send_email.assert_called_once_with("test@example.com", picks, "Tester", "2026-04-16")
+
+
+@patch("service.exponential_backoff_request")
+def test_get_players_from_teams_keeps_team_order(mock_request):
+    """Test that each team gets its own roster, in the order the teams were given."""
+    reinhart = {"id": 1, "firstName": {"default": "Sam"}, "lastName": {"default": "Reinhart"}}
+    hedman = {"id": 2, "firstName": {"default": "Victor"}, "lastName": {"default": "Hedman"}}
+    rosters = {
+        "FLA": {"forwards": [reinhart], "defensemen": []},
+        "TBL": {"forwards": [], "defensemen": [hedman]},
+    }
+    mock_request.side_effect = lambda url: rosters[url.split("/")[-2]]
+    teams = [
+        TeamInfo(team_name="Florida", team_abbr="FLA", season="20242025", team_id=13, opponent_id=14, home=True),
+        TeamInfo(team_name="Tampa Bay", team_abbr="TBL", season="20242025", team_id=14, opponent_id=13, home=False),
+    ]
+
+    result = get_players_from_teams(teams, requests_per_second=1000, burst=2)
+
+    assert [[player.name for player in players] for players in result] == [["Sam Reinhart"], ["Victor Hedman"]]
+    assert [player.team_id for players in result for player in players] == [13, 14]
+    assert mock_request.call_count == 2
+
+
+def test_get_players_from_teams_no_teams():
+    """Test that no teams means no requests."""
+    assert get_players_from_teams([]) == []
+
+
+def score_response(*games):
+    return {"games": list(games)}
+
+
+def final_game(home, away, *scorers):
+    return {
+        "gameScheduleState": "OK",
+        "gameOutcome": {"lastPeriodType": "REG"},
+        "homeTeam": {"abbrev": home},
+        "awayTeam": {"abbrev": away},
+        "goals": [{"playerId": scorer} for scorer in scorers],
+    }
+
+
+def live_game(home, away):
+    return {"gameScheduleState": "OK", "homeTeam": {"abbrev": home}, "awayTeam": {"abbrev": away}}
+
+
+def postponed_game(home, away):
+    return {"gameScheduleState": "PPD", "homeTeam": {"abbrev": home}, "awayTeam": {"abbrev": away}}
+
+
+@pytest.fixture
+def backfill_mocks():
+    with (
+        patch("service.get_date", return_value="2025-01-14"),
+        patch("service.invoke_lambda") as mock_invoke,
+        patch("service.exponential_backoff_request") as mock_request,
+    ):
+        yield mock_invoke, mock_request
+
+
+def unscored(mock_invoke, dates):
+    mock_invoke.side_effect = lambda name, payload, **kwargs: (
+        {"body": {"dates": json.dumps(dates)}} if payload["method"] == "GET_DATES_NO_SCORED" else {}
+    )
+
+
+def posted_payloads(mock_invoke):
+    return [call[0][1] for call in mock_invoke.call_args_list if call[0][1]["method"] != "GET_DATES_NO_SCORED"]
+
+
+def test_backfill_dates_skips_incomplete_date(backfill_mocks):
+    """Test that an unfinished date no longer stops the complete dates from being saved."""
+    mock_invoke, mock_request = backfill_mocks
+    unscored(mock_invoke, ["2025-01-12", "2025-01-13", "2025-01-14", "2025-01-15"])
+    responses = {
+        "2025-01-12": score_response(final_game("TOR", "MTL", 1, 2, 1)),
+        "2025-01-13": score_response(final_game("BOS", "NYR"), live_game("EDM", "CGY")),
+        "2025-01-14": score_response(final_game("VAN", "SEA", 3)),
+    }
+    mock_request.side_effect = lambda url: responses[url.rsplit("/", 1)[-1]]
+
+    backfill_dates()
+
+    # The future date is never fetched
+    assert mock_request.call_count == 3
+    [payload] = posted_payloads(mock_invoke)
+    assert payload["method"] == "POST_BACKFILL"
+    assert sorted(payload["data"]["2025-01-12"]) == [1, 2]
+    assert payload["data"]["2025-01-14"] == [3]
+    assert "2025-01-13" not in payload["data"]
+
+
+def postponed_responses(mock_request):
+    responses = {
+        "2025-01-12": score_response(postponed_game("TOR", "MTL"), final_game("BOS", "NYR", 5)),
+        "2025-01-13": score_response(postponed_game("EDM", "CGY")),
+    }
+    mock_request.side_effect = lambda url: responses[url.rsplit("/", 1)[-1]]
+
+
+@patch("service.is_feature_enabled", return_value=True)
+def test_backfill_dates_batches_postponed_games(mock_feature_enabled, backfill_mocks):
+    """Test that postponed games are deleted in the same POST_BACKFILL, not one invoke each."""
+    mock_invoke, mock_request = backfill_mocks
+    unscored(mock_invoke, ["2025-01-12", "2025-01-13"])
+    postponed_responses(mock_request)
+
+    backfill_dates()
+
+    mock_feature_enabled.assert_called_with("batch_delete_games")
+    [payload] = posted_payloads(mock_invoke)
+    assert payload["data"] == {"2025-01-12": [5], "2025-01-13": []}
+    assert payload["delete_games"] == [
+        {"date": "2025-01-12", "home": "TOR", "away": "MTL"},
+        {"date": "2025-01-13", "home": "EDM", "away": "CGY"},
+    ]
+
+
+@patch("service.is_feature_enabled", return_value=False)
+def test_backfill_dates_deletes_postponed_games_one_by_one(mock_feature_enabled, backfill_mocks):
+    """Test that without the flag each postponed game still gets its own DELETE_GAME."""
+    mock_invoke, mock_request = backfill_mocks
+    unscored(mock_invoke, ["2025-01-12", "2025-01-13"])
+    postponed_responses(mock_request)
+
+    backfill_dates()
+
+    deletes, backfill = posted_payloads(mock_invoke)[:-1], posted_payloads(mock_invoke)[-1]
+    assert deletes == [
+        {"method": "DELETE_GAME", "date": "2025-01-12", "home": "TOR", "away": "MTL"},
+        {"method": "DELETE_GAME", "date": "2025-01-13", "home": "EDM", "away": "CGY"},
+    ]
+    assert all(call[1] == {"wait": False} for call in mock_invoke.call_args_list if call[0][1] in deletes)
+    assert backfill == {"method": "POST_BACKFILL", "data": {"2025-01-12": [5], "2025-01-13": []}}
+
+
+def test_backfill_dates_nothing_complete(backfill_mocks):
+    """Test that nothing is posted when no date is complete yet."""
+    mock_invoke, mock_request = backfill_mocks
+    unscored(mock_invoke, ["2025-01-14"])
+    mock_request.return_value = score_response(live_game("TOR", "MTL"))
+
+    backfill_dates()
+
+    assert posted_payloads(mock_invoke) == []
+
+
+def test_backfill_dates_saves_before_raising(backfill_mocks):
+    """Test that a failed fetch still lets the other dates be saved, then fails the run."""
+    mock_invoke, mock_request = backfill_mocks
+    unscored(mock_invoke, ["2025-01-12", "2025-01-13"])
+
+    def fetch(url):
+        if url.endswith("2025-01-13"):
+            raise Exception("Max retries reached. Request failed.")
+        return score_response(final_game("TOR", "MTL", 1))
+
+    mock_request.side_effect = fetch
+
+    with pytest.raises(Exception, match="Max retries reached"):
+        backfill_dates()
+
+    [payload] = posted_payloads(mock_invoke)
+    assert payload["data"] == {"2025-01-12": [1]}
+
+
+@patch("http_client.time.sleep")
+@patch("http_client.get_session")
+def test_get_injury_data_goes_without_when_out_of_time(mock_get_session, mock_sleep):
+    """Test that a slow injury report near the deadline is skipped instead of failing the handler."""
+    mock_get_session.return_value.request.side_effect = requests.exceptions.Timeout("Timeout")
+    token = deadline.start(deadline.DEADLINE_MARGIN + 0.5)
+    try:
+        assert get_injury_data() == []
+    finally:
+        deadline.reset(token)
+
+    mock_sleep.assert_not_called()
@@ -1,5 +1,6 @@
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
 from service import calculate_metrics, get_tims, make_predictions_teams
@@ -19,7 +20,7 @@ def test_make_predictions_teams_basic(mock_rust, mock_min_max):
         "hppg": {"min": 0.0, "max": 0.314},
     }
 
-    mock_rust.predict.return_value = [0.65, 0.75]
+    mock_rust.predict_array.return_value = np.array([0.65, 0.75])
 
     players = [
         {
@@ -51,7 +52,12 @@ def test_make_predictions_teams_basic(mock_rust, mock_min_max):
     assert len(result) == 2
     assert result[0]["stat"] == 0.65
     assert result[1]["stat"] == 0.75
-    mock_rust.predict.assert_called_once()
+    mock_rust.predict_array.assert_called_once()
+
+    features = mock_rust.predict_array.call_args[0][0]
+    assert features.dtype == np.float32
+    assert features.shape == (2, 8)
+    assert features[0].tolist() == pytest.approx([0.5, 0.6, 0.55, 3.0, 2.5, 0.2, 0.5, 1.0])
 
 
 def test_get_tims_with_matching_players():
@@ -0,0 +1,357 @@
+import base64
+import csv
+import datetime
+import gzip
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import response_cache
+
+sys.path.append(str(Path(__file__).parent.parent.parent / "smartscore" / "scripts"))
+from shared import (  # noqa: E402
+    create_csv,
+    create_min_max_dict,
+    dates_to_sync,
+    file_sha256,
+    iter_json_array,
+    iter_payload_text,
+    merge_dates,
+    prune_batch,
+    read_column_cache,
+    sync_csv,
+    use_http_cache,
+    write_column_cache,
+)
+
+
+def random_chunks(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(1, 8))))
+    return [text[start:end] for start, end in zip([0, *cuts], [*cuts, len(text)])]
+
+
+def test_iter_json_array_number_split_at_chunk_boundary():
+    assert list(iter_json_array(["[ 186.", "99]"])) == [186.99]
+    assert list(iter_json_array(["[1", "2, 3", "e2 ,", "-4]"])) == [12, 300.0, -4]
+    assert list(iter_json_array(["[tr", "ue, nu", "ll]"])) == [True, None]
+
+
+def test_iter_json_array_random_chunk_boundaries():
+    rng = random.Random(3)  # noqa: S311
+    for _ in range(500):
+        items = [
+            rng.choice(
+                [
+                    round(rng.uniform(-1e3, 1e3), rng.randint(0, 4)),
+                    rng.randint(-(10**6), 10**6),
+                    1.5e-7,
+                    'a, ]"b',
+                    True,
+                    None,
+                    {"date": "2025-01-01", "gpg": 0.25, "tims": [1, 2]},
+                ]
+            )
+            for _ in range(rng.randint(0, 6))
+        ]
+        text = json.dumps(items, indent=rng.choice([None, 1]))
+
+        assert list(iter_json_array(random_chunks(text, rng))) == items
+
+
+def test_iter_json_array_rejects_truncated_array():
+    with pytest.raises(ValueError, match="closing bracket"):
+        list(iter_json_array(["[1, 2", ", 3"]))
+
+
+class FakeBatch:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def prune(self, min_max):
+        kept = [i for i, row in enumerate(self.rows) if row]
+        return FakeBatch([self.rows[i] for i in kept]), kept
+
+
+def test_prune_batch_reports_reduction(capsys):
+    pruned, kept = prune_batch(FakeBatch([1, 0, 1, 0]), None)
+
+    assert kept == [0, 2]
+    assert len(pruned) == 2
+    assert "kept 2 of 4 (50.0% fewer rows per weight)" in capsys.readouterr().out
+
+
+def test_prune_batch_empty_batch(capsys):
+    pruned, kept = prune_batch(FakeBatch([]), None)
+
+    assert kept == []
+    assert len(pruned) == 0
+    assert "kept 0 of 0 (0.0% fewer rows per weight)" in capsys.readouterr().out
+
+
+def test_create_min_max_dict():
+    features = ["gpg", "hgpg", "five_gpg", "tgpg", "otga", "hppg", "otshga"]
+    min_max = {name: {"min": i, "max": i + 10} for i, name in enumerate(features)}
+
+    flat = create_min_max_dict(min_max)
+
+    assert flat == {
+        key: value for i, name in enumerate(features) for key, value in ((f"min_{name}", i), (f"max_{name}", i + 10))
+    }
+    assert set(create_min_max_dict({})) == set(flat)
+    assert all(value is None for value in create_min_max_dict({}).values())
+
+
+@pytest.fixture
+def cached_csv(tmp_path):
+    """A CSV with its columns cached, as (csv_path, cache_path, columns)."""
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("name,scored\nA,1\nB,0\n", encoding="utf-8")
+    cache_path = tmp_path / "columns"
+    cache_path.mkdir()
+    columns = {"scored": np.array([1.0, 0.0], dtype=np.float32), "names": np.array(["A", "B"])}
+    write_column_cache(columns, file_sha256(csv_path), os.stat(csv_path), cache_path=str(cache_path))
+    return str(csv_path), str(cache_path), columns
+
+
+def read_manifest(cache_path):
+    with open(os.path.join(cache_path, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_column_cache_loads_read_only_memmaps(cached_csv):
+    csv_path, cache_path, columns = cached_csv
+
+    with patch("shared.file_sha256", wraps=file_sha256) as mock_hash:
+        cached = read_column_cache(csv_path, cache_path)
+
+    mock_hash.assert_not_called()
+    assert set(cached) == set(columns)
+    for name, values in columns.items():
+        assert isinstance(cached[name], np.memmap)
+        assert not cached[name].flags.writeable
+        np.testing.assert_array_equal(cached[name], values)
+    with pytest.raises(ValueError, match="read-only"):
+        cached["scored"][0] = 0.0
+
+
+def test_column_cache_rebuilds_on_size_change(cached_csv):
+    csv_path, cache_path, _ = cached_csv
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("C,1\n")
+
+    with patch("shared.file_sha256", wraps=file_sha256) as mock_hash:
+        assert read_column_cache(csv_path, cache_path) is None
+
+    # A different size is stale without hashing
+    mock_hash.assert_not_called()
+
+
+def test_column_cache_rehashes_on_mtime_change(cached_csv):
+    csv_path, cache_path, columns = cached_csv
+    manifest = read_manifest(cache_path)
+    os.utime(csv_path, ns=(manifest["mtime_ns"] + 10**9, manifest["mtime_ns"] + 10**9))
+
+    with patch("shared.file_sha256", wraps=file_sha256) as mock_hash:
+        cached = read_column_cache(csv_path, cache_path)
+
+    # Same contents, so the cache is kept and the manifest takes the new mtime
+    mock_hash.assert_called_once_with(csv_path)
+    np.testing.assert_array_equal(cached["scored"], columns["scored"])
+    assert read_manifest(cache_path) == dict(manifest, mtime_ns=manifest["mtime_ns"] + 10**9)
+
+    # The next read trusts the rewritten manifest without hashing again
+    with patch("shared.file_sha256", wraps=file_sha256) as mock_hash:
+        assert read_column_cache(csv_path, cache_path) is not None
+    mock_hash.assert_not_called()
+
+
+def test_column_cache_rebuilds_on_changed_contents(cached_csv):
+    csv_path, cache_path, _ = cached_csv
+    manifest = read_manifest(cache_path)
+    # Same size, different contents and mtime
+    Path(csv_path).write_text("name,scored\nA,0\nB,1\n", encoding="utf-8")
+    os.utime(csv_path, ns=(manifest["mtime_ns"] + 10**9, manifest["mtime_ns"] + 10**9))
+
+    assert read_column_cache(csv_path, cache_path) is None
+    assert read_manifest(cache_path) == manifest
+
+
+def test_column_cache_missing_manifest(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("name,scored\n", encoding="utf-8")
+
+    assert read_column_cache(str(csv_path), str(tmp_path)) is None
+
+
+def test_write_column_cache_drops_older_caches(cached_csv):
+    csv_path, cache_path, columns = cached_csv
+    old_sha256 = read_manifest(cache_path)["sha256"]
+    Path(csv_path).write_text("name,scored\nA,0\n", encoding="utf-8")
+
+    write_column_cache(columns, file_sha256(csv_path), os.stat(csv_path), cache_path=cache_path)
+
+    assert read_manifest(cache_path)["sha256"] == file_sha256(csv_path)
+    assert sorted(os.listdir(cache_path)) == sorted([file_sha256(csv_path), "manifest.json"])
+    assert old_sha256 not in os.listdir(cache_path)
+
+
+def write_rows(path, fieldnames, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+@pytest.fixture
+def local_csv(tmp_path):
+    path = tmp_path / "data.csv"
+    write_rows(
+        path,
+        ["date", "name", "scored"],
+        [
+            {"date": "2025-01-01", "name": "A", "scored": "1"},
+            {"date": "2025-01-02", "name": "B", "scored": ""},
+            {"date": "2025-01-02", "name": "C", "scored": "0"},
+        ],
+    )
+    return str(path)
+
+
+def test_dates_to_sync_unscored_and_newest_to_today():
+    dates = dates_to_sync("2025-01-10", {"2024-12-30", "2025-01-11"}, today=datetime.date(2025, 1, 12))
+
+    assert dates == ["2024-12-30", "2025-01-10", "2025-01-11", "2025-01-12"]
+
+
+def test_dates_to_sync_newest_is_today():
+    assert dates_to_sync("2025-01-12", set(), today=datetime.date(2025, 1, 12)) == ["2025-01-12"]
+
+
+def test_merge_dates_replaces_fetched_dates(local_csv):
+    merge_dates(
+        {
+            "2025-01-02": [{"date": "2025-01-02", "name": "B", "scored": "1", "odds": "250"}],
+            "2025-01-03": [{"date": "2025-01-03", "name": "D", "scored": "", "odds": "300"}],
+        },
+        local_csv,
+    )
+
+    fieldnames, rows = read_rows(local_csv)
+    # New columns are appended, older rows leave them empty
+    assert fieldnames == ["date", "name", "scored", "odds"]
+    assert rows == [
+        {"date": "2025-01-01", "name": "A", "scored": "1", "odds": ""},
+        {"date": "2025-01-02", "name": "B", "scored": "1", "odds": "250"},
+        {"date": "2025-01-03", "name": "D", "scored": "", "odds": "300"},
+    ]
+
+
+def test_merge_dates_replaces_file_atomically(local_csv):
+    before = Path(local_csv).read_bytes()
+
+    with patch("shared.os.replace", side_effect=OSError("disk full")) as mock_replace:
+        with pytest.raises(OSError, match="disk full"):
+            merge_dates({"2025-01-02": [{"date": "2025-01-02", "name": "B", "scored": "1"}]}, local_csv)
+
+    # Written in full next to the CSV and only then renamed over it
+    mock_replace.assert_called_once_with(f"{local_csv}.{os.getpid()}.tmp", local_csv)
+    assert Path(local_csv).read_bytes() == before
+
+
+def test_sync_csv_keeps_dates_fetched_empty(local_csv, capsys):
+    fetched = {
+        "2025-01-02": [],
+        "2025-01-03": [{"date": "2025-01-03", "name": "D", "scored": ""}],
+    }
+    with patch("shared.fetch_dates", return_value=fetched) as mock_fetch:
+        sync_csv(local_csv)
+
+    # 2025-01-02 still has an unscored row, so it is requested again
+    assert mock_fetch.call_args.args[0][:2] == ["2025-01-02", "2025-01-03"]
+    _, rows = read_rows(local_csv)
+    assert [(row["date"], row["name"]) for row in rows] == [
+        ("2025-01-01", "A"),
+        ("2025-01-02", "B"),
+        ("2025-01-02", "C"),
+        ("2025-01-03", "D"),
+    ]
+    assert "Updated 1 rows over 1 dates" in capsys.readouterr().out
+
+
+def test_sync_csv_leaves_file_when_nothing_new(local_csv, capsys):
+    before = Path(local_csv).read_bytes()
+
+    with patch("shared.fetch_dates", return_value={"2025-01-02": []}):
+        sync_csv(local_csv)
+
+    assert Path(local_csv).read_bytes() == before
+    assert "Local data is up to date" in capsys.readouterr().out
+
+
+def get_all_response(entries):
+    return {"entries": base64.b64encode(gzip.compress(json.dumps(entries).encode("utf-8"))).decode("ascii")}
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "lib" / "data.csv"
+    with patch("shared.PATH", str(tmp_path / "lib")), patch("shared.DATA_PATH", str(path)):
+        yield path
+
+
+@pytest.mark.parametrize(
+    "entries, expected",
+    [
+        (
+            [{"date": "2025-01-01", "name": "A", "scored": 1}, {"date": "2025-01-01", "name": "B", "scored": None}],
+            "date,name,scored\r\n2025-01-01,A,1\r\n2025-01-01,B,\r\n",
+        ),
+        (
+            # Fields missing from earlier rows are written empty
+            [
+                {"date": "2025-01-01", "name": "A", "scored": 1},
+                {"date": "2025-01-02", "name": "B, Jr.", "odds": 250, "scored": 0},
+                {"name": "C"},
+            ],
+            'date,name,scored,odds\r\n2025-01-01,A,1,\r\n2025-01-02,"B, Jr.",0,250\r\n,C,,\r\n',
+        ),
+        ([], "\r\n"),
+    ],
+)
+def test_create_csv_decodes_payload_once(data_path, entries, expected):
+    with (
+        patch("shared.invoke_lambda", return_value=get_all_response(entries)),
+        patch("shared.iter_payload_text", wraps=iter_payload_text) as mock_text,
+    ):
+        create_csv()
+
+    mock_text.assert_called_once()
+    assert data_path.read_bytes().decode("utf-8") == expected
+    assert os.listdir(data_path.parent) == ["data.csv"]
+
+
+def test_use_http_cache(tmp_path):
+    with patch("response_cache._file", None):
+        use_http_cache(str(tmp_path))
+
+        response_cache.store(
+            "https://api-web.nhle.com/v1/wsc/game-story/2024020001", '{"gameState": "OFF"}', {"gameState": "OFF"}
+        )
+
+    response_cache.clear()
+    assert len(list(tmp_path.glob("*.json"))) == 1
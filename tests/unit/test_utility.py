@@ -4,93 +4,98 @@ from unittest.mock import MagicMock, patch
 import pytest
 import requests
 
-from utility import create_cron_schedule, exponential_backoff_request
+from utility import TokenBucket, create_cron_schedule, exponential_backoff_request
 
 
-@patch("utility.requests.get")
-def test_exponential_backoff_request_success(mock_get):
+@pytest.fixture
+def mock_session():
+    with patch("http_client.get_session") as mock:
+        yield mock.return_value
+
+
+@pytest.fixture
+def mock_sleep():
+    # No jitter, so every delay is the plain exponential backoff
+    with patch("http_client.time.sleep") as sleep, patch("http_client.random.random", return_value=0.0):
+        yield sleep
+
+
+def ok_response(data):
+    return MagicMock(status_code=200, json=lambda: data)
+
+
+def test_exponential_backoff_request_success(mock_session):
     """Test successful GET request."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"data": "success"}
-    mock_get.return_value = mock_response
+    mock_session.request.return_value = ok_response({"data": "success"})
 
     result = exponential_backoff_request("http://test.com")
 
     assert result == {"data": "success"}
-    mock_get.assert_called_once()
+    mock_session.request.assert_called_once()
+    assert mock_session.request.call_args[0] == ("get", "http://test.com")
 
 
-@patch("utility.requests.post")
-def test_exponential_backoff_request_post_success(mock_post):
+def test_exponential_backoff_request_post_success(mock_session):
     """Test successful POST request."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"status": "created"}
-    mock_post.return_value = mock_response
+    mock_session.request.return_value = ok_response({"status": "created"})
 
     result = exponential_backoff_request("http://test.com", method="post", json_data={"key": "value"})
 
     assert result == {"status": "created"}
-    mock_post.assert_called_once()
+    mock_session.request.assert_called_once()
+    assert mock_session.request.call_args[0][0] == "post"
+    assert mock_session.request.call_args[1]["json"] == {"key": "value"}
 
 
-@patch("utility.requests.post")
-def test_exponential_backoff_request_with_form_data(mock_post):
+def test_exponential_backoff_request_with_form_data(mock_session):
     """Test POST request with form data."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"status": "created"}
-    mock_post.return_value = mock_response
+    mock_session.request.return_value = ok_response({"status": "created"})
 
     result = exponential_backoff_request("http://test.com", method="post", data={"form": "data"})
 
     assert result == {"status": "created"}
-    assert mock_post.call_args[1]["data"] == {"form": "data"}
+    assert mock_session.request.call_args[1]["data"] == {"form": "data"}
 
 
-@patch("utility.time.sleep")
-@patch("utility.requests.get")
-def test_exponential_backoff_request_retry(mock_get, mock_sleep):
+def test_exponential_backoff_request_retry(mock_session, mock_sleep):
     """Test retry logic on failure."""
-    mock_get.side_effect = [
+    mock_session.request.side_effect = [
         requests.exceptions.Timeout("Timeout"),
         requests.exceptions.Timeout("Timeout"),
-        MagicMock(json=lambda: {"data": "success"}),
+        ok_response({"data": "success"}),
     ]
 
     result = exponential_backoff_request("http://test.com", max_retries=5)
 
     assert result == {"data": "success"}
-    assert mock_get.call_count == 3
+    assert mock_session.request.call_count == 3
     assert mock_sleep.call_count == 2
     # Check exponential backoff delays
     assert mock_sleep.call_args_list[0][0][0] == 1  # 1 * 2^0
     assert mock_sleep.call_args_list[1][0][0] == 2  # 1 * 2^1
 
 
-@patch("utility.time.sleep")
-@patch("utility.requests.get")
-def test_exponential_backoff_request_max_retries_exceeded(mock_get, mock_sleep):
+def test_exponential_backoff_request_max_retries_exceeded(mock_session, mock_sleep):
     """Test when max retries are exceeded."""
-    mock_get.side_effect = requests.exceptions.Timeout("Timeout")
+    mock_session.request.side_effect = requests.exceptions.Timeout("Timeout")
 
     with pytest.raises(Exception, match="Max retries reached"):
         exponential_backoff_request("http://test.com", max_retries=3)
 
-    assert mock_get.call_count == 3
-    assert mock_sleep.call_count == 3
+    assert mock_session.request.call_count == 3
+    # No wait after the last attempt
+    assert mock_sleep.call_count == 2
 
 
-@patch("utility.requests.get")
-def test_exponential_backoff_request_with_headers(mock_get):
+def test_exponential_backoff_request_with_headers(mock_session):
     """Test request with custom headers."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"data": "success"}
-    mock_get.return_value = mock_response
+    mock_session.request.return_value = ok_response({"data": "success"})
 
     headers = {"Authorization": "Bearer token"}
     result = exponential_backoff_request("http://test.com", headers=headers)
 
     assert result == {"data": "success"}
-    assert mock_get.call_args[1]["headers"] == headers
+    assert mock_session.request.call_args[1]["headers"] == headers
 
 
 def test_exponential_backoff_request_invalid_method():
@@ -99,31 +104,29 @@ def test_exponential_backoff_request_invalid_method():
         exponential_backoff_request("http://test.com", method="delete")
 
 
-@patch("utility.time.sleep")
-@patch("utility.requests.get")
-def test_exponential_backoff_request_connection_error(mock_get, mock_sleep):
+def test_exponential_backoff_request_connection_error(mock_session, mock_sleep):
     """Test retry on connection error."""
-    mock_get.side_effect = [
+    mock_session.request.side_effect = [
         requests.exceptions.ConnectionError("Connection failed"),
-        MagicMock(json=lambda: {"data": "success"}),
+        ok_response({"data": "success"}),
     ]
 
     result = exponential_backoff_request("http://test.com", max_retries=3)
 
     assert result == {"data": "success"}
-    assert mock_get.call_count == 2
+    assert mock_session.request.call_count == 2
 
 
-@patch("utility.time.sleep")
-@patch("utility.requests.get")
-def test_exponential_backoff_request_http_error(mock_get, mock_sleep):
+def test_exponential_backoff_request_http_error(mock_session, mock_sleep):
     """Test retry on HTTP error status."""
-    mock_response = MagicMock()
-    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("500 Server Error")
+    mock_response = MagicMock(status_code=500, headers={})
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+        "500 Server Error", response=mock_response
+    )
 
-    mock_get.side_effect = [
+    mock_session.request.side_effect = [
         mock_response,
-        MagicMock(json=lambda: {"data": "success"}),
+        ok_response({"data": "success"}),
     ]
 
     result = exponential_backoff_request("http://test.com", max_retries=3)
@@ -131,13 +134,24 @@ def test_exponential_backoff_request_http_error(mock_get, mock_sleep):
     assert result == {"data": "success"}
 
 
-@patch("utility.time.sleep")
-@patch("utility.requests.get")
-def test_exponential_backoff_request_custom_base_delay(mock_get, mock_sleep):
+def test_exponential_backoff_request_client_error_not_retried(mock_session, mock_sleep):
+    """Test that a client error other than a rate limit fails without retrying."""
+    mock_response = MagicMock(status_code=404, headers={})
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404 Not Found", response=mock_response)
+    mock_session.request.return_value = mock_response
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        exponential_backoff_request("http://test.com", max_retries=3)
+
+    assert mock_session.request.call_count == 1
+    assert mock_sleep.call_count == 0
+
+
+def test_exponential_backoff_request_custom_base_delay(mock_session, mock_sleep):
     """Test custom base delay."""
-    mock_get.side_effect = [
+    mock_session.request.side_effect = [
         requests.exceptions.Timeout("Timeout"),
-        MagicMock(json=lambda: {"data": "success"}),
+        ok_response({"data": "success"}),
     ]
 
     result = exponential_backoff_request("http://test.com", base_delay=2, max_retries=3)
@@ -190,3 +204,40 @@ def test_create_cron_schedule_new_year():
     result = create_cron_schedule(dt)
 
     assert result == "cron(0 0 1 1 ? 2025)"
+
+
+@patch("utility.time.sleep")
+@patch("utility.time.monotonic")
+def test_token_bucket_allows_burst_then_waits(mock_monotonic, mock_sleep):
+    """Test that a full bucket serves a burst without sleeping, then waits for a refill."""
+    mock_monotonic.return_value = 100.0
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert mock_sleep.call_count == 0
+
+    # Time moves on while sleeping
+    mock_sleep.side_effect = lambda seconds: setattr(mock_monotonic, "return_value", 100.0 + seconds)
+    bucket.acquire()
+
+    mock_sleep.assert_called_once_with(0.5)
+
+
+@patch("utility.time.monotonic")
+def test_token_bucket_refills_up_to_capacity(mock_monotonic):
+    """Test that an idle bucket never holds more than its capacity."""
+    mock_monotonic.return_value = 0.0
+    bucket = TokenBucket(rate=10, capacity=2)
+    bucket.acquire()
+
+    mock_monotonic.return_value = 60.0
+    bucket.acquire()
+
+    assert bucket._tokens == 1
+
+
+def test_token_bucket_invalid_rate():
+    """Test that a bucket with no rate is rejected."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)